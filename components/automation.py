@@ -0,0 +1,292 @@
+"""
+🎚️ AUTOMATION - Crystal Therapy
+Automazione dei parametri con keyframe e curve, da un file JSON accanto al config
+
+I parametri sono costanti oppure seguono le variazioni sinusoidali della
+timeline. Per il montaggio servono rampe: più forza delle lenti durante il
+drop, glow che si spegne nel finale. Il file di automazione (AUTOMATION_FILE o
+--automation) associa a ogni parametro numerico del Config una lista di
+keyframe:
+
+    {
+        "LENS_MAX_STRENGTH": [
+            {"time": 0, "value": 1.5},
+            {"time": 30, "value": 1.5, "curve": "smoothstep"},
+            {"time": 34, "value": 3.0}
+        ],
+        "GLOW_INTENSITY": [
+            {"frame": 0, "value": 0.4, "curve": "bezier", "handles": [0.42, 0, 0.58, 1]},
+            {"frame": 5400, "value": 0.0}
+        ]
+    }
+
+- "frame" (indice) oppure "time" (secondi, convertiti con FPS)
+- "curve": interpolazione verso il keyframe successivo: 'linear' (default),
+  'smoothstep', 'bezier' (con "handles" x1, y1, x2, y2 come cubic-bezier CSS,
+  x1 e x2 in 0-1) o 'hold' (valore costante fino al keyframe successivo)
+- prima del primo e dopo l'ultimo keyframe il valore resta fermo
+
+Le curve vengono valutate in forma vettoriale per tutti i frame prima del
+render: ogni frame riceve un RenderSettings già pronto (condiviso tra frame
+consecutivi con gli stessi valori) e i parametri dinamici della timeline
+partono dai valori automatizzati. Durante il render l'automazione non costa
+nulla. Raggio e forza delle lenti (LENS_MIN/MAX_RADIUS, LENS_MIN/MAX_STRENGTH)
+seguono l'intervallo del frame: ogni lente resta nella stessa posizione
+dell'intervallo estratta all'avvio.
+
+`python -m components.automation` verifica che una rampa di LENS_MAX_STRENGTH
+cambi lo spostamento delle lenti.
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+
+CURVES = ('linear', 'smoothstep', 'bezier', 'hold')
+
+DEFAULT_BEZIER_HANDLES = (0.42, 0.0, 0.58, 1.0)  # ease-in-out
+
+# Parametri letti solo prima del render (dimensioni, numero di lenti, code...):
+# automatizzarli non avrebbe effetto
+STATIC_PARAMS = frozenset({
+    'FPS', 'DURATION_SECONDS', 'TOTAL_FRAMES', 'SVG_PADDING', 'SVG_LEFT_PADDING', 'LOGO_ZOOM_FACTOR',
+    'SMOOTHING_FACTOR', 'NUM_LENSES', 'TRACER_TRAIL_LENGTH', 'BG_TRACER_TRAIL_LENGTH',
+    'PIPELINE_QUEUE_SIZE', 'TILE_BANDS', 'INCREMENTAL_TILE_SIZE', 'PROGRESS_RATE_HZ', 'PROGRESS_LOG_INTERVAL',
+})
+
+
+def _bezier(u, handles):
+    """
+    Curva cubic-bezier (0,0)-(x1,y1)-(x2,y2)-(1,1) valutata in x = u.
+
+    x(s) è monotona per x1, x2 in [0, 1]: s si trova per bisezione, su tutti gli elementi insieme.
+    """
+    x1, y1, x2, y2 = handles.T
+    lo = np.zeros_like(u)
+    hi = np.ones_like(u)
+    for _ in range(40):
+        s = (lo + hi) * 0.5
+        x = 3 * (1 - s) ** 2 * s * x1 + 3 * (1 - s) * s ** 2 * x2 + s ** 3
+        below = x < u
+        lo = np.where(below, s, lo)
+        hi = np.where(below, hi, s)
+    s = (lo + hi) * 0.5
+    return 3 * (1 - s) ** 2 * s * y1 + 3 * (1 - s) * s ** 2 * y2 + s ** 3
+
+
+class AutomationTrack:
+    def __init__(self, name, frames, values, curves, handles):
+        """
+        Args:
+            name: Parametro del Config
+            frames: Frame dei keyframe (crescenti)
+            values: Valore a ogni keyframe
+            curves: Curva verso il keyframe successivo (una per keyframe)
+            handles: Maniglie bezier (x1, y1, x2, y2) per keyframe
+        """
+        self.name = name
+        self.frames = np.asarray(frames, dtype=np.float64)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.curves = np.array([CURVES.index(curve) for curve in curves])
+        self.handles = np.asarray(handles, dtype=np.float64).reshape(-1, 4)
+
+    def evaluate(self, frame_indices):
+        """Valori della traccia per tutti i frame indicati (vettoriale)."""
+        frames = np.asarray(frame_indices, dtype=np.float64)
+        if len(self.frames) == 1:
+            return np.full(frames.shape, self.values[0])
+
+        # Segmento [k, k+1] di ogni frame; prima/dopo i keyframe u resta a 0/1
+        segment = np.clip(np.searchsorted(self.frames, frames, side='right') - 1, 0, len(self.frames) - 2)
+        start, end = self.frames[segment], self.frames[segment + 1]
+        u = np.clip((frames - start) / (end - start), 0.0, 1.0)
+
+        curve = self.curves[segment]
+        eased = u.copy()
+        smooth = curve == CURVES.index('smoothstep')
+        eased[smooth] = u[smooth] * u[smooth] * (3.0 - 2.0 * u[smooth])
+        bezier = curve == CURVES.index('bezier')
+        if bezier.any():
+            eased[bezier] = _bezier(u[bezier], self.handles[segment[bezier]])
+        hold = curve == CURVES.index('hold')
+        eased[hold] = (u[hold] >= 1.0).astype(np.float64)
+
+        v0, v1 = self.values[segment], self.values[segment + 1]
+        return v0 + (v1 - v0) * eased
+
+
+class Automation:
+    def __init__(self, tracks=(), source=None):
+        """
+        Args:
+            tracks: AutomationTrack per parametro
+            source: File da cui è stata letta (per i messaggi)
+        """
+        self.tracks = {track.name: track for track in tracks}
+        self.source = source
+
+    def __bool__(self):
+        return bool(self.tracks)
+
+    def evaluate(self, total_frames):
+        """
+        Curve di tutti i parametri automatizzati su tutti i frame, prima del render.
+
+        Returns:
+            dict: {parametro: np.ndarray di total_frames valori}
+        """
+        frames = np.arange(total_frames)
+        return {name: track.evaluate(frames) for name, track in self.tracks.items()}
+
+    def describe(self):
+        return ', '.join(f"{name} ({len(track.frames)} keyframe)" for name, track in self.tracks.items())
+
+
+def _parse_keyframe(name, index, keyframe, fps):
+    if not isinstance(keyframe, dict) or 'value' not in keyframe:
+        raise ValueError(f"{name}: il keyframe {index} deve essere un oggetto con 'value'")
+    if ('frame' in keyframe) == ('time' in keyframe):
+        raise ValueError(f"{name}: il keyframe {index} richiede 'frame' oppure 'time' (non entrambi)")
+    frame = keyframe['frame'] if 'frame' in keyframe else keyframe['time'] * fps
+    curve = keyframe.get('curve', 'linear')
+    if curve not in CURVES:
+        raise ValueError(f"{name}: curva '{curve}' sconosciuta al keyframe {index} (valide: {', '.join(CURVES)})")
+    handles = tuple(keyframe.get('handles', DEFAULT_BEZIER_HANDLES))
+    if len(handles) != 4 or not (0.0 <= handles[0] <= 1.0 and 0.0 <= handles[2] <= 1.0):
+        raise ValueError(f"{name}: 'handles' del keyframe {index} deve essere [x1, y1, x2, y2] con x1, x2 in 0-1")
+    return float(frame), float(keyframe['value']), curve, handles
+
+
+def load_automation(path, settings):
+    """
+    Legge il file di automazione e verifica i parametri contro le impostazioni.
+
+    Args:
+        path: File JSON (vuoto o None: nessuna automazione)
+        settings: RenderSettings del render (FPS per i keyframe in secondi)
+
+    Returns:
+        Automation
+
+    Raises:
+        OSError: se il file non si legge
+        ValueError: se il formato o un parametro non sono validi
+    """
+    if not path:
+        return Automation()
+    with open(path, 'r') as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"File di automazione {path} non valido: {e}")
+    if not isinstance(data, dict):
+        raise ValueError(f"File di automazione {path}: atteso un oggetto {{parametro: [keyframe, ...]}}")
+
+    tracks = []
+    for name, keyframes in data.items():
+        if not hasattr(settings, name):
+            raise ValueError(f"Parametro sconosciuto nell'automazione: {name}")
+        current = getattr(settings, name)
+        if isinstance(current, bool) or not isinstance(current, (int, float)):
+            raise ValueError(f"{name}: si possono automatizzare solo parametri numerici")
+        if name in STATIC_PARAMS:
+            raise ValueError(f"{name}: parametro letto solo all'avvio, non automatizzabile")
+        if not isinstance(keyframes, list) or not keyframes:
+            raise ValueError(f"{name}: serve una lista non vuota di keyframe")
+        parsed = sorted((_parse_keyframe(name, index, keyframe, settings.FPS)
+                         for index, keyframe in enumerate(keyframes)), key=lambda keyframe: keyframe[0])
+        frames = [keyframe[0] for keyframe in parsed]
+        if len(set(frames)) != len(frames):
+            raise ValueError(f"{name}: due keyframe sullo stesso frame")
+        tracks.append(AutomationTrack(name, frames, [keyframe[1] for keyframe in parsed],
+                                      [keyframe[2] for keyframe in parsed], [keyframe[3] for keyframe in parsed]))
+    return Automation(tracks, source=path)
+
+
+def automated_frame_settings(settings, curves, total_frames):
+    """
+    RenderSettings di ogni frame con i valori delle curve.
+
+    Frame consecutivi con gli stessi valori condividono lo stesso oggetto (la
+    composizione incrementale riconosce così i tratti fermi dell'automazione).
+
+    Returns:
+        list: total_frames RenderSettings
+    """
+    if not curves:
+        return [settings] * total_frames
+    names = list(curves)
+    columns = []
+    for name in names:
+        values = curves[name]
+        if isinstance(getattr(settings, name), int):
+            values = np.rint(values).astype(np.int64)
+        columns.append(values.tolist())
+
+    frame_settings = []
+    previous_row, previous = None, None
+    for row in zip(*columns):
+        if row != previous_row:
+            previous = settings.replace(**dict(zip(names, row)))
+            previous_row = row
+        frame_settings.append(previous)
+    return frame_settings
+
+
+# --- Verifica sulle lenti ---
+
+def self_check(width=192, height=108, frames=4, factor=10.0):
+    """
+    Spostamento medio delle lenti (px) con LENS_MAX_STRENGTH costante e con una rampa fino a factor volte.
+
+    Returns:
+        list: (frame, spostamento costante, spostamento con la rampa)
+    """
+    # Lenti e campo sono quelli del generatore, importato solo qui
+    import natisone_trip_generator as generator
+    from components.kernels import lens_field_numpy
+    from components.settings import load_settings
+
+    settings = load_settings("config").replace(WIDTH=width, HEIGHT=height)
+    strength = settings.LENS_MAX_STRENGTH
+    ramp = Automation([AutomationTrack('LENS_MAX_STRENGTH', [0, frames - 1], [strength, strength * factor],
+                                       ['linear', 'linear'], [DEFAULT_BEZIER_HANDLES] * 2)])
+    grid_x, grid_y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+
+    def displacements(frame_settings):
+        np.random.seed(0)
+        lenses = generator.initialize_lenses(settings)
+        result = []
+        for index, config in enumerate(frame_settings):
+            generator.apply_lens_range(lenses, config)
+            map_x, map_y = grid_x.copy(), grid_y.copy()
+            scratch = {name: np.empty_like(grid_x) for name in ('dx', 'dy', 'dx_rot', 'dy_rot', 'distance')}
+            scratch['lens_mask'] = np.empty(grid_x.shape, dtype=bool)
+            lens_field_numpy(map_x, map_y, grid_x, grid_y, lenses, index, config.WORM_SHAPE_ENABLED,
+                             config.WORM_LENGTH, 1.0, scratch)
+            result.append(float(np.mean(np.hypot(map_x - grid_x, map_y - grid_y))))
+            generator.update_lenses(lenses, index, config, width, height)
+        return result
+
+    constant = displacements([settings] * frames)
+    ramped = displacements(automated_frame_settings(settings, ramp.evaluate(frames), frames))
+    return list(zip(range(frames), constant, ramped))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica dell'automazione di LENS_MAX_STRENGTH sulle lenti")
+    parser.add_argument('--frames', type=int, default=4, help="Frame della rampa")
+    parser.add_argument('--factor', type=float, default=10.0, help="LENS_MAX_STRENGTH finale / iniziale")
+    args = parser.parse_args()
+
+    rows = self_check(frames=args.frames, factor=args.factor)
+    print(f"\n🎚️ Spostamento medio delle lenti, LENS_MAX_STRENGTH costante e in rampa fino a {args.factor}x")
+    for frame, constant, ramped in rows:
+        print(f"   frame {frame}: {constant:8.3f} px -> {ramped:8.3f} px")
+    # Il primo frame parte dallo stesso valore, gli altri devono spostare di più
+    if rows[0][1] != rows[0][2] or any(ramped <= constant for _, constant, ramped in rows[1:]):
+        print("❌ La rampa non cambia lo spostamento delle lenti")
+        raise SystemExit(1)
+    print("✅ L'automazione di LENS_MAX_STRENGTH arriva alle lenti")
@@ -0,0 +1,137 @@
+"""
+🌫️ BLUR PYRAMID - Crystal Therapy
+Sfocature gaussiane ampie (glow, maschera morbida, bordi) a costo ridotto
+
+Un GaussianBlur 51x51 o 81x81 sul frame intero costa decine di millisecondi.
+Qui la stessa sfocatura viene costruita su una piramide: si scende di livello
+con cv2.pyrDown, si applica un piccolo blur residuo al livello ridotto e si
+risale con cv2.pyrUp. La varianza introdotta dai passaggi di piramide viene
+sottratta dal blur residuo, così il risultato approssima il kernel richiesto.
+
+I livelli ridotti sono calcolati una volta per sorgente e condivisi da tutte le
+sfocature richieste (es. glow con GLOW_KERNEL_SIZE e maschera morbida con
+EDGE_SOFTNESS sulla stessa logo_mask).
+"""
+
+import cv2
+import numpy as np
+
+
+# Livelli massimi di piramide per ogni qualità (0 = GaussianBlur esatto)
+BLUR_QUALITY_LEVELS = {
+    'exact': 0,
+    'high': 1,
+    'balanced': 2,
+    'fast': 3,
+}
+
+# Sigma residua minima (in pixel del livello) per considerare valido un livello
+_MIN_LEVEL_SIGMA = {
+    'exact': 0.0,
+    'high': 1.0,
+    'balanced': 1.0,
+    'fast': 0.5,
+}
+
+
+def odd_kernel_size(ksize):
+    """Rende dispari una dimensione di kernel, come richiesto da cv2.GaussianBlur."""
+    ksize = int(ksize)
+    return ksize if ksize % 2 != 0 else ksize + 1
+
+
+def kernel_sigma(ksize):
+    """Sigma usata da OpenCV quando GaussianBlur riceve sigma=0."""
+    return 0.3 * ((ksize - 1) * 0.5 - 1) + 0.8
+
+
+def blur_halo(ksize, quality='balanced'):
+    """
+    Righe di contesto necessarie sopra e sotto una banda perché la sua sfocatura
+    coincida (a meno di arrotondamenti) con quella calcolata sul frame intero.
+
+    Somma il raggio del kernel equivalente e il supporto dei filtri 5x5 di
+    pyrDown/pyrUp per ogni livello di piramide usato da quella qualità.
+    """
+    ksize = odd_kernel_size(ksize)
+    levels = BLUR_QUALITY_LEVELS.get(quality, BLUR_QUALITY_LEVELS['balanced'])
+    radius = max(ksize // 2, int(np.ceil(3 * kernel_sigma(ksize))))
+    return radius + 4 * (2 ** levels)
+
+
+class BlurPyramid:
+    def __init__(self, image, quality='balanced', size=None):
+        """
+        Args:
+            image: Immagine sorgente a un canale (uint8 o float32, range 0-255), np.ndarray o cv2.UMat
+            quality: 'exact', 'high', 'balanced' o 'fast' (vedi BLUR_QUALITY_LEVELS)
+            size: (altezza, larghezza) della sorgente, necessaria se è un cv2.UMat (che non ha shape)
+        """
+        if quality not in BLUR_QUALITY_LEVELS:
+            quality = 'balanced'
+        self.quality = quality
+        self.max_levels = BLUR_QUALITY_LEVELS[quality]
+        self.source = image
+        if isinstance(image, cv2.UMat):
+            # Conversione dentro OpenCV: la piramide resta nel UMat
+            self._levels = [cv2.multiply(image, 1.0, dtype=cv2.CV_32F)]
+        else:
+            self._levels = [image.astype(np.float32) if image.dtype != np.float32 else image]
+            size = image.shape[:2]
+        self._sizes = [tuple(size)]
+        self._cache = {}
+
+    def level(self, index):
+        """Restituisce il livello di piramide richiesto, costruendolo se serve."""
+        while len(self._levels) <= index:
+            self._levels.append(cv2.pyrDown(self._levels[-1]))
+            # Dimensioni di default di pyrDown: metà arrotondata per eccesso
+            h, w = self._sizes[-1]
+            self._sizes.append(((h + 1) // 2, (w + 1) // 2))
+        return self._levels[index]
+
+    def _choose_level(self, sigma):
+        """Sceglie il livello più basso possibile che lasci un blur residuo sensato."""
+        min_sigma = _MIN_LEVEL_SIGMA[self.quality]
+        h, w = self._sizes[0]
+        best = (0, sigma)
+        for level in range(1, self.max_levels + 1):
+            if min(h, w) >> level < 8:
+                break
+            # Ogni pyrDown + pyrUp aggiunge varianza ~1 px² al proprio livello
+            pyramid_variance = 2.0 * (4 ** level - 1) / 3.0
+            residual_variance = sigma * sigma - pyramid_variance
+            if residual_variance <= 0:
+                break
+            level_sigma = np.sqrt(residual_variance) / (2 ** level)
+            if level_sigma < min_sigma:
+                break
+            best = (level, level_sigma)
+        return best
+
+    def blur(self, ksize):
+        """
+        Sfocatura gaussiana equivalente a cv2.GaussianBlur(image, (ksize, ksize), 0).
+
+        Returns:
+            float32 a risoluzione piena, stessa scala della sorgente (cv2.UMat se lo è la sorgente)
+        """
+        ksize = odd_kernel_size(ksize)
+        cached = self._cache.get(ksize)
+        if cached is not None:
+            return cached
+
+        level, level_sigma = self._choose_level(kernel_sigma(ksize))
+        if level == 0:
+            result = cv2.GaussianBlur(self._levels[0], (ksize, ksize), 0)
+        else:
+            small = self.level(level)
+            small_ksize = odd_kernel_size(max(3, int(np.ceil(level_sigma * 3)) * 2 + 1))
+            result = cv2.GaussianBlur(small, (small_ksize, small_ksize), level_sigma)
+            # Risale la piramide rispettando le dimensioni originali dei livelli
+            for target in range(level - 1, -1, -1):
+                th, tw = self._sizes[target]
+                result = cv2.pyrUp(result, dstsize=(tw, th))
+
+        self._cache[ksize] = result
+        return result
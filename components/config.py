@@ -12,12 +12,15 @@ class Config:
     # --- Compatibilità WhatsApp ---
     WHATSAPP_COMPATIBLE = True   # Ottimizza per WhatsApp/social media
     CREATE_WHATSAPP_VERSION = True  # Crea versione aggiuntiva con ffmpeg
+    FRAME_STORE_ENABLED = False  # Salva anche i frame grezzi (.npy memory-mapped) per export WhatsApp/GIF/audio senza re-render (~6 MB/frame a 1080x1920)
+    OUTPUT_PROFILES = []  # Varianti codificate con ffmpeg in parallelo allo stesso render: 'master' (alta qualità), 'whatsapp', 'preview' (metà risoluzione)
     
     # --- Sorgente Logo e Texture ---
     USE_SVG_SOURCE = True        # True = usa SVG, False = usa PDF
     SVG_PATH = 'input/logo.svg'  # Percorso file SVG
     PDF_PATH = 'input/logo.pdf'  # Percorso file PDF alternativo
     SVG_LEFT_PADDING = 50        # Padding sinistro aggiuntivo per SVG (range: 0-200, 50=standard)
+    LOGO_RASTER_OVERSAMPLE = 4.0 # Pixel del raster per pixel del logo nel video (range: 1-8): il raster del logo segue la risoluzione del video invece di un 4x fisso
     TEXTURE_AUTO_SEARCH = True   # Cerca automaticamente file texture.*
     TEXTURE_FALLBACK_PATH = 'input/texture.jpg'  # Texture di fallback
     
@@ -29,12 +32,24 @@ class Config:
     # Modalità texture disponibili: 'normal', 'overlay', 'multiply', 'screen', 'soft_light', 'hard_light', 
     # 'color_dodge', 'color_burn', 'darken', 'lighten', 'difference', 'exclusion'
     TEXTURE_BLENDING_MODE = 'lighten'  # Modalità blending texture
+    TEXTURE_ANIMATION = 'none'   # Animazione texture: 'none', 'scroll' (scorrimento), 'zoom' (zoom pulsante)
+    TEXTURE_SCROLL_SPEED_X = 0.5   # Scorrimento orizzontale in pixel/frame (range: -5.0-5.0, 0=fermo)
+    TEXTURE_SCROLL_SPEED_Y = 0.0   # Scorrimento verticale in pixel/frame (range: -5.0-5.0, 0=fermo)
+    TEXTURE_ZOOM_SPEED = 0.02      # Velocità zoom pulsante (range: 0.005-0.1, 0.01=lento, 0.05=veloce)
+    TEXTURE_ZOOM_AMPLITUDE = 0.1   # Ampiezza zoom pulsante (range: 0.0-0.5, 0.05=sottile, 0.2=forte)
 
     # --- Parametri Video ---
     SVG_PADDING = 20  # Spazio intorno al logo (range: 50-300, ridotto in test mode per velocità)
     FPS = 1 if TEST_MODE else 20  # Frame per secondo (range: 10-60, 24=cinema, 30=standard, 60=fluido)
     DURATION_SECONDS = 4 if TEST_MODE else 10  # Durata video in secondi
     TOTAL_FRAMES = DURATION_SECONDS * FPS     # Frame totali calcolati   
+    PIPELINE_QUEUE_SIZE = 4  # Frame in coda tra gli stadi della pipeline (decodifica/render/codifica), più alto = più memoria
+    TILE_BANDS = 4  # Bande orizzontali renderizzate in parallelo dentro ogni frame (1 = disattivato, 4-8 = CPU multi-core)
+    INCREMENTAL_COMPOSITING = False  # Ricompone solo le zone cambiate rispetto al frame precedente (utile con deformazioni lente e sfondo rallentato)
+    INCREMENTAL_TILE_SIZE = 64  # Larghezza in pixel dei tile confrontati tra frame consecutivi (range: 16-256, multiplo di 8)
+    KERNEL_BACKEND = 'auto'  # Kernel lenti/blending: 'auto' (Numba se installato), 'numba', 'numpy'
+    CV_BACKEND = 'numpy'     # Fasi solo-cv2 (sfondo, remap organico, Canny/sfocature della maschera): 'numpy', 'umat' (OpenCV T-API), 'auto' (UMat solo con OpenCL)
+    COMPOSITE_PRECISION = 'float32'  # Composizione: 'float32' (riferimento) o 'fixed' (uint8/uint16 e tabelle, meno memoria, differenze di 1-2 livelli)
 
     # --- Colore e Stile ---
     LOGO_COLOR = (255, 255, 255)    # Colore logo BGR (range: 0-255 per canale, (0,0,0)=nero, (255,255,255)=bianco)
@@ -71,6 +86,11 @@ class Config:
     GLOW_ENABLED = True          # Attiva effetto bagliore intorno al logo
     GLOW_KERNEL_SIZE = 50  # Dimensione bagliore (range: 5-200, 25=sottile, 50=normale, 100=molto ampio)
     GLOW_INTENSITY = 0.4         # Intensità bagliore (range: 0.0-1.0, 0.1=tenue, 0.2=normale, 0.5=forte)
+    BLUR_QUALITY = 'balanced'    # Qualità sfocature ampie (glow, bordi morbidi): 'exact', 'high', 'balanced', 'fast'
+    LOGO_SDF_ENABLED = False     # Logo come campo di distanza: una sola deformazione, glow/bordi/traccianti da rampe per pixel invece di sfocature e Canny
+    LOGO_SDF_SUPERSAMPLE = 2     # Ingrandimento del raster per il campo di distanza (range: 1-4, 1=veloce, 2=normale, 4=bordi più precisi ma più memoria)
+    LOGO_MASK_MODE = 'binary'    # Maschera del logo: 'binary' (soglia, ri-sfocata per il blending) o 'coverage' (copertura a 8 bit usata come alpha)
+    LOGO_COVERAGE_SUPERSAMPLE = 4  # Ingrandimento del raster per la copertura (range: 2-8, 4=normale, 8=bordi più fini a bassa risoluzione)
 
     # --- Deformazione Organica ---
     # Questo effetto fa "respirare" il logo creando ondulazioni fluide che lo deformano nel tempo
@@ -95,6 +115,8 @@ class Config:
     LENS_MIN_RADIUS = 2         # Raggio minimo area influenza (range: 5-50, 10=piccola, 30=grande)
     LENS_MAX_RADIUS = 35         # Raggio massimo area influenza (range: 20-150, 50=media, 100=ampia)
     LENS_SPEED_FACTOR = 0.1    # Velocità movimento (range: 0.005-0.1, 0.01=lenta, 0.05=veloce)
+    LENS_CULLING_ENABLED = True  # Calcola solo le lenti che possono toccare il logo, ognuna nella sua zona (risultato identico)
+    LENS_BUCKET_SIZE = 32        # Lato in pixel dei tile che raggruppano le lenti (range: 16-128, 32=normale)
     
     # --- Parametri Movimento Lenti ---
     LENS_PATH_SPEED_MULTIPLIER = 0.1    # Velocità percorso (range: 1-20, 5=lenta, 10=normale, 15=veloce)
@@ -161,6 +183,9 @@ class Config:
     
     # --- Debug e Qualità ---
     DEBUG_MASK = False  # Mostra maschera di debug (per sviluppatori)
+    PROGRESS_MODE = 'auto'       # Avanzamento: 'auto' (barra su terminale, testo se rediretto), 'bar', 'plain', 'json', 'off'
+    PROGRESS_RATE_HZ = 4.0       # Aggiornamenti al secondo della barra (range: 1-10)
+    PROGRESS_LOG_INTERVAL = 2.0  # Secondi tra le righe di avanzamento 'plain'/'json' (range: 0.5-30)
     
     # --- Variazione Dinamica ---
     DYNAMIC_VARIATION_ENABLED = True  # Attiva variazioni automatiche nel tempo
@@ -168,3 +193,4 @@ class Config:
     VARIATION_SPEED_SLOW = 0.01       # Velocità variazioni lente (range: 0.005-0.05, 0.01=molto lente, 0.03=moderate)
     VARIATION_SPEED_MEDIUM = 0.025    # Velocità variazioni medie (range: 0.01-0.1, 0.02=normali, 0.05=veloci)
     VARIATION_SPEED_FAST = 0.005      # Velocità variazioni veloci (range: 0.002-0.02, 0.005=rapide, 0.015=frenetiche)
+    AUTOMATION_FILE = ''              # File JSON con keyframe e curve per i parametri numerici (vuoto = nessuna automazione, vedi components/automation.py)
@@ -0,0 +1,64 @@
+"""
+🗂️ CONTACT SHEET - Crystal Therapy
+Griglia di varianti dello stesso frame (es. preset di blending) con etichetta
+
+Il foglio ha le dimensioni del video: le celle mantengono le proporzioni del
+frame e la griglia viene centrata, così il foglio passa per gli stessi writer
+(PNG, clip, varianti, archivio dei frame) di un frame normale.
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+
+def sheet_grid(count):
+    """
+    Colonne, righe e scala delle celle per count frame in un foglio grande quanto un frame.
+
+    Sceglie la griglia che lascia le celle più grandi (a proporzioni invariate).
+    """
+    best = None
+    for columns in range(1, count + 1):
+        rows = math.ceil(count / columns)
+        scale = min(1.0 / columns, 1.0 / rows)
+        if best is None or scale > best[2]:
+            best = (columns, rows, scale)
+    return best
+
+
+def contact_sheet(frames, labels, width, height):
+    """
+    Affianca i frame in una griglia width x height, con l'etichetta in alto a sinistra.
+
+    Args:
+        frames: Frame BGR uint8 con le proporzioni del foglio (i frame del video)
+        labels: Testo di ogni cella (es. nome del preset)
+
+    Returns:
+        np.ndarray: Foglio BGR uint8 (height, width, 3)
+    """
+    columns, rows, scale = sheet_grid(len(frames))
+    cell_width = max(1, int(width * scale))
+    cell_height = max(1, int(height * scale))
+    x_offset = (width - columns * cell_width) // 2
+    y_offset = (height - rows * cell_height) // 2
+
+    sheet = np.zeros((height, width, 3), dtype=np.uint8)
+    font_scale = max(0.35, cell_width / 500)
+    thickness = max(1, int(round(font_scale * 2)))
+    for index, (frame, label) in enumerate(zip(frames, labels)):
+        row, column = divmod(index, columns)
+        x0 = x_offset + column * cell_width
+        y0 = y_offset + row * cell_height
+        cell = cv2.resize(frame, (cell_width, cell_height), interpolation=cv2.INTER_AREA)
+
+        # Etichetta su un riquadro scuro, leggibile su qualsiasi sfondo
+        (text_width, text_height), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        padding = max(2, text_height // 3)
+        cv2.rectangle(cell, (0, 0), (text_width + 2 * padding, text_height + baseline + 2 * padding), (0, 0, 0), -1)
+        cv2.putText(cell, label, (padding, padding + text_height), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                    (255, 255, 255), thickness, cv2.LINE_AA)
+        sheet[y0:y0 + cell_height, x0:x0 + cell_width] = cell
+    return sheet
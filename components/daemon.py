@@ -0,0 +1,270 @@
+"""
+🛰️ RENDER DAEMON - Crystal Therapy
+Processo di rendering persistente su socket Unix, con client leggero
+
+Ogni `python natisone_trip_generator.py` paga l'import di librosa, scipy, cv2,
+svgpathtools e fitz, più la decodifica di texture e logo. Il daemon importa il
+generatore una sola volta e resta in ascolto su un socket Unix: i job inviati
+dal client riusano moduli, texture in cache, maschere unificate, pool di
+thread e kernel Numba già compilati.
+
+Uso:
+    python -m components.daemon serve                 # avvia il daemon (primo piano)
+    python -m components.daemon render -- --test --frames 0:3
+    python -m components.daemon preview               # live preview nel daemon
+    python -m components.daemon status
+    python -m components.daemon stop
+
+Il client importa solo la libreria standard, quindi parte subito. I job girano
+uno alla volta nel thread principale del daemon (la finestra OpenCV della
+preview lo richiede), con la directory di lavoro del client; l'output del job
+viene inoltrato al client riga per riga e il codice di uscita del client è
+quello del job.
+
+Protocollo: una riga JSON di richiesta ({"cmd": "render"|"status"|"stop", ...})
+e in risposta righe JSON {"out": testo} seguite da {"exit": codice} oppure da
+{"status": {...}}.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import time
+import traceback
+
+
+def default_socket_path():
+    """Socket per utente nella directory temporanea (override: CRYSTAL_DAEMON_SOCKET)."""
+    env_path = os.environ.get('CRYSTAL_DAEMON_SOCKET')
+    if env_path:
+        return env_path
+    return os.path.join(tempfile.gettempdir(), f"crystal_therapy_{os.getuid()}.sock")
+
+
+def _send(conn, message):
+    conn.sendall((json.dumps(message) + "\n").encode('utf-8'))
+
+
+class _SocketStream:
+    """File-like che inoltra al client l'output di print() del job."""
+
+    def __init__(self, conn, tty):
+        self._conn = conn
+        self._tty = tty
+        self.closed = False
+        self.encoding = 'utf-8'
+
+    def write(self, text):
+        if text and not self.closed:
+            try:
+                _send(self._conn, {'out': text})
+            except OSError:
+                # Client disconnesso: il job continua, l'output va perso
+                self.closed = True
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        # La barra di avanzamento 'auto' segue il terminale del client, non quello del daemon
+        return self._tty
+
+
+class RenderDaemon:
+    def __init__(self, socket_path=None):
+        """
+        Args:
+            socket_path: Percorso del socket Unix (default: default_socket_path())
+        """
+        self.socket_path = socket_path or default_socket_path()
+        self.started = time.time()
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self._generator = None
+        self._running = False
+
+    def _load_generator(self):
+        """Importa il generatore una volta sola: è qui che si paga l'avvio a freddo."""
+        if self._generator is None:
+            t0 = time.perf_counter()
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            if root not in sys.path:
+                sys.path.insert(0, root)
+            import natisone_trip_generator
+            self._generator = natisone_trip_generator
+            print(f"🔥 Generatore caricato in {time.perf_counter() - t0:.2f}s")
+        return self._generator
+
+    def status(self):
+        generator = self._generator
+        return {
+            'pid': os.getpid(),
+            'socket': self.socket_path,
+            'uptime_s': round(time.time() - self.started, 1),
+            'jobs_completed': self.jobs_completed,
+            'jobs_failed': self.jobs_failed,
+            'warm': generator is not None,
+            'cached_textures': len(generator._texture_cache) if generator else 0,
+            'cached_logo_masks': len(generator._unified_mask_cache) if generator else 0,
+        }
+
+    def _run_job(self, conn, request):
+        generator = self._load_generator()
+        stream = _SocketStream(conn, bool(request.get('tty')))
+        saved_cwd = os.getcwd()
+        saved_streams = sys.stdout, sys.stderr
+        exit_code = 0
+        t0 = time.perf_counter()
+        try:
+            os.chdir(request.get('cwd') or saved_cwd)
+            sys.stdout = sys.stderr = stream
+            generator.main(list(request.get('argv') or []))
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            stream.write(traceback.format_exc())
+            exit_code = 1
+        finally:
+            sys.stdout, sys.stderr = saved_streams
+            os.chdir(saved_cwd)
+        if exit_code == 0:
+            self.jobs_completed += 1
+        else:
+            self.jobs_failed += 1
+        print(f"✅ Job {request.get('argv')} terminato (codice {exit_code}) in {time.perf_counter() - t0:.2f}s")
+        return exit_code
+
+    def _handle(self, conn):
+        with conn, conn.makefile('r', encoding='utf-8') as reader:
+            line = reader.readline()
+            if not line:
+                return
+            try:
+                request = json.loads(line)
+            except ValueError:
+                _send(conn, {'out': "❌ Richiesta non valida\n"})
+                _send(conn, {'exit': 2})
+                return
+            cmd = request.get('cmd')
+            if cmd == 'render':
+                _send(conn, {'exit': self._run_job(conn, request)})
+            elif cmd == 'status':
+                _send(conn, {'status': self.status()})
+            elif cmd == 'stop':
+                self._running = False
+                _send(conn, {'out': "🛑 Daemon in arresto\n"})
+                _send(conn, {'exit': 0})
+            else:
+                _send(conn, {'out': f"❌ Comando sconosciuto: {cmd}\n"})
+                _send(conn, {'exit': 2})
+
+    def serve(self):
+        """Loop di accept nel thread principale; i job vengono eseguiti in serie."""
+        if os.path.exists(self.socket_path):
+            if _ping(self.socket_path):
+                raise RuntimeError(f"Daemon già attivo su {self.socket_path}")
+            os.unlink(self.socket_path)  # Socket orfano di un daemon terminato male
+
+        self._load_generator()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen(8)
+        self._running = True
+        print(f"🛰️ Daemon in ascolto su {self.socket_path} (pid {os.getpid()})")
+        try:
+            while self._running:
+                conn, _ = server.accept()
+                try:
+                    self._handle(conn)
+                except OSError as e:
+                    print(f"⚠️ Connessione interrotta: {e}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            print("👋 Daemon terminato")
+
+
+# --- Client ---
+
+def _connect(socket_path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(socket_path)
+    return client
+
+
+def _ping(socket_path):
+    try:
+        with _connect(socket_path):
+            return True
+    except OSError:
+        return False
+
+
+def request(message, socket_path=None, out=None):
+    """
+    Invia una richiesta al daemon e inoltra l'output su `out`.
+
+    Returns:
+        tuple: (codice di uscita, stato del daemon per 'status' o None)
+    """
+    out = out or sys.stdout
+    with _connect(socket_path or default_socket_path()) as client:
+        _send(client, message)
+        with client.makefile('r', encoding='utf-8') as reader:
+            for line in reader:
+                reply = json.loads(line)
+                if 'out' in reply:
+                    out.write(reply['out'])
+                    out.flush()
+                elif 'status' in reply:
+                    return 0, reply['status']
+                elif 'exit' in reply:
+                    return reply['exit'], None
+    raise ConnectionError("Il daemon ha chiuso la connessione prima della fine del job")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Daemon di rendering Crystal Therapy')
+    parser.add_argument('--socket', default=None, help='Percorso del socket Unix (default: CRYSTAL_DAEMON_SOCKET o tmp)')
+    parser.add_argument('command', choices=['serve', 'render', 'preview', 'status', 'stop'])
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help="Argomenti per natisone_trip_generator.py (dopo '--')")
+    args = parser.parse_args(argv)
+    socket_path = args.socket or default_socket_path()
+
+    if args.command == 'serve':
+        RenderDaemon(socket_path).serve()
+        return 0
+
+    job_args = args.args[1:] if args.args[:1] == ['--'] else args.args
+    try:
+        if args.command == 'status':
+            _, status = request({'cmd': 'status'}, socket_path)
+            for key, value in status.items():
+                print(f"{key}: {value}")
+            return 0
+        if args.command == 'stop':
+            return request({'cmd': 'stop'}, socket_path)[0]
+        if args.command == 'preview' and '--preview' not in job_args:
+            job_args = ['--preview'] + job_args
+        return request({
+            'cmd': 'render',
+            'argv': job_args,
+            'cwd': os.getcwd(),
+            'tty': sys.stdout.isatty(),
+        }, socket_path)[0]
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"❌ Nessun daemon su {socket_path}: avvialo con 'python -m components.daemon serve'")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
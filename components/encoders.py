@@ -0,0 +1,178 @@
+"""
+🎞️ ENCODERS - Crystal Therapy
+Codifica simultanea di più varianti dallo stesso render (master, WhatsApp, anteprima)
+
+Lo stadio di codifica della pipeline passa ogni frame a più encoder ffmpeg che
+girano in parallelo, ognuno con risoluzione e profilo propri. Ogni encoder ha
+un thread e una coda limitata: il render non aspetta ffmpeg finché la coda non
+si riempie, e le varianti si codificano mentre i frame successivi vengono
+renderizzati. Il frame viene condiviso tra gli encoder senza copie (la
+composizione produce un array nuovo a ogni frame).
+
+Profili (OUTPUT_PROFILES o --outputs, separati da virgole):
+- 'master':   H.264 high, CRF 12, alta qualità per archivio/montaggio
+- 'whatsapp': H.264 baseline 3.1, yuv420p, faststart
+- 'preview':  metà risoluzione, CRF 28, per revisioni veloci
+"""
+
+import queue
+import shutil
+import subprocess
+import threading
+
+import numpy as np
+
+
+# Parametri ffmpeg per profilo: scala rispetto al render e argomenti del codec
+ENCODER_PROFILES = {
+    'master': {
+        'scale': 1.0,
+        'args': ['-c:v', 'libx264', '-profile:v', 'high', '-preset', 'slow', '-crf', '12',
+                 '-pix_fmt', 'yuv420p'],
+    },
+    'whatsapp': {
+        'scale': 1.0,
+        'args': ['-c:v', 'libx264', '-profile:v', 'baseline', '-level', '3.1', '-preset', 'medium',
+                 '-crf', '23', '-pix_fmt', 'yuv420p', '-movflags', '+faststart'],
+    },
+    'preview': {
+        'scale': 0.5,
+        'args': ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28', '-pix_fmt', 'yuv420p'],
+    },
+}
+
+FFMPEG_AVAILABLE = shutil.which('ffmpeg') is not None
+
+
+def parse_output_profiles(profiles):
+    """
+    Normalizza la lista dei profili (stringa con virgole o sequenza).
+
+    Raises:
+        ValueError: se un profilo non esiste
+    """
+    if isinstance(profiles, str):
+        profiles = profiles.split(',')
+    names = []
+    for name in profiles:
+        name = name.strip().lower()
+        if not name or name in names:
+            continue
+        if name not in ENCODER_PROFILES:
+            raise ValueError(f"Profilo di output sconosciuto: {name} (validi: {', '.join(ENCODER_PROFILES)})")
+        names.append(name)
+    return names
+
+
+def _even(value):
+    # H.264 con yuv420p richiede dimensioni pari
+    return max(2, int(value) // 2 * 2)
+
+
+class EncoderProcess:
+    def __init__(self, name, output_path, width, height, fps, queue_size=8):
+        """
+        Args:
+            name: Profilo in ENCODER_PROFILES
+            output_path: File mp4 da scrivere
+            width, height: Dimensioni dei frame renderizzati
+            fps: Frame rate
+            queue_size: Frame in attesa prima che write() blocchi il render
+        """
+        profile = ENCODER_PROFILES[name]
+        self.name = name
+        self.output_path = output_path
+        self.size = (_even(width * profile['scale']), _even(height * profile['scale']))
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}", '-r', str(fps), '-i', 'pipe:0',
+            '-vf', f"scale={self.size[0]}:{self.size[1]}:flags=lanczos",
+        ] + profile['args'] + [output_path]
+        self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.PIPE)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._stderr = []
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, name=f"ffmpeg-{name}-log", daemon=True)
+        self._stderr_thread.start()
+        self._thread = threading.Thread(target=self._run, name=f"encoder-{name}", daemon=True)
+        self._thread.start()
+
+    def _drain_stderr(self):
+        for line in self._process.stderr:
+            self._stderr.append(line.decode('utf-8', errors='replace'))
+
+    def _run(self):
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                self._process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast('B'))
+        except (BrokenPipeError, OSError) as e:
+            self._error = e
+            # Svuota la coda: write() non deve bloccarsi su un encoder morto
+            while self._queue.get() is not None:
+                pass
+        finally:
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+
+    def write(self, frame):
+        self._queue.put(frame)
+
+    def close(self):
+        """
+        Attende la fine della codifica.
+
+        Returns:
+            bool: True se il file è stato scritto correttamente
+        """
+        self._queue.put(None)
+        self._thread.join()
+        returncode = self._process.wait()
+        self._stderr_thread.join()
+        if returncode != 0 or self._error is not None:
+            print(f"❌ Encoder '{self.name}' fallito (codice {returncode}): {''.join(self._stderr)[-500:].strip()}")
+            return False
+        return True
+
+
+class MultiEncoder:
+    def __init__(self, profiles, output_filename, width, height, fps, queue_size=8):
+        """
+        Avvia un encoder ffmpeg per profilo; i file sono `<output>_<profilo>.mp4`.
+
+        Args:
+            profiles: Nomi dei profili (vedi parse_output_profiles)
+            output_filename: Nome del video principale (.mp4)
+            queue_size: Frame in coda per encoder
+        """
+        self.encoders = []
+        if not profiles:
+            return
+        if not FFMPEG_AVAILABLE:
+            print(f"⚠️ ffmpeg non trovato: varianti {', '.join(profiles)} saltate")
+            return
+        for name in profiles:
+            path = output_filename.replace('.mp4', f"_{name}.mp4")
+            encoder = EncoderProcess(name, path, width, height, fps, queue_size)
+            print(f"🎞️ Variante '{name}' {encoder.size[0]}x{encoder.size[1]}: {path}")
+            self.encoders.append(encoder)
+
+    def __bool__(self):
+        return bool(self.encoders)
+
+    def write(self, frame):
+        """Passa lo stesso frame a tutti gli encoder (nessuna copia)."""
+        for encoder in self.encoders:
+            encoder.write(frame)
+
+    def close(self):
+        """
+        Returns:
+            dict: {profilo: percorso} delle varianti scritte correttamente
+        """
+        return {encoder.name: encoder.output_path for encoder in self.encoders if encoder.close()}
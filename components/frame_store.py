@@ -0,0 +1,238 @@
+"""
+🗃️ FRAME STORE - Crystal Therapy
+Archivio dei frame grezzi su disco, memory-mapped, per esportazioni multiple
+
+Versione WhatsApp, GIF di anteprima o un mix con un audio diverso richiedono
+di nuovo tutti i frame: senza archivio servirebbe un nuovo render oppure una
+decodifica (con perdita) dell'mp4. Con FRAME_STORE_ENABLED (o --frame-store)
+il rendering scrive ogni frame, accanto all'encoder, in una directory
+`<video>_store/`:
+
+- frames.npy: cubo uint8 (frame, altezza, larghezza, 3) in BGR, formato .npy
+              standard aperto con np.lib.format.open_memmap
+- meta.json:  fps, primo frame, frame scritti, audio usato dal render
+
+Gli export leggono i frame direttamente dalla mappa in memoria (nessuna copia,
+nessuna decodifica) e li passano a ffmpeg come rawvideo.
+
+Uso:
+    python -m components.frame_store <store> --info
+    python -m components.frame_store <store> --whatsapp out.mp4
+    python -m components.frame_store <store> --gif anteprima.gif [--gif-width 480 --gif-fps 10]
+    python -m components.frame_store <store> --video out.mp4 [--audio file.aif --audio-offset 12.5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+
+import numpy as np
+
+
+FRAMES_FILE = 'frames.npy'
+META_FILE = 'meta.json'
+
+# Solo errori su stderr: con la pipe piena ffmpeg si bloccherebbe mentre riceve i frame
+_FFMPEG = ['ffmpeg', '-y', '-loglevel', 'error']
+
+
+class FrameStore:
+    def __init__(self, path, frames, meta):
+        """Usare FrameStore.create() per scrivere e FrameStore.open() per leggere."""
+        self.path = path
+        self.frames = frames
+        self.meta = meta
+
+    @classmethod
+    def create(cls, path, frame_count, width, height, fps, first_frame=0):
+        """
+        Crea l'archivio e alloca su disco il cubo di frame (file sparso, riempito durante il render).
+
+        Args:
+            path: Directory dell'archivio (creata se manca)
+            frame_count: Numero di frame da scrivere
+            width, height: Dimensioni dei frame
+            fps: Frame rate del render
+            first_frame: Indice del primo frame (per --frames)
+        """
+        os.makedirs(path, exist_ok=True)
+        frames = np.lib.format.open_memmap(os.path.join(path, FRAMES_FILE), mode='w+', dtype=np.uint8,
+                                           shape=(frame_count, height, width, 3))
+        meta = {
+            'fps': fps,
+            'width': width,
+            'height': height,
+            'first_frame': first_frame,
+            'frame_count': frame_count,
+            'frames_written': 0,
+            'audio': None,
+        }
+        store = cls(path, frames, meta)
+        store._write_meta()
+        return store
+
+    @classmethod
+    def open(cls, path):
+        """Apre un archivio esistente in sola lettura (memory-mapped, nessuna copia)."""
+        with open(os.path.join(path, META_FILE), 'r') as f:
+            meta = json.load(f)
+        frames = np.load(os.path.join(path, FRAMES_FILE), mmap_mode='r')
+        # Un render interrotto lascia frame non scritti in coda: si espongono solo quelli validi
+        return cls(path, frames[:meta['frames_written']], meta)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def fps(self):
+        return self.meta['fps']
+
+    @property
+    def size_bytes(self):
+        return self.frames.nbytes
+
+    # --- Scrittura (durante il render) ---
+
+    def write(self, frame_index, frame):
+        """Copia il frame nella sua posizione; i frame arrivano in ordine dalla pipeline."""
+        position = frame_index - self.meta['first_frame']
+        self.frames[position] = frame
+        self.meta['frames_written'] = max(self.meta['frames_written'], position + 1)
+
+    def set_audio(self, selected_file, start_offset):
+        """Registra l'audio del render, usato di default da export_video."""
+        self.meta['audio'] = {'file': selected_file, 'start_offset': start_offset}
+
+    def close(self):
+        """Scarica la mappa su disco e aggiorna meta.json."""
+        if isinstance(self.frames, np.memmap):
+            self.frames.flush()
+        self._write_meta()
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, META_FILE), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    # --- Lettura ---
+
+    def iter_frames(self, step=1):
+        """Frame in ordine come viste sulla mappa in memoria (nessuna copia)."""
+        for position in range(0, len(self.frames), step):
+            yield self.frames[position]
+
+
+# --- Esportazioni (ffmpeg legge i frame grezzi da stdin) ---
+
+def _rawvideo_input(store, fps=None):
+    return [
+        '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+        '-s', f"{store.meta['width']}x{store.meta['height']}",
+        '-r', str(fps or store.fps), '-i', 'pipe:0',
+    ]
+
+
+def _run_ffmpeg(cmd, frames):
+    print(f"🔧 Comando: {' '.join(cmd)}")
+    try:
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("ffmpeg non trovato: installalo per esportare dall'archivio dei frame")
+    try:
+        for frame in frames:
+            # memoryview: la vista sulla mappa va a ffmpeg senza copie intermedie
+            process.stdin.write(memoryview(np.ascontiguousarray(frame)).cast('B'))
+    except BrokenPipeError:
+        pass
+    finally:
+        process.stdin.close()
+    stderr = process.stderr.read().decode('utf-8', errors='replace')
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg terminato con errore:\n{stderr[-2000:]}")
+
+
+def export_video(store, output_path, audio_file=None, audio_offset=None, crf=18):
+    """
+    Codifica l'archivio in H.264, con l'audio indicato o con quello del render.
+
+    Returns:
+        str: output_path
+    """
+    audio = store.meta.get('audio') if audio_file is None else {'file': audio_file, 'start_offset': 0.0}
+    if audio is not None and audio_offset is not None:
+        audio = dict(audio, start_offset=audio_offset)
+    cmd = _FFMPEG + _rawvideo_input(store)
+    if audio is not None:
+        cmd += ['-ss', str(audio['start_offset']), '-i', audio['file'], '-map', '0:v:0', '-map', '1:a:0',
+                '-c:a', 'aac', '-shortest']
+    cmd += ['-c:v', 'libx264', '-preset', 'medium', '-crf', str(crf), '-pix_fmt', 'yuv420p', output_path]
+    _run_ffmpeg(cmd, store.iter_frames())
+    print(f"✅ Video esportato: {output_path}")
+    return output_path
+
+
+def export_whatsapp(store, output_path):
+    """
+    Versione compatibile WhatsApp: H.264 baseline, yuv420p, dimensioni pari, faststart.
+
+    Returns:
+        str: output_path
+    """
+    cmd = _FFMPEG + _rawvideo_input(store)
+    audio = store.meta.get('audio')
+    if audio is not None:
+        cmd += ['-ss', str(audio['start_offset']), '-i', audio['file'], '-map', '0:v:0', '-map', '1:a:0',
+                '-c:a', 'aac', '-b:a', '128k', '-shortest']
+    cmd += ['-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2', '-c:v', 'libx264', '-profile:v', 'baseline',
+            '-level', '3.1', '-crf', '23', '-pix_fmt', 'yuv420p', '-movflags', '+faststart', output_path]
+    _run_ffmpeg(cmd, store.iter_frames())
+    print(f"📱 Versione WhatsApp esportata: {output_path}")
+    return output_path
+
+
+def export_gif(store, output_path, width=480, fps=10):
+    """
+    GIF di anteprima con palette ottimizzata; i frame vengono sottocampionati a `fps`.
+
+    Returns:
+        str: output_path
+    """
+    step = max(1, int(round(store.fps / fps)))
+    cmd = _FFMPEG + _rawvideo_input(store, fps=store.fps / step)
+    cmd += ['-vf', f"scale={width}:-1:flags=lanczos,split[a][b];[a]palettegen[p];[b][p]paletteuse",
+            '-loop', '0', output_path]
+    _run_ffmpeg(cmd, store.iter_frames(step))
+    print(f"🎞️ GIF esportata: {output_path}")
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Esportazioni dall'archivio dei frame grezzi")
+    parser.add_argument('store', help="Directory dell'archivio (<video>_store)")
+    parser.add_argument('--info', action='store_true', help="Mostra il contenuto dell'archivio")
+    parser.add_argument('--video', metavar='MP4', help="Esporta in H.264 (con --audio per cambiare l'audio)")
+    parser.add_argument('--audio', metavar='FILE', help="Audio da mixare con --video (default: quello del render)")
+    parser.add_argument('--audio-offset', type=float, metavar='SEC', help="Inizio dell'audio in secondi")
+    parser.add_argument('--whatsapp', metavar='MP4', help="Esporta la versione compatibile WhatsApp")
+    parser.add_argument('--gif', metavar='GIF', help="Esporta una GIF di anteprima")
+    parser.add_argument('--gif-width', type=int, default=480, help="Larghezza della GIF (default: %(default)s)")
+    parser.add_argument('--gif-fps', type=float, default=10, help="Frame rate della GIF (default: %(default)s)")
+    args = parser.parse_args()
+
+    store = FrameStore.open(args.store)
+    try:
+        if args.info or not (args.video or args.whatsapp or args.gif):
+            meta = store.meta
+            print(f"🗃️ {args.store}: {len(store)} frame {meta['width']}x{meta['height']} @ {meta['fps']}fps "
+                  f"(primo frame {meta['first_frame']}, {store.size_bytes / 1024**3:.2f} GB)")
+            if meta.get('audio'):
+                print(f"🎵 Audio del render: {meta['audio']['file']} da {meta['audio']['start_offset']:.1f}s")
+        if args.video:
+            export_video(store, args.video, args.audio, args.audio_offset)
+        if args.whatsapp:
+            export_whatsapp(store, args.whatsapp)
+        if args.gif:
+            export_gif(store, args.gif, args.gif_width, args.gif_fps)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
@@ -0,0 +1,196 @@
+"""
+♻️ INCREMENTAL COMPOSITING - Crystal Therapy
+Composizione incrementale: si ricalcola solo dove la maschera del logo è cambiata
+
+Con DEFORMATION_SPEED basso e percorsi lenti delle lenti, due maschere del logo
+consecutive differiscono in poche zone. Lo stato incrementale confronta la
+maschera deformata con quella del frame precedente su una griglia di tile
+(INCREMENTAL_TILE_SIZE) e lavora su due livelli:
+
+1. Prodotti della sola maschera (traccianti del logo con Canny, blur del glow,
+   blur della maschera morbida): restano in cache a frame intero e vengono
+   ricalcolati solo sulle colonne dei tile cambiati, più il loro halo.
+2. Bande intere: se sfondo, bordi, maschera (con halo), traccianti e parametri
+   del frame non sono cambiati, la banda del frame precedente viene copiata
+   così com'è (es. sfondo ripetuto con BG_SLOWDOWN_FACTOR e logo fermo).
+
+Il glow pulsa a ogni frame e l'adaptive blending usa medie globali: le bande
+toccate dal logo vengono quindi ricomposte quasi sempre, ma riusano i prodotti
+della maschera. Con --verify-incremental ogni frame viene confrontato con la
+composizione completa.
+"""
+
+import threading
+
+import numpy as np
+
+from components.tiles import BAND_ALIGN, align_margin
+
+
+class IncrementalState:
+    def __init__(self, tile_size=64):
+        """
+        Args:
+            tile_size: Larghezza in pixel dei tile di confronto della maschera (multiplo di 8)
+        """
+        self.tile_size = align_margin(max(BAND_ALIGN, tile_size))
+        self.config = None
+        self.prev_mask = None
+        self.prev_background = None
+        self.prev_logo_edges = None
+        self.prev_output = None
+        self.prev_combined_edges = None
+        self.prev_texture = None
+        self.prev_glow_color = None
+        self.prev_tracer_free = {}
+        self.products = {}
+        self._row_occupancy = {}
+        self._stats_lock = threading.Lock()
+        self.bands_total = 0
+        self.bands_reused = 0
+        self.columns_total = 0
+        self.columns_recomputed = 0
+
+    # --- Inizio / fine frame ---
+
+    def begin_frame(self, config, logo_mask, tracer_histories):
+        """
+        Prepara il confronto col frame precedente.
+
+        Returns:
+            bool: True se c'è un frame precedente compatibile (altrimenti si ricalcola tutto)
+        """
+        valid = (self.prev_mask is not None and config is self.config
+                 and self.prev_mask.shape == logo_mask.shape)
+        if not valid:
+            self.products = {}
+        self.config = config
+
+        # Righe occupate da ogni array di storia dei traccianti (calcolate una volta per array)
+        live = {}
+        for history in tracer_histories:
+            for edges in history:
+                key = id(edges)
+                live[key] = self._row_occupancy.get(key)
+                if live[key] is None:
+                    live[key] = edges.any(axis=1)
+        self._row_occupancy = live
+        return valid
+
+    def end_frame(self, background, logo_mask, logo_edges, output, combined_edges, texture, glow_color):
+        """Memorizza gli ingressi del frame appena composto per il confronto successivo."""
+        self.prev_background = _copy_into(self.prev_background, background)
+        self.prev_mask = _copy_into(self.prev_mask, logo_mask)
+        self.prev_logo_edges = _copy_into(self.prev_logo_edges, logo_edges)
+        # Output e bordi combinati sono array nuovi a ogni frame: basta il riferimento
+        self.prev_output = output
+        self.prev_combined_edges = combined_edges
+        self.prev_texture = texture
+        self.prev_glow_color = glow_color
+
+    # --- Decisioni per banda ---
+
+    def tracer_free(self, rows):
+        """True se nessun array di storia dei traccianti ha pixel accesi nelle righe."""
+        return not any(occupancy[rows].any() for occupancy in self._row_occupancy.values())
+
+    def band_reusable(self, band, valid, background, logo_mask, logo_edges, influence_halo,
+                      frame_params_equal, tracer_free):
+        """
+        True se l'output della banda coincide con quello del frame precedente.
+
+        Args:
+            valid: Risultato di begin_frame
+            influence_halo: Righe attorno alla banda da cui la maschera influenza l'output
+            frame_params_equal: Parametri del frame (glow, texture, statistiche) invariati
+            tracer_free: La banda non ha traccianti in questo frame
+        """
+        rows = band.rows
+        reusable = (valid and tracer_free and self.prev_tracer_free.get(band, False)
+                    and np.array_equal(background[rows], self.prev_background[rows])
+                    and np.array_equal(logo_edges[rows], self.prev_logo_edges[rows]))
+        if reusable:
+            halo_rows, _ = band.context(influence_halo)
+            mask, prev_mask = logo_mask[halo_rows], self.prev_mask[halo_rows]
+            if frame_params_equal:
+                reusable = np.array_equal(mask, prev_mask)
+            else:
+                # Senza logo attorno alla banda glow, texture e statistiche non contano
+                reusable = not mask.any() and not prev_mask.any()
+        self.prev_tracer_free[band] = tracer_free
+        with self._stats_lock:
+            self.bands_total += 1
+            self.bands_reused += bool(reusable)
+        return reusable
+
+    # --- Prodotti della sola maschera ---
+
+    def _dirty_spans(self, band, logo_mask, halo, valid):
+        """Intervalli di colonne [x0, x1) della banda da ricalcolare."""
+        width = logo_mask.shape[1]
+        if not valid or not self.products:
+            return [(0, width)]
+        halo_rows, _ = band.context(halo)
+        changed = (logo_mask[halo_rows] != self.prev_mask[halo_rows]).any(axis=0)
+        tile = self.tile_size
+        spans = []
+        for t0 in range(0, width, tile):
+            if not changed[t0:t0 + tile].any():
+                continue
+            # Un cambiamento influenza le colonne entro l'halo
+            x0 = max(0, t0 - halo)
+            x1 = min(width, t0 + tile + halo)
+            if spans and x0 <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], x1)
+            else:
+                spans.append((x0, x1))
+        return spans
+
+    def band_products(self, band, logo_mask, halo, valid, compute):
+        """
+        Prodotti della maschera per le righe della banda, dalla cache o ricalcolati.
+
+        Args:
+            halo: Margine (righe e colonne) richiesto da compute
+            compute: compute(regione della maschera) -> dict {nome: array della regione o None}
+
+        Returns:
+            dict: {nome: vista [band.rows] dell'array a frame intero o None}
+        """
+        height, width = logo_mask.shape[:2]
+        halo_rows, inner = band.context(halo)
+        rows = band.rows
+        spans = self._dirty_spans(band, logo_mask, halo, valid)
+        for x0, x1 in spans:
+            c0 = max(0, x0 - halo)
+            c1 = min(width, x1 + halo)
+            region = compute(logo_mask[halo_rows, c0:c1])
+            for name, values in region.items():
+                if values is None:
+                    self.products[name] = None
+                    continue
+                cache = self.products.get(name)
+                if cache is None:
+                    # Creato dalla prima banda: le altre bande lo trovano già (dimensioni fisse)
+                    cache = self.products.setdefault(name, np.empty((height, width), dtype=values.dtype))
+                cache[rows, x0:x1] = values[inner, x0 - c0:x1 - c0]
+        with self._stats_lock:
+            self.columns_total += width
+            self.columns_recomputed += sum(x1 - x0 for x0, x1 in spans)
+        # Copia della lista: al primo frame le altre bande possono ancora aggiungere prodotti
+        return {name: (cache[rows] if cache is not None else None) for name, cache in list(self.products.items())}
+
+    def report(self):
+        """Riepilogo del riuso per il log di fine render."""
+        bands = f"{self.bands_reused}/{self.bands_total} bande riusate"
+        if self.columns_total == 0:
+            return f"♻️ Composizione incrementale: {bands}"
+        ratio = self.columns_recomputed / self.columns_total
+        return f"♻️ Composizione incrementale: {bands}, maschera ricalcolata sul {ratio:.0%} delle colonne"
+
+
+def _copy_into(target, source):
+    if target is None or target.shape != source.shape or target.dtype != source.dtype:
+        return source.copy()
+    np.copyto(target, source)
+    return target
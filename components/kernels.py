@@ -0,0 +1,513 @@
+"""
+⚡ KERNELS - Crystal Therapy
+Kernel per-pixel del campo delle lenti e dei modi di blending, con backend Numba opzionale
+
+Il campo delle lenti (rotazione, onda del "verme", caduta radiale, somma degli
+spostamenti) e le formule dei modi di blending sono cicli per-pixel che NumPy
+spezza in molte operazioni con array temporanei a piena risoluzione. Con Numba
+installato gli stessi calcoli vengono compilati in un unico ciclo fuso e
+parallelo (prange), senza temporanei.
+
+KERNEL_BACKEND:
+- 'auto':  Numba se disponibile, altrimenti NumPy
+- 'numba': Numba (se manca si torna a NumPy con un avviso)
+- 'numpy': sempre l'implementazione NumPy originale
+
+I due backend sono numericamente equivalenti a meno di arrotondamenti float32:
+`python -m components.kernels` li confronta su dati casuali.
+
+Con molte lenti (LENS_CULLING_ENABLED) ogni lente lavora solo nel proprio
+rettangolo di influenza: plan_lenses scarta quelle fuori dal frame o lontane
+da qualunque pixel acceso della maschera, NumPy calcola ogni lente solo sul suo
+rettangolo e Numba scorre per ogni tile (LENS_BUCKET_SIZE) solo le lenti che
+lo toccano. Le mappe restano identiche nelle zone che il remap legge.
+"""
+
+import importlib.util
+import threading
+
+import numpy as np
+
+# Numba è un acceleratore opzionale e lento da importare: i kernel compilati
+# (components/kernels_numba.py) vengono caricati solo al primo uso
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+_numba_kernels = None
+
+
+KERNEL_BACKENDS = ('auto', 'numpy', 'numba')
+
+# Codici dei modi di blending per il kernel compilato
+BLEND_MODE_CODES = {
+    'normal': 0,
+    'multiply': 1,
+    'screen': 2,
+    'overlay': 3,
+    'soft_light': 4,
+    'hard_light': 5,
+    'color_dodge': 6,
+    'color_burn': 7,
+    'difference': 8,
+    'exclusion': 9,
+}
+
+# Il threading layer di default di Numba non accetta lanci paralleli concorrenti:
+# pipeline e bande chiamano i kernel da più thread, quindi i lanci sono serializzati
+# (ogni kernel usa già tutti i core)
+_numba_lock = threading.Lock()
+_warned_missing = False
+
+
+def _load_numba_kernels():
+    """Importa components.kernels_numba (e Numba) alla prima richiesta; None se non disponibile."""
+    global NUMBA_AVAILABLE, _numba_kernels
+    if _numba_kernels is None and NUMBA_AVAILABLE:
+        try:
+            from components import kernels_numba
+            _numba_kernels = kernels_numba
+        except ImportError:
+            NUMBA_AVAILABLE = False
+    return _numba_kernels
+
+
+def resolve_kernel_backend(backend='auto'):
+    """Restituisce 'numba' o 'numpy' in base alla richiesta e a cosa è installato."""
+    global _warned_missing
+    if backend not in KERNEL_BACKENDS:
+        raise ValueError(f"Backend kernel sconosciuto: {backend} (validi: {', '.join(KERNEL_BACKENDS)})")
+    if backend == 'numpy':
+        return 'numpy'
+    if _load_numba_kernels() is not None:
+        return 'numba'
+    if backend == 'numba' and not _warned_missing:
+        print("⚠️ Numba non disponibile, uso i kernel NumPy. Per accelerarli: pip install numba")
+        _warned_missing = True
+    return 'numpy'
+
+
+def prepare_kernel_backend(backend='auto'):
+    """
+    Risolve il backend e, con Numba, avvia il suo pool di thread.
+
+    Va chiamata dal thread principale prima di avviare la pipeline: se il pool di
+    Numba nasce dentro un thread di lavoro, l'interprete si blocca all'uscita.
+    """
+    resolved = resolve_kernel_backend(backend)
+    if resolved == 'numba':
+        import numba  # già caricato da components.kernels_numba
+
+        with _numba_lock:
+            numba.get_num_threads()
+    return resolved
+
+
+# --- Campo delle lenti ---
+
+def _pack_lenses(lenses, frame_index, strength_mult):
+    """
+    Parametri delle lenti per il kernel compilato, una riga per lente:
+    [pos_x, pos_y, cos(angolo), sin(angolo), fase onda, raggio, forza].
+    """
+    params = np.empty((len(lenses), 7), dtype=np.float64)
+    for k, lens in enumerate(lenses):
+        params[k, 0] = lens['pos'][0]
+        params[k, 1] = lens['pos'][1]
+        params[k, 2] = np.cos(lens['angle'])
+        params[k, 3] = np.sin(lens['angle'])
+        params[k, 4] = frame_index * 0.03 + lens['pulsation_offset']
+        params[k, 5] = lens['radius'] + 1e-6
+        params[k, 6] = lens['strength'] * strength_mult
+    return params
+
+
+def lens_field_numpy(map_x, map_y, grid_x, grid_y, lenses, frame_index, worm_enabled, worm_length,
+                     strength_mult, scratch, bounds=None, y0=0):
+    """
+    Somma in map_x/map_y (già inizializzate con la griglia) gli spostamenti di tutte le lenti.
+
+    Args:
+        grid_x, grid_y: Coordinate dei pixel per le stesse righe di map_x/map_y
+        scratch: Dizionario di buffer float32 'dx', 'dy', 'dx_rot', 'dy_rot', 'distance'
+                 e bool 'lens_mask' della stessa forma delle mappe
+        bounds: Rettangoli di influenza (lens_bounds): ogni lente lavora solo sul suo
+        y0: Prima riga del blocco (per i rettangoli)
+    """
+    full = (slice(None), slice(None))
+    for k, lens in enumerate(lenses):
+        window = full if bounds is None else _lens_window(bounds[k], y0, map_x.shape)
+        if window is None:
+            continue
+        gx, gy = grid_x[window], grid_y[window]
+        mx, my = map_x[window], map_y[window]
+        dx = scratch['dx'][window]
+        dy = scratch['dy'][window]
+        dx_rot = scratch['dx_rot'][window]
+        dy_rot = scratch['dy_rot'][window]
+        distance = scratch['distance'][window]
+        lens_mask = scratch['lens_mask'][window]
+
+        np.subtract(gx, lens['pos'][0], out=dx)
+        np.subtract(gy, lens['pos'][1], out=dy)
+
+        if worm_enabled:
+            # Deformazione a "verme": distorciamo lo spazio di calcolo della distanza
+            angle = lens['angle']
+            cos_a, sin_a = np.cos(angle), np.sin(angle)
+            # dx_rot = dx*cos - dy*sin ; dy_rot = dx*sin + dy*cos (calcolati in place)
+            np.multiply(dy, sin_a, out=distance)
+            np.multiply(dx, cos_a, out=dx_rot)
+            dx_rot -= distance
+            np.multiply(dy, cos_a, out=distance)
+            np.multiply(dx, sin_a, out=dy_rot)
+            dy_rot += distance
+
+            # Onda sinusoidale predicibile (anti-sfarfallio) lungo il corpo del verme
+            wave_time = frame_index * 0.03 + lens['pulsation_offset']
+            np.multiply(dx_rot, 0.01, out=distance)
+            distance += wave_time
+            np.sin(distance, out=distance)
+            distance *= 30
+            dy_rot += distance  # dy_scaled
+
+            # Allunghiamo la forma su un asse per creare il "corpo" del verme
+            dx_rot /= worm_length  # dx_scaled
+
+            np.hypot(dx_rot, dy_rot, out=distance)
+        else:
+            np.hypot(dx, dy, out=distance)
+
+        distance /= (lens['radius'] + 1e-6)  # normalized_distance
+        np.less(distance, 1.0, out=lens_mask)
+
+        # Applica moltiplicatore dinamico alla forza della lente
+        dynamic_strength = lens['strength'] * strength_mult
+        displacement = (1.0 - distance[lens_mask]) * dynamic_strength
+
+        # Applica lo spostamento lungo la linea dal pixel al centro della lente
+        mx[lens_mask] += dx[lens_mask] * displacement
+        my[lens_mask] += dy[lens_mask] * displacement
+
+
+def lens_field(map_x, map_y, grid_x, grid_y, y0, lenses, frame_index, worm_enabled, worm_length,
+               strength_mult, scratch, backend='numpy', bounds=None, bucket_size=32):
+    """
+    Calcola le mappe di rimappatura delle lenti per un blocco di righe che parte da y0.
+
+    Con il backend 'numba' il ciclo per-pixel è fuso e parallelo e non usa grid né
+    scratch; con 'numpy' esegue lens_field_numpy.
+
+    Args:
+        bounds: Rettangoli di influenza delle lenti (plan_lenses). Se presenti NumPy
+                calcola ogni lente solo sul suo rettangolo e Numba raggruppa le lenti
+                in tile di bucket_size pixel
+    """
+    if backend == 'numba' and len(lenses) > 0:
+        params = _pack_lenses(lenses, frame_index, strength_mult)
+        with _numba_lock:
+            if bounds is None:
+                _numba_kernels.lens_field_numba(map_x, map_y, y0, params, bool(worm_enabled), float(worm_length))
+            else:
+                offsets, lens_index = bucket_lenses(bounds, y0, map_x.shape, bucket_size)
+                _numba_kernels.lens_field_numba_tiled(map_x, map_y, y0, params, bool(worm_enabled),
+                                                      float(worm_length), bucket_size, offsets, lens_index)
+        return
+    np.copyto(map_x, grid_x)
+    np.copyto(map_y, grid_y)
+    lens_field_numpy(map_x, map_y, grid_x, grid_y, lenses, frame_index, worm_enabled, worm_length,
+                     strength_mult, scratch, bounds, y0)
+
+
+# --- Culling e raggruppamento delle lenti ---
+
+def lens_bounds(params, worm_enabled, worm_length):
+    """
+    Rettangoli di influenza delle lenti (righe di _pack_lenses): fuori da
+    [x0, x1] x [y0, y1] una lente non sposta nessun pixel.
+
+    Returns:
+        np.ndarray: float64 (n, 4) con x0, y0, x1, y1, un pixel di margine per gli arrotondamenti float32
+    """
+    radius = params[:, 5]
+    if worm_enabled:
+        # Corpo del verme: |dx_rot| < raggio * lunghezza e |dy_rot| < raggio + 30 (onda), ruotato
+        along = radius * abs(worm_length)
+        across = radius + 30.0
+        cos_a, sin_a = np.abs(params[:, 2]), np.abs(params[:, 3])
+        half_w = along * cos_a + across * sin_a + 1.0
+        half_h = along * sin_a + across * cos_a + 1.0
+    else:
+        half_w = half_h = radius + 1.0
+    x, y = params[:, 0], params[:, 1]
+    return np.stack([x - half_w, y - half_h, x + half_w, y + half_h], axis=1)
+
+
+def _max_displacement(params, worm_enabled, worm_length):
+    """Spostamento massimo in pixel che ogni lente può dare a un pixel."""
+    strength = np.abs(params[:, 6])
+    radius = params[:, 5]
+    if worm_enabled:
+        # (1 - d) <= 1 e il pixel sta nel rettangolo ruotato del verme
+        return strength * np.hypot(radius * abs(worm_length), radius + 30.0)
+    # |dx, dy| = d * raggio e (1 - d) * d <= 1/4
+    return strength * radius * 0.25
+
+
+def _lens_window(bounds, y0, shape):
+    """Fette (righe, colonne) del blocco coperte dal rettangolo di una lente, None se vuote."""
+    height, width = shape
+    r0 = max(0, int(np.floor(bounds[1])) - y0)
+    r1 = min(height, int(np.ceil(bounds[3])) + 1 - y0)
+    c0 = max(0, int(np.floor(bounds[0])))
+    c1 = min(width, int(np.ceil(bounds[2])) + 1)
+    if r0 >= r1 or c0 >= c1:
+        return None
+    return slice(r0, r1), slice(c0, c1)
+
+
+def mask_occupancy(mask, tile_size):
+    """Griglia bool dei tile di tile_size pixel in cui la maschera ha almeno un pixel acceso."""
+    height, width = mask.shape[:2]
+    pad_h, pad_w = -height % tile_size, -width % tile_size
+    if pad_h or pad_w:
+        mask = np.pad(mask, ((0, pad_h), (0, pad_w)))
+    rows, cols = mask.shape[0] // tile_size, mask.shape[1] // tile_size
+    return mask.reshape(rows, tile_size, cols, tile_size).max(axis=(1, 3)) > 0
+
+
+def cull_lenses(bounds, max_displacement, width, height, occupancy=None, tile_size=16):
+    """
+    Lenti che possono cambiare la maschera deformata (array bool, una voce per lente).
+
+    Una lente viene scartata se il suo rettangolo è fuori dal frame oppure, con la
+    griglia occupancy della sorgente, se nessun pixel acceso è raggiungibile dai
+    pixel che sposta: il rettangolo viene allargato della somma degli spostamenti
+    massimi delle lenti che lo toccano (più un pixel per l'interpolazione del
+    remap). Lì il remap legge solo zeri, con o senza la lente: il risultato non cambia.
+    """
+    x0, y0, x1, y1 = bounds.T
+    keep = (x1 >= 0) & (x0 <= width - 1) & (y1 >= 0) & (y0 <= height - 1)
+    if occupancy is None or len(bounds) == 0:
+        return keep
+
+    overlap = ((x0[:, None] <= x1[None, :]) & (x0[None, :] <= x1[:, None])
+               & (y0[:, None] <= y1[None, :]) & (y0[None, :] <= y1[:, None]))
+    reach = overlap.astype(np.float64) @ max_displacement + 2.0
+
+    # Pixel accesi nel rettangolo allargato, con l'immagine integrale dei tile
+    rows, cols = occupancy.shape
+    integral = np.zeros((rows + 1, cols + 1), dtype=np.int64)
+    integral[1:, 1:] = occupancy.cumsum(axis=0).cumsum(axis=1)
+    tx0 = np.clip(np.floor((x0 - reach) / tile_size), 0, cols).astype(np.int64)
+    tx1 = np.clip(np.floor((x1 + reach) / tile_size) + 1, 0, cols).astype(np.int64)
+    ty0 = np.clip(np.floor((y0 - reach) / tile_size), 0, rows).astype(np.int64)
+    ty1 = np.clip(np.floor((y1 + reach) / tile_size) + 1, 0, rows).astype(np.int64)
+    occupied = integral[ty1, tx1] - integral[ty0, tx1] - integral[ty1, tx0] + integral[ty0, tx0]
+    return keep & (occupied > 0)
+
+
+def plan_lenses(lenses, frame_index, strength_mult, worm_enabled, worm_length, width, height, mask=None,
+                tile_size=16):
+    """
+    Lenti da calcolare in questo frame e loro rettangoli di influenza.
+
+    Args:
+        width, height: Dimensioni del frame
+        mask: Sorgente del remap con sfondo a zero (maschera uint8): scarta anche le
+              lenti lontane dal logo. None (es. campo di distanza): solo quelle fuori dal frame
+        tile_size: Lato dei tile della griglia di occupazione della maschera
+
+    Returns:
+        tuple: (lenti attive nell'ordine originale, rettangoli float64 (n, 4))
+    """
+    if not lenses:
+        return [], np.empty((0, 4))
+    params = _pack_lenses(lenses, frame_index, strength_mult)
+    bounds = lens_bounds(params, worm_enabled, worm_length)
+    occupancy = mask_occupancy(mask, tile_size) if mask is not None else None
+    keep = cull_lenses(bounds, _max_displacement(params, worm_enabled, worm_length),
+                       width, height, occupancy, tile_size)
+    return [lens for lens, kept in zip(lenses, keep) if kept], bounds[keep]
+
+
+def bucket_lenses(bounds, y0, shape, tile_size):
+    """
+    Lenti per tile di un blocco di righe che parte da y0, in formato CSR: le lenti
+    del tile t (riga per riga) sono lens_index[offsets[t]:offsets[t + 1]], in ordine crescente.
+    """
+    height, width = shape
+    rows, cols = -(-height // tile_size), -(-width // tile_size)
+    col_hit = ((np.arange(cols) >= np.floor(bounds[:, 0:1] / tile_size))
+               & (np.arange(cols) <= np.floor(bounds[:, 2:3] / tile_size)))
+    row_hit = ((np.arange(rows) >= np.floor((bounds[:, 1:2] - y0) / tile_size))
+               & (np.arange(rows) <= np.floor((bounds[:, 3:4] - y0) / tile_size)))
+    hit = (row_hit[:, :, None] & col_hit[:, None, :]).reshape(len(bounds), rows * cols).T
+    offsets = np.zeros(rows * cols + 1, dtype=np.int64)
+    np.cumsum(hit.sum(axis=1), out=offsets[1:])
+    lens_index = np.nonzero(hit)[1].astype(np.int64)
+    return offsets, lens_index
+
+
+class LensStats:
+    """Lenti calcolate e scartate durante il render, per il log di fine render."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.lenses = 0
+        self.culled = 0
+
+    def record(self, total, active):
+        self.frames += 1
+        self.lenses += total
+        self.culled += total - active
+
+    def report(self):
+        if self.lenses == 0:
+            return "🔍 Lenti: nessuna lente calcolata"
+        return (f"🔍 Lenti: {self.lenses / self.frames:.0f} per frame, {self.culled / self.lenses:.0%} "
+                f"scartate (fuori dal frame o lontane dal logo)")
+
+
+lens_stats = LensStats()
+
+
+# --- Modi di blending ---
+
+def blend_mode_numpy(base, blend, mode, strength):
+    """Applica diverse modalità di blending"""
+    base = np.clip(base, 0, 1)
+    blend = np.clip(blend, 0, 1)
+
+    if mode == 'normal':
+        result = blend
+    elif mode == 'multiply':
+        result = base * blend
+    elif mode == 'screen':
+        result = 1 - (1 - base) * (1 - blend)
+    elif mode == 'overlay':
+        result = np.where(base < 0.5,
+                        2 * base * blend,
+                        1 - 2 * (1 - base) * (1 - blend))
+    elif mode == 'soft_light':
+        result = np.where(blend < 0.5,
+                        base - (1 - 2 * blend) * base * (1 - base),
+                        base + (2 * blend - 1) * (np.sqrt(base) - base))
+    elif mode == 'hard_light':
+        result = np.where(blend < 0.5,
+                        2 * base * blend,
+                        1 - 2 * (1 - base) * (1 - blend))
+    elif mode == 'color_dodge':
+        result = np.where(blend >= 1, 1, np.minimum(1, base / (1 - blend + 1e-6)))
+    elif mode == 'color_burn':
+        result = np.where(blend <= 0, 0, 1 - np.minimum(1, (1 - base) / (blend + 1e-6)))
+    elif mode == 'difference':
+        result = np.abs(base - blend)
+    elif mode == 'exclusion':
+        result = base + blend - 2 * base * blend
+    else:
+        result = blend  # Fallback to normal
+
+    # Applica la forza del blending
+    return base * (1 - strength) + result * strength
+
+
+def apply_blend_mode(base, blend, mode, strength, backend='numpy'):
+    """
+    Modo di blending tra due immagini float 0-1 della stessa forma, miscelato con `strength`.
+
+    Returns:
+        np.ndarray float32 nuovo (gli ingressi non vengono modificati)
+    """
+    if backend == 'numba' and base.shape == blend.shape:
+        base_flat = np.ascontiguousarray(base, dtype=np.float32).reshape(-1)
+        blend_flat = np.ascontiguousarray(blend, dtype=np.float32).reshape(-1)
+        out = np.empty(base.shape, dtype=np.float32)
+        with _numba_lock:
+            _numba_kernels.blend_mode_numba(base_flat, blend_flat, out.reshape(-1),
+                              BLEND_MODE_CODES.get(mode, 0), np.float32(strength))
+        return out
+    return blend_mode_numpy(base, blend, mode, strength)
+
+
+# --- Verifica di equivalenza tra i backend ---
+
+def _random_lenses(rng, count, width, height):
+    lenses = []
+    for _ in range(count):
+        lenses.append({
+            'pos': np.array([rng.uniform(0, width), rng.uniform(0, height)]),
+            'angle': rng.uniform(0, 2 * np.pi),
+            'pulsation_offset': rng.uniform(0, 2 * np.pi),
+            'radius': rng.uniform(20, 200),
+            'strength': rng.uniform(-0.5, 0.5),
+        })
+    return lenses
+
+
+def self_check(width=320, height=240, seed=0):
+    """
+    Confronta i backend NumPy e Numba su dati casuali.
+
+    Returns:
+        dict: differenza massima per ogni verifica (vuoto se Numba non è disponibile)
+    """
+    if _load_numba_kernels() is None:
+        return {}
+    rng = np.random.default_rng(seed)
+    report = {}
+
+    grid_x, grid_y = np.meshgrid(np.arange(width, dtype=np.float32), np.arange(height, dtype=np.float32))
+    # Lenti anche oltre i bordi, per i rettangoli fuori dal frame
+    lenses = _random_lenses(rng, 12, width, height) + _random_lenses(rng, 12, width * 2, height * 2)
+    for worm in (False, True):
+        active, bounds = plan_lenses(lenses, 17, 1.3, worm, 2.5, width, height)
+        maps = {}
+        for backend in ('numpy', 'numba'):
+            for bucketed in (False, True):
+                # Un blocco di righe che non parte da zero, come una banda del TileScheduler
+                y0 = height // 3
+                map_x = np.empty((height - y0, width), dtype=np.float32)
+                map_y = np.empty_like(map_x)
+                scratch = {name: np.empty_like(map_x) for name in ('dx', 'dy', 'dx_rot', 'dy_rot', 'distance')}
+                scratch['lens_mask'] = np.empty(map_x.shape, dtype=bool)
+                lens_field(map_x, map_y, grid_x[y0:], grid_y[y0:], y0, active if bucketed else lenses, 17, worm, 2.5,
+                           1.3, scratch, backend, bounds if bucketed else None, bucket_size=32)
+                maps[backend, bucketed] = (map_x, map_y)
+        reference = maps['numpy', False]
+        for backend, bucketed in [('numba', False), ('numpy', True), ('numba', True)]:
+            name = f"lens_field worm={worm}" + (f" {backend} a tile" if bucketed else "")
+            report[name] = max(float(np.abs(reference[i] - maps[backend, bucketed][i]).max()) for i in range(2))
+
+    base = rng.uniform(-0.1, 1.1, (height, width, 3)).astype(np.float32)
+    blend = rng.uniform(-0.1, 1.1, (height, width, 3)).astype(np.float32)
+    # Valori esatti ai limiti dei rami (dodge/burn, soglia 0.5)
+    blend[0], blend[1], blend[2] = 0.0, 1.0, 0.5
+    base[3] = 0.5
+    for mode in list(BLEND_MODE_CODES) + ['sconosciuto']:
+        expected = blend_mode_numpy(base, blend, mode, 0.7)
+        actual = apply_blend_mode(base, blend, mode, 0.7, 'numba')
+        report[f"blend {mode}"] = float(np.abs(expected - actual).max())
+    return report
+
+
+# Tolleranze: spostamenti in pixel (mappe) e valori 0-1 (blending)
+SELF_CHECK_TOLERANCE = {'lens_field': 1e-3, 'blend': 1e-5}
+
+
+if __name__ == "__main__":
+    if _load_numba_kernels() is None:
+        print("⚠️ Numba non disponibile: c'è solo il backend NumPy, niente da confrontare")
+    else:
+        import numba
+
+        print(f"⚡ Numba {numba.__version__}: confronto backend NumPy / Numba")
+        failures = 0
+        for name, diff in self_check().items():
+            tolerance = SELF_CHECK_TOLERANCE[name.split()[0]]
+            ok = diff <= tolerance
+            failures += not ok
+            print(f"   {'✅' if ok else '❌'} {name:<38} differenza max {diff:.2e} (tolleranza {tolerance:.0e})")
+        if failures:
+            raise SystemExit(1)
+        print("✅ Backend equivalenti")
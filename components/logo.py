@@ -0,0 +1,339 @@
+"""
+🖋️ LOGO - Crystal Therapy
+Caricamento del logo (PDF o SVG) in contorni, con una sola pipeline in cache
+
+Generatore e simple_logo_video.py passano da qui:
+
+- PDF: pagina rasterizzata con PyMuPDF, soglia invertita e cv2.RETR_CCOMP
+  (contorni esterni + buchi delle lettere), poi centrata e scalata nel frame
+- SVG: path discretizzati con svgpathtools, riempiti su un raster, ridotti ai
+  soli bordi (erosione + scheletro); senza svgpathtools il file viene
+  rasterizzato con cairosvg e i bordi presi con Canny
+
+La risoluzione del raster non è più fissa (4x la pagina): dipende dalle
+dimensioni del video, LOGO_RASTER_OVERSAMPLE pixel del raster per pixel del
+logo nel frame (al massimo LOGO_RASTER_MAX_SIDE pixel per lato). Un render di
+test a 540x960 rasterizza quindi 2160 pixel di logo invece di una pagina da
+7680x4320. I contorni passano per i centri dei pixel del raster: sotto ~4 pixel
+per pixel del frame i tratti sottili del logo (1-2 px a 540 di larghezza)
+risultano visibilmente più magri.
+
+Raster e contorni restano in cache per file (percorso, data di modifica) e
+scala: il daemon, la preview e i batch non rileggono né rasterizzano lo stesso
+logo; cambiano solo centratura e scala, che costano pochi microsecondi.
+"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+
+# Lato massimo del raster in pixel (limita la memoria per loghi enormi)
+LOGO_RASTER_MAX_SIDE = 8192
+
+# Il vecchio loader SVG sottraeva il margine del raster (50 px) dopo aver diviso per la scala 4:
+# il logo risultava spostato di 37.5 unità SVG in alto a sinistra. Lo spostamento resta, per
+# non cambiare l'inquadratura dei video già impostati (SVG_LEFT_PADDING, Instagram)
+_SVG_LEGACY_SHIFT = 37.5
+
+# Margine attorno al logo nel raster SVG, in pixel (più largo dell'erosione)
+_SVG_RASTER_MARGIN = 50
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _cached(key, build):
+    """Valore in cache per key, calcolato con build() alla prima richiesta (8 voci al massimo)."""
+    value = _cache.get(key)
+    if value is None:
+        value = build()
+        with _cache_lock:
+            if len(_cache) >= 8:
+                _cache.clear()
+            _cache[key] = value
+    return value
+
+
+def _file_key(path):
+    return os.path.abspath(path), os.path.getmtime(path)
+
+
+def raster_scale(source_width, source_height, target_width, target_height, oversample=4):
+    """
+    Pixel del raster per unità della sorgente (punti PDF, unità SVG).
+
+    Args:
+        source_width, source_height: Ingombro del logo nella sorgente
+        target_width, target_height: Ingombro del logo nel frame, in pixel
+        oversample: Pixel del raster per pixel del frame
+    """
+    fit = min(target_width / source_width, target_height / source_height)
+    scale = fit * max(1.0, float(oversample))
+    return min(scale, LOGO_RASTER_MAX_SIDE / max(source_width, source_height))
+
+
+def fit_contours(contours, bbox, width, height, drawable_width, drawable_height, zoom=1.0, shift=(0.0, 0.0)):
+    """
+    Centra e scala i contorni nel frame: il bbox occupa al massimo l'area disegnabile, per lo zoom.
+
+    Args:
+        contours: Contorni nelle coordinate della sorgente (float o int, forma (N, 1, 2) o (N, 2))
+        bbox: (x, y, larghezza, altezza) del logo nelle stesse coordinate
+        shift: Spostamento (x, y) in pixel del frame dopo la centratura
+
+    Returns:
+        tuple: (contorni int32, scala applicata)
+    """
+    x, y, w, h = bbox
+    scale = min(drawable_width / w if w > 0 else 1, drawable_height / h if h > 0 else 1) * zoom
+    center = np.array([x + w / 2, y + h / 2], dtype=np.float64)
+    origin = np.array([width / 2 + shift[0], height / 2 + shift[1]], dtype=np.float64)
+    fitted = [np.rint((contour.astype(np.float64) - center) * scale + origin).astype(np.int32) for contour in contours]
+    return fitted, scale
+
+
+# --- PDF ---
+
+def _load_fitz():
+    try:
+        import fitz  # PyMuPDF
+        return fitz
+    except ImportError:
+        raise RuntimeError("PyMuPDF non disponibile. Installa con: pip install PyMuPDF")
+
+
+def pdf_content_box(pdf_path):
+    """Ingombro (x0, y0, x1, y1) del contenuto della prima pagina in punti (la pagina se non è noto)."""
+    def build():
+        fitz = _load_fitz()
+        with fitz.open(pdf_path) as doc:
+            page = doc[0]
+            rect = page.rect
+            try:
+                boxes = [fitz.Rect(box) for _, box in page.get_bboxlog()]
+            except Exception:
+                boxes = []
+            content = fitz.Rect(boxes[0]) if boxes else rect
+            for box in boxes[1:]:
+                content |= box
+            content &= rect
+            if content.is_empty:
+                content = rect
+            return content.x0, content.y0, content.x1, content.y1
+
+    return _cached(('pdf_box',) + _file_key(pdf_path), build)
+
+
+def rasterize_pdf(pdf_path, scale):
+    """Prima pagina del PDF in BGR, scale pixel per punto."""
+    fitz = _load_fitz()
+    with fitz.open(pdf_path) as doc:
+        pix = doc[0].get_pixmap(matrix=fitz.Matrix(scale, scale))
+        image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_RGBA2BGR)
+    if image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+
+def contours_from_raster(image):
+    """Contorni del logo scuro su fondo chiaro, con gerarchia per i buchi (RETR_CCOMP)."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    # Inverte i colori: nero su bianco diventa bianco su nero
+    _, binary = cv2.threshold(gray, 50, 255, cv2.THRESH_BINARY_INV)
+    return cv2.findContours(binary, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
+
+
+def pdf_logo_contours(pdf_path, width, height, padding_fraction, zoom=1.0, oversample=4):
+    """
+    Contorni del logo di un PDF centrati nel frame width x height.
+
+    Args:
+        padding_fraction: Frazione del frame lasciata libera attorno al logo
+        zoom: Fattore di zoom del logo (1.0=normale)
+        oversample: Pixel del raster per pixel del logo nel frame
+
+    Returns:
+        tuple: (contorni, gerarchia)
+
+    Raises:
+        RuntimeError: PyMuPDF mancante o nessun contorno nel PDF
+    """
+    drawable_width = width * (1 - padding_fraction)
+    drawable_height = height * (1 - padding_fraction)
+    x0, y0, x1, y1 = pdf_content_box(pdf_path)
+    scale = raster_scale(x1 - x0, y1 - y0, drawable_width * zoom, drawable_height * zoom, oversample)
+
+    def build():
+        image = rasterize_pdf(pdf_path, scale)
+        contours, hierarchy = contours_from_raster(image)
+        print(f"📝 Estratti {len(contours)} contorni dal PDF con gestione buchi "
+              f"(raster {image.shape[1]}x{image.shape[0]}, {scale:.2f} px/pt)")
+        return contours, hierarchy
+
+    contours, hierarchy = _cached(('pdf',) + _file_key(pdf_path) + (round(scale, 4),), build)
+    if not contours:
+        raise RuntimeError("Nessun contorno trovato nel PDF.")
+    bbox = cv2.boundingRect(np.vstack(contours))
+    fitted, _ = fit_contours(contours, bbox, width, height, drawable_width, drawable_height, zoom)
+    return fitted, hierarchy
+
+
+# --- SVG ---
+
+def svg_paths(svg_path):
+    """
+    Path dell'SVG discretizzati in poligoni (unità SVG), con svgpathtools. In cache per file.
+
+    Returns:
+        list: Poligoni float32 (N, 2)
+    """
+    def build():
+        from svgpathtools import svg2paths2
+
+        paths, _, _ = svg2paths2(svg_path)
+        if not paths:
+            raise RuntimeError("Nessun path trovato nel file SVG.")
+        polygons = []
+        for path in paths:
+            path_length = path.length()
+            if path_length == 0:
+                continue
+            # Più punti per i path più lunghi
+            num_points = max(100, min(1000, int(path_length * 3)))
+            points = []
+            for t in np.linspace(0.0, 1.0, num_points):
+                try:
+                    point = path.point(t)
+                except Exception:
+                    continue
+                if not (np.isnan(point.real) or np.isnan(point.imag)):
+                    points.append([point.real, point.imag])
+            if len(points) > 10:
+                polygon = np.array(points, dtype=np.float32)
+                if cv2.contourArea(polygon) > 10:
+                    polygons.append(polygon)
+        if not polygons:
+            raise RuntimeError("Nessun contorno valido estratto dall'SVG.")
+        print(f"📐 Trovati {len(polygons)} path SVG")
+        return polygons
+
+    return _cached(('svg_paths',) + _file_key(svg_path), build)
+
+
+def svg_outline(svg_path, scale):
+    """
+    Soli bordi (niente riempimento) dei path SVG, su un raster a scale pixel per unità.
+
+    Returns:
+        tuple: (contorni in pixel del raster, origine (x, y) del raster in unità SVG)
+    """
+    polygons = svg_paths(svg_path)
+    x_min, y_min = np.min(np.vstack(polygons), axis=0)
+
+    def build():
+        x_max, y_max = np.max(np.vstack(polygons), axis=0)
+        render_width = int((x_max - x_min) * scale) + 2 * _SVG_RASTER_MARGIN
+        render_height = int((y_max - y_min) * scale) + 2 * _SVG_RASTER_MARGIN
+
+        # Path come forme piene
+        mask = np.zeros((render_height, render_width), dtype=np.uint8)
+        for polygon in polygons:
+            raster_polygon = (polygon - np.array([x_min, y_min])) * scale + _SVG_RASTER_MARGIN
+            cv2.fillPoly(mask, [raster_polygon.astype(np.int32)], 255)
+
+        # Bordo = forma meno la forma erosa, assottigliato a una linea
+        from skimage.morphology import skeletonize
+        eroded = cv2.erode(mask, np.ones((5, 5), np.uint8), iterations=2)
+        skeleton = skeletonize((mask - eroded) > 0)
+        edges = (skeleton * 255).astype(np.uint8)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        # Filtra i bordi troppo piccoli (500 px² a 4 px per unità, la scala storica)
+        min_area = 500 * (scale / 4) ** 2
+        outline = [contour for contour in contours if cv2.contourArea(contour) > min_area]
+        print(f"🔍 Estratti {len(outline)} contorni di BORDI (raster {render_width}x{render_height}, "
+              f"{scale:.2f} px/unità)")
+        return outline
+
+    return _cached(('svg_outline',) + _file_key(svg_path) + (round(scale, 4),), build), (x_min, y_min)
+
+
+def svg_logo_contours(svg_path, width, height, padding, left_padding=0, zoom=1.0, oversample=4):
+    """
+    Soli bordi del logo SVG centrati nel frame width x height.
+
+    Args:
+        padding: Margine in pixel su ogni lato
+        left_padding: Spostamento aggiuntivo verso destra in pixel
+        zoom: Fattore di zoom del logo (1.0=normale)
+        oversample: Pixel del raster per pixel del logo nel frame
+
+    Returns:
+        tuple: (contorni, None)
+    """
+    try:
+        polygons = svg_paths(svg_path)
+    except ImportError:
+        print("⚠️ svgpathtools non disponibile, rasterizzo l'SVG con cairosvg")
+        return _svg_logo_contours_cairo(svg_path, width, height, oversample)
+
+    points = np.vstack(polygons)
+    x_min, y_min = np.min(points, axis=0)
+    x_max, y_max = np.max(points, axis=0)
+    svg_width, svg_height = x_max - x_min, y_max - y_min
+    if svg_width == 0 or svg_height == 0:
+        raise RuntimeError("SVG ha dimensioni zero.")
+    drawable_width, drawable_height = width - 2 * padding, height - 2 * padding
+    scale = raster_scale(svg_width, svg_height, drawable_width * zoom, drawable_height * zoom, oversample)
+
+    outline, (origin_x, origin_y) = svg_outline(svg_path, scale)
+    bbox = (x_min, y_min, svg_width, svg_height)
+    if outline:
+        # Pixel del raster -> unità SVG
+        contours = [contour.astype(np.float64) / scale + np.array([origin_x - _SVG_RASTER_MARGIN / scale - _SVG_LEGACY_SHIFT,
+                                                                   origin_y - _SVG_RASTER_MARGIN / scale - _SVG_LEGACY_SHIFT])
+                    for contour in outline]
+    else:
+        # Nessun bordo: i path originali
+        print("⚠️ Nessun bordo trovato, uso i path originali...")
+        contours = polygons
+    fitted, fit_scale = fit_contours(contours, bbox, width, height, drawable_width, drawable_height, zoom,
+                                     shift=(left_padding, 0))
+    if left_padding > 0:
+        print(f"📐 SVG con padding sinistro: {left_padding}px")
+    if zoom != 1.0:
+        print(f"🔍 Logo zoom attivo: {zoom}x (scala finale: {fit_scale:.2f})")
+    return fitted, None
+
+
+def _svg_logo_contours_cairo(svg_path, width, height, oversample=4):
+    """Bordi (Canny) dell'SVG rasterizzato con cairosvg a tutto frame, oversample volte più grande."""
+    scale = max(1, int(round(oversample)))
+
+    def build():
+        import io
+
+        import cairosvg
+        from PIL import Image as PILImage
+
+        png_data = cairosvg.svg2png(url=svg_path, output_width=width * scale, output_height=height * scale)
+        image = np.array(PILImage.open(io.BytesIO(png_data)).convert('RGBA')).astype(np.float32)
+        # Canale alpha su fondo bianco
+        alpha = image[:, :, 3:4] / 255.0
+        rgb = (image[:, :, :3] * alpha + 255 * (1 - alpha)).astype(np.uint8)
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        edges = cv2.Canny(cv2.GaussianBlur(gray, (3, 3), 0), 50, 150, apertureSize=3)
+        edges = cv2.dilate(edges, np.ones((2, 2), np.uint8), iterations=1)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        return [(contour.astype(np.float32) / scale).astype(np.int32) for contour in contours
+                if cv2.contourArea(contour) > 100 * (scale / 4) ** 2]
+
+    contours = _cached(('svg_cairo',) + _file_key(svg_path) + (width, height, scale), build)
+    if not contours:
+        raise RuntimeError("Nessun contorno valido trovato nell'SVG.")
+    return contours, None
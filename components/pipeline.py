@@ -0,0 +1,180 @@
+"""
+🧵 FRAME PIPELINE - Crystal Therapy
+Pipeline a stadi per sovrapporre decodifica, rendering e codifica dei frame
+
+Ogni stadio gira nel proprio thread e passa i frame al successivo tramite una
+coda limitata: quando uno stadio a valle è lento la coda si riempie e blocca
+quelli a monte (backpressure), così la memoria resta costante. OpenCV e NumPy
+rilasciano il GIL nelle operazioni pesanti, quindi gli stadi lavorano davvero in
+parallelo e il throughput tende a quello dello stadio più lento invece che alla
+somma di tutti.
+
+Un solo thread per stadio: l'ordine dei frame è preservato e gli stadi con
+stato tra frame (lenti, storia dei traccianti) restano corretti.
+
+Per ogni stadio vengono misurati tempo di lavoro, attesa in ingresso (stadio
+affamato), attesa in uscita (stadio bloccato dalla backpressure) e profondità
+media/massima della coda in ingresso.
+"""
+
+import queue
+import threading
+import time
+
+
+# Marcatore di fine stream che attraversa tutti gli stadi
+_END = object()
+
+
+class StageMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_time = 0.0
+        self.wait_in_time = 0.0
+        self.wait_out_time = 0.0
+        self.depth_total = 0
+        self.depth_max = 0
+
+    def sample_depth(self, depth):
+        self.depth_total += depth
+        self.depth_max = max(self.depth_max, depth)
+
+    @property
+    def avg_depth(self):
+        return self.depth_total / self.items if self.items else 0.0
+
+    @property
+    def ms_per_item(self):
+        return self.busy_time * 1000.0 / self.items if self.items else 0.0
+
+
+class FramePipeline:
+    def __init__(self, stages, queue_size=4):
+        """
+        Args:
+            stages: Lista di (nome, funzione) in ordine; ogni funzione riceve l'elemento
+                    dello stadio precedente e restituisce quello per il successivo
+            queue_size: Capienza di ogni coda tra stadi (backpressure)
+        """
+        self.stages = list(stages)
+        self.queue_size = max(1, int(queue_size))
+        self.metrics = [StageMetrics(name) for name, _ in self.stages]
+        self._stop = threading.Event()
+        self._error = None
+        self._queues = []
+        self._threads = []
+        self.elapsed = 0.0
+
+    # --- Code con stop cooperativo ---
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    # --- Thread ---
+
+    def _feed(self, source, out_q):
+        try:
+            for item in source:
+                if not self._put(out_q, item):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        self._put(out_q, _END)
+
+    def _run_stage(self, index, func, in_q, out_q):
+        metrics = self.metrics[index]
+        try:
+            while True:
+                t0 = time.perf_counter()
+                depth = in_q.qsize()
+                item = self._get(in_q)
+                t1 = time.perf_counter()
+                metrics.wait_in_time += t1 - t0
+                if item is _END:
+                    break
+
+                result = func(item)
+                t2 = time.perf_counter()
+                metrics.busy_time += t2 - t1
+                metrics.items += 1
+                metrics.sample_depth(depth)
+
+                if not self._put(out_q, result):
+                    return
+                metrics.wait_out_time += time.perf_counter() - t2
+        except BaseException as e:
+            self._fail(e)
+        self._put(out_q, _END)
+
+    def _fail(self, error):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    # --- API ---
+
+    def run(self, source):
+        """
+        Esegue la pipeline sugli elementi di `source` e restituisce in ordine i
+        risultati dell'ultimo stadio. Un errore in qualsiasi stadio viene
+        rilanciato qui; interrompere l'iterazione ferma tutti i thread.
+        """
+        self._stop.clear()
+        self._error = None
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        self._threads = [threading.Thread(target=self._feed, args=(iter(source), self._queues[0]),
+                                          name="pipeline-source", daemon=True)]
+        for i, (name, func) in enumerate(self.stages):
+            self._threads.append(threading.Thread(target=self._run_stage,
+                                                  args=(i, func, self._queues[i], self._queues[i + 1]),
+                                                  name=f"pipeline-{name}", daemon=True))
+
+        start = time.perf_counter()
+        for thread in self._threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(self._queues[-1])
+                if item is _END:
+                    break
+                yield item
+        finally:
+            self.elapsed = time.perf_counter() - start
+            self._stop.set()
+            for thread in self._threads:
+                thread.join()
+            if self._error is not None:
+                raise self._error
+
+    def bottleneck(self):
+        """Nome dello stadio con più tempo di lavoro per frame."""
+        if not self.metrics:
+            return None
+        return max(self.metrics, key=lambda m: m.busy_time).name
+
+    def report(self):
+        """Riepilogo testuale delle metriche per stadio."""
+        lines = [f"🧵 Pipeline: {len(self.stages)} stadi, code da {self.queue_size}, {self.elapsed:.1f}s totali"]
+        lines.append(f"   {'stadio':<12} {'ms/frame':>9} {'attesa in':>10} {'attesa out':>11} {'coda media':>11} {'coda max':>9}")
+        for m in self.metrics:
+            lines.append(f"   {m.name:<12} {m.ms_per_item:>9.1f} {m.wait_in_time:>9.1f}s {m.wait_out_time:>10.1f}s "
+                         f"{m.avg_depth:>11.1f} {m.depth_max:>9d}")
+        bottleneck = self.bottleneck()
+        if bottleneck:
+            lines.append(f"   🐢 Stadio più lento: {bottleneck}")
+        return "\n".join(lines)
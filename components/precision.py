@@ -0,0 +1,240 @@
+"""
+🔢 PRECISION - Crystal Therapy
+Composizione a virgola fissa: uint8/uint16 e tabelle (LUT) al posto dei layer float32
+
+Il percorso di riferimento converte a float32 (12 byte per pixel a tre canali)
+sfondo, logo, maschera morbida, traccianti e texture e ne fa diverse copie.
+Con COMPOSITE_PRECISION = 'fixed' la composizione resta su interi:
+
+- traccianti: accumulati in uint16 a virgola fissa Q8.8 (colori arrotondati a 1/256)
+- glow:       layer uint8 calcolato canale per canale dalla sfocatura, senza prodotto float a tre canali
+- texture:    modo di blending e opacità diventano una tabella 256x256 (base, texture) -> uint8,
+              costruita facendo passare tutte le coppie nel percorso float (identica senza maschera)
+- blending avanzato: prodotti con la maschera morbida in uint8 (cv2, saturanti),
+              modo di blending da tabella 256x256 (base, logo) -> uint8
+
+float16 non conviene: NumPy lo emula sulla CPU ed è più lento del float32.
+
+Le differenze rispetto al percorso float32 sono arrotondamenti di uno-due livelli:
+`python -m components.precision` compone gli stessi frame nei due modi e ne
+verifica PSNR e SSIM, riportando memoria e tempi.
+"""
+
+import argparse
+import threading
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+COMPOSITE_PRECISIONS = ('float32', 'fixed')
+
+# Virgola fissa dei traccianti: valore * 256 in uint16
+TRACER_FIXED_SHIFT = 8
+
+_lut_cache = {}
+_lut_lock = threading.Lock()
+
+
+def cached_lut(key, build):
+    """Tabella 256x256 uint8 per key, costruita con build() alla prima richiesta."""
+    lut = _lut_cache.get(key)
+    if lut is None:
+        with _lut_lock:
+            lut = _lut_cache.get(key)
+            if lut is None:
+                if len(_lut_cache) >= 64:
+                    _lut_cache.clear()
+                lut = _lut_cache[key] = np.ascontiguousarray(build(), dtype=np.uint8).reshape(-1)
+    return lut
+
+
+def lut_grid():
+    """Coppie (a, b) di tutti i valori uint8: a sulle righe, b sulle colonne (256x256)."""
+    values = np.arange(256, dtype=np.uint8)
+    return np.repeat(values[:, np.newaxis], 256, axis=1), np.repeat(values[np.newaxis, :], 256, axis=0)
+
+
+def apply_lut(lut, first, second, out=None, index=None):
+    """
+    out[i] = lut[first[i], second[i]] per immagini uint8 della stessa forma.
+
+    Args:
+        index: Buffer uint16 della stessa forma per l'indice (opzionale)
+    """
+    if index is None:
+        index = np.empty(first.shape, dtype=np.uint16)
+    np.left_shift(first, 8, out=index, dtype=np.uint16)
+    np.bitwise_or(index, second, out=index)
+    if out is None:
+        out = np.empty(first.shape, dtype=np.uint8)
+    return np.take(lut, index, out=out)
+
+
+def blend_mode_lut(mode, strength):
+    """
+    Tabella di apply_blend_mode(base, blend, mode, strength) su valori uint8 (0-255),
+    arrotondata e limitata a 0-255.
+    """
+    from components.kernels import blend_mode_numpy
+
+    def build():
+        base, blend = lut_grid()
+        result = blend_mode_numpy(base.astype(np.float32) / 255.0, blend.astype(np.float32) / 255.0, mode, strength)
+        return np.clip(np.rint(result * 255.0), 0, 255)
+
+    return cached_lut(('blend', mode, float(strength)), build)
+
+
+def fixed_tracer_scalars(scalars):
+    """Colori delle scie (_tracer_scalars) in virgola fissa Q8.8 per il layer uint16."""
+    scale = 1 << TRACER_FIXED_SHIFT
+    return [tuple(float(np.rint(channel * scale)) for channel in scalar) for scalar in scalars]
+
+
+def glow_layer_fixed(blurred_mask, glow_color, out):
+    """
+    Glow uint8 (sfocatura * colore, saturato) canale per canale, senza il prodotto float32 a tre canali.
+
+    Args:
+        blurred_mask: Sfocatura della maschera float32 0-255 (a un canale)
+        glow_color: Colore BGR già moltiplicato per intensità / 255
+        out: Buffer uint8 (altezza, larghezza, 3)
+    """
+    channels = [cv2.convertScaleAbs(blurred_mask, alpha=float(color)) for color in glow_color]
+    return cv2.merge(channels, dst=out)
+
+
+# --- Verifica contro il percorso float32 ---
+
+def psnr(reference, image):
+    """Peak signal-to-noise ratio in dB tra due immagini uint8 (inf se identiche)."""
+    mse = np.mean((reference.astype(np.float64) - image.astype(np.float64)) ** 2)
+    return float('inf') if mse == 0 else float(10.0 * np.log10(255.0 ** 2 / mse))
+
+
+def ssim(reference, image):
+    """SSIM medio (finestra gaussiana 11x11, sigma 1.5, come Wang et al. 2004) tra immagini uint8."""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    x = reference.astype(np.float64)
+    y = image.astype(np.float64)
+
+    def blur(values):
+        return cv2.GaussianBlur(values, (11, 11), 1.5)
+
+    mu_x, mu_y = blur(x), blur(y)
+    var_x = blur(x * x) - mu_x * mu_x
+    var_y = blur(y * y) - mu_y * mu_y
+    cov = blur(x * y) - mu_x * mu_y
+    ssim_map = ((2 * mu_x * mu_y + c1) * (2 * cov + c2)) / ((mu_x * mu_x + mu_y * mu_y + c1) * (var_x + var_y + c2))
+    return float(ssim_map.mean())
+
+
+# Soglie: sotto ~40 dB / 0.99 le differenze iniziano a vedersi
+PSNR_MIN = 40.0
+SSIM_MIN = 0.99
+
+
+def _scenarios():
+    """Combinazioni di impostazioni che attraversano tutti i percorsi a virgola fissa."""
+    return [
+        ('blending avanzato + texture', {}),
+        ('bordi del blending', {'EDGE_DETECTION_ENABLED': True}),
+        ('overlay, texture solo logo', {'BLENDING_MODE': 'overlay', 'TEXTURE_BLENDING_MODE': 'overlay',
+                                        'TEXTURE_TARGET': 'logo'}),
+        ('soft light, trasparenza', {'BLENDING_MODE': 'soft_light', 'BLEND_TRANSPARENCY': 0.5,
+                                     'TEXTURE_BLENDING_MODE': 'soft_light'}),
+        ('senza blending avanzato', {'ADVANCED_BLENDING': False, 'TEXTURE_BLENDING_MODE': 'screen'}),
+    ]
+
+
+def self_check(width=960, height=540, frames=3):
+    """
+    Compone gli stessi frame con COMPOSITE_PRECISION 'float32' e 'fixed'.
+
+    Returns:
+        list: (scenario, PSNR dB minimo, SSIM minimo, MB float32, MB fixed, ms float32, ms fixed)
+              dove MB è la memoria di lavoro (buffer del RenderContext + picco dei temporanei)
+    """
+    # La composizione è quella del generatore, importato solo qui
+    from collections import deque
+
+    import natisone_trip_generator as generator
+    from components.render_context import RenderContext
+    from components.settings import load_settings
+
+    base_settings = generator.apply_blending_preset(load_settings("config").replace(WIDTH=width, HEIGHT=height))
+    rng = np.random.default_rng(0)
+    background = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (0, 0), 6)
+    background = cv2.normalize(background, None, 0, 255, cv2.NORM_MINMAX)
+    texture = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (0, 0), 2)
+    gray = cv2.cvtColor(background, cv2.COLOR_BGR2GRAY)
+    logo_edges = cv2.Canny(gray, 20, 60)
+    bg_edges = cv2.dilate(cv2.Canny(gray, 10, 40), np.ones((2, 2), np.uint8))
+
+    masks = []
+    for index in range(frames):
+        mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.putText(mask, "Crystal", (width // 12 + index * 3, height * 2 // 3), cv2.FONT_HERSHEY_SIMPLEX,
+                    width / 260, 255, thickness=max(2, width // 60), lineType=cv2.LINE_AA)
+        masks.append(mask)
+
+    # Riscaldamento (compilazione Numba, tabelle di blending) fuori dalle misure
+    for precision in COMPOSITE_PRECISIONS:
+        settings = base_settings.replace(COMPOSITE_PRECISION=precision)
+        generator.composite_frame((background, logo_edges, bg_edges), masks[0], 0, settings, texture, deque(), deque(),
+                                  generator.get_dynamic_parameters(0, frames, settings),
+                                  render_context=RenderContext(width, height))
+
+    rows = []
+    for name, overrides in _scenarios():
+        results, memory, timings = {}, {}, {}
+        for precision in COMPOSITE_PRECISIONS:
+            settings = base_settings.replace(COMPOSITE_PRECISION=precision, **overrides)
+            ctx = RenderContext(width, height)
+            tracer_history = deque(maxlen=settings.TRACER_TRAIL_LENGTH)
+            bg_tracer_history = deque(maxlen=settings.BG_TRACER_TRAIL_LENGTH)
+            outputs, peak, elapsed = [], 0, 0.0
+            for index, mask in enumerate(masks):
+                params = generator.get_dynamic_parameters(index, frames, settings)
+                tracemalloc.start()
+                start = time.perf_counter()
+                frame, edges, _ = generator.composite_frame(
+                    (background, logo_edges, bg_edges), mask, index, settings, texture,
+                    tracer_history, bg_tracer_history, params, render_context=ctx)
+                elapsed += time.perf_counter() - start
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                tracer_history.append(edges)
+                bg_tracer_history.append(bg_edges)
+                outputs.append(frame)
+            results[precision] = outputs
+            memory[precision] = (ctx.nbytes + peak) / 2 ** 20
+            timings[precision] = elapsed / frames * 1000
+        quality = [(psnr(a, b), ssim(a, b)) for a, b in zip(results['float32'], results['fixed'])]
+        rows.append((name, min(q[0] for q in quality), min(q[1] for q in quality),
+                     memory['float32'], memory['fixed'], timings['float32'], timings['fixed']))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confronto della composizione a virgola fissa con quella float32")
+    parser.add_argument('--size', default='960x540', help="Dimensioni del frame LARGHEZZAxALTEZZA")
+    parser.add_argument('--frames', type=int, default=3, help="Frame per scenario (le scie si accumulano)")
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.lower().split('x'))
+
+    rows = self_check(width, height, args.frames)
+    print(f"\n🔢 Composizione 'fixed' contro 'float32' ({width}x{height}, soglie PSNR {PSNR_MIN:.0f} dB, SSIM {SSIM_MIN})")
+    print(f"   {'scenario':<30} {'PSNR':>8} {'SSIM':>8} {'memoria MB':>15} {'ms/frame':>15}")
+    failures = 0
+    for name, psnr_db, ssim_value, mb_float, mb_fixed, ms_float, ms_fixed in rows:
+        ok = psnr_db >= PSNR_MIN and ssim_value >= SSIM_MIN
+        failures += not ok
+        print(f"   {'✅' if ok else '❌'} {name:<28} {psnr_db:>6.1f}dB {ssim_value:>8.4f} "
+              f"{mb_float:>6.1f} -> {mb_fixed:<6.1f} {ms_float:>6.1f} -> {ms_fixed:<6.1f}")
+    if failures:
+        raise SystemExit(1)
+    print("✅ Nessuna differenza visibile")
@@ -14,9 +14,19 @@ import cv2
 import numpy as np
 import os
 import time
-import threading
 from collections import deque
 
+from components.settings import parse_config_line, coerce_config_value
+
+# Parametri aggiornabili a caldo senza riavviare la preview
+LIVE_PARAMS = {
+    'DEFORMATION_INTENSITY', 'DEFORMATION_SPEED', 'DEFORMATION_SCALE',
+    'GLOW_INTENSITY', 'GLOW_KERNEL_SIZE', 'LENS_SPEED_FACTOR', 'BG_ZOOM_FACTOR',
+    'TRACER_MAX_OPACITY', 'BG_TRACER_MAX_OPACITY', 'BLENDING_STRENGTH',
+    'BLEND_TRANSPARENCY', 'TEXTURE_ALPHA', 'TEXTURE_BACKGROUND_ALPHA',
+    'BG_DARKEN_FACTOR', 'BG_CONTRAST_FACTOR',
+}
+
 class LivePreview:
     def __init__(self, config, render_frame_func, contours, hierarchy, 
                  width, height, get_background_func, get_texture_func,
@@ -25,7 +35,7 @@ class LivePreview:
         Inizializza il sistema Live Preview
         
         Args:
-            config: Oggetto configurazione
+            config: RenderSettings iniziali (sostituite, non modificate, dai cambi live)
             render_frame_func: Funzione per renderizzare un frame
             contours: Contorni del logo
             hierarchy: Gerarchia contorni
@@ -123,151 +133,33 @@ class LivePreview:
                 'BLENDING_PRESET', 'ADVANCED_BLENDING', 'BLENDING_MODE'
             }
             
+            updates = {}
             with open(self.live_params_file, 'r') as f:
                 for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#') and '=' in line:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        
-                        # Separa il valore dal commento (stesso parsing del main)
-                        if '#' in value:
-                            value = value.split('#')[0].strip()
-                        else:
-                            value = value.strip()
-                        
-                        # Rimuove le virgolette se presenti
-                        value = value.strip('"\'')
+                    # Stesso parsing del main (commenti, virgolette, colori _B/_G/_R)
+                    parsed = parse_config_line(line)
+                    if parsed is None:
+                        continue
+                    key, value = parsed
+                    if key not in restart_params and key not in LIVE_PARAMS:
+                        continue
+                    
+                    # Le impostazioni sono immutabili: si confronta con lo stato aggiornato finora
+                    current = self.config.replace(**updates) if updates else self.config
+                    for name, new_val in coerce_config_value(current, key, value).items():
+                        current_val = getattr(current, name)
+                        if new_val == current_val:
+                            continue
+                        updates[name] = new_val
+                        params_changed = True
                         
                         # Controllo generico per parametri che richiedono restart
                         if key in restart_params:
-                            # Ottieni il valore attuale dal config
-                            current_val = getattr(self.config, key, None)
-                            
-                            # Converti il nuovo valore al tipo appropriato
-                            if key in ['USE_SVG_SOURCE', 'INSTAGRAM_STORIES_MODE', 'LENS_DEFORMATION_ENABLED', 'ADVANCED_BLENDING']:
-                                new_val = value.lower() in ('true', '1', 'yes', 'on')
-                            elif key in ['FPS', 'DURATION_SECONDS', 'NUM_LENSES', 'SVG_LEFT_PADDING', 
-                                       'LOGO_COLOR_B', 'LOGO_COLOR_G', 'LOGO_COLOR_R']:
-                                new_val = int(value)
-                            elif key in ['LOGO_ZOOM_FACTOR']:
-                                new_val = float(value)
-                            else:
-                                new_val = value  # String values
-                            
-                            # Controlla se il valore è cambiato
-                            if new_val != current_val:
-                                setattr(self.config, key, new_val)
-                                params_changed = True
-                                restart_needed = True
-                                print(f"⚠️ {key} cambiato da {current_val} a {new_val} - Restart necessario")
-                                continue  # Salta la gestione manuale sotto
-                        
-                        # Conversione dei valori per parametri NON critici
-                        if key == 'DEFORMATION_INTENSITY':
-                            new_val = float(value)
-                            if new_val != self.config.DEFORMATION_INTENSITY:
-                                self.config.DEFORMATION_INTENSITY = new_val
-                                params_changed = True
-                                
-                        elif key == 'DEFORMATION_SPEED':
-                            new_val = float(value)
-                            if new_val != self.config.DEFORMATION_SPEED:
-                                self.config.DEFORMATION_SPEED = new_val
-                                params_changed = True
-                                
-                        elif key == 'DEFORMATION_SCALE':
-                            new_val = float(value)
-                            if new_val != self.config.DEFORMATION_SCALE:
-                                self.config.DEFORMATION_SCALE = new_val
-                                params_changed = True
-                                
-                        elif key == 'GLOW_INTENSITY':
-                            new_val = float(value)
-                            if new_val != self.config.GLOW_INTENSITY:
-                                self.config.GLOW_INTENSITY = new_val
-                                params_changed = True
-                                
-                        elif key == 'GLOW_KERNEL_SIZE':
-                            new_val = int(value)
-                            if new_val != self.config.GLOW_KERNEL_SIZE:
-                                self.config.GLOW_KERNEL_SIZE = new_val
-                                params_changed = True
-                                
-                        elif key == 'LENS_SPEED_FACTOR':
-                            new_val = float(value)
-                            if new_val != self.config.LENS_SPEED_FACTOR:
-                                self.config.LENS_SPEED_FACTOR = new_val
-                                params_changed = True
-                                
-                        elif key == 'BG_ZOOM_FACTOR':
-                            new_val = float(value)
-                            if new_val != self.config.BG_ZOOM_FACTOR:
-                                self.config.BG_ZOOM_FACTOR = new_val
-                                params_changed = True
-                                
-                        elif key == 'TRACER_MAX_OPACITY':
-                            new_val = float(value)
-                            if new_val != self.config.TRACER_MAX_OPACITY:
-                                self.config.TRACER_MAX_OPACITY = new_val
-                                params_changed = True
-                                
-                        elif key == 'BG_TRACER_MAX_OPACITY':
-                            new_val = float(value)
-                            if new_val != self.config.BG_TRACER_MAX_OPACITY:
-                                self.config.BG_TRACER_MAX_OPACITY = new_val
-                                params_changed = True
-                                
-                        elif key == 'BLENDING_STRENGTH':
-                            new_val = float(value)
-                            if new_val != self.config.BLENDING_STRENGTH:
-                                self.config.BLENDING_STRENGTH = new_val
-                                params_changed = True
-                                
-                        elif key == 'BLEND_TRANSPARENCY':
-                            new_val = float(value)
-                            if new_val != self.config.BLEND_TRANSPARENCY:
-                                self.config.BLEND_TRANSPARENCY = new_val
-                                params_changed = True
-                                
-                        elif key in ['LOGO_COLOR_B', 'LOGO_COLOR_G', 'LOGO_COLOR_R']:
-                            new_val = int(value)
-                            current_color = list(self.config.LOGO_COLOR)
-                            if key == 'LOGO_COLOR_B':
-                                current_color[0] = new_val
-                            elif key == 'LOGO_COLOR_G':
-                                current_color[1] = new_val
-                            elif key == 'LOGO_COLOR_R':
-                                current_color[2] = new_val
-                            
-                            new_color = tuple(current_color)
-                            if new_color != self.config.LOGO_COLOR:
-                                self.config.LOGO_COLOR = new_color
-                                params_changed = True
-                                
-                        elif key == 'TEXTURE_ALPHA':
-                            new_val = float(value)
-                            if new_val != self.config.TEXTURE_ALPHA:
-                                self.config.TEXTURE_ALPHA = new_val
-                                params_changed = True
-                                
-                        elif key == 'TEXTURE_BACKGROUND_ALPHA':
-                            new_val = float(value)
-                            if new_val != self.config.TEXTURE_BACKGROUND_ALPHA:
-                                self.config.TEXTURE_BACKGROUND_ALPHA = new_val
-                                params_changed = True
-                                
-                        elif key == 'BG_DARKEN_FACTOR':
-                            new_val = float(value)
-                            if new_val != self.config.BG_DARKEN_FACTOR:
-                                self.config.BG_DARKEN_FACTOR = new_val
-                                params_changed = True
-                                
-                        elif key == 'BG_CONTRAST_FACTOR':
-                            new_val = float(value)
-                            if new_val != self.config.BG_CONTRAST_FACTOR:
-                                self.config.BG_CONTRAST_FACTOR = new_val
-                                params_changed = True
+                            restart_needed = True
+                            print(f"⚠️ {key} cambiato da {current_val} a {new_val} - Restart necessario")
+            
+            if updates:
+                self.config = self.config.replace(**updates)
             
             if params_changed:
                 print("📝 Parametri aggiornati dal file config")
@@ -395,7 +287,7 @@ class LivePreview:
         """Genera un singolo frame per la preview"""
         try:
             # Ottieni frame di sfondo
-            bg_frame = self.get_background_func(self.bg_video, self.frame_counter)
+            bg_frame = self.get_background_func(self.bg_video, self.frame_counter, self.config)
             
             # Renderizza il frame
             frame_result = self.render_frame_func(
@@ -579,8 +471,9 @@ def run_preview_mode(config, render_frame_func, contours, hierarchy, width, heig
     Avvia la modalità Live Preview con restart automatico completo
     
     Returns:
-        bool: True se l'utente ha richiesto di generare il video completo
-        str: 'RESTART_SCRIPT' se è richiesto restart completo dello script
+        tuple: (esito, impostazioni aggiornate dai cambi live) dove esito è
+            bool: True se l'utente ha richiesto di generare il video completo
+            str: 'RESTART_SCRIPT' se è richiesto restart completo dello script
     """
     print("🌊 Avviando modalità Live Preview...")
     preview = LivePreview(
@@ -594,9 +487,9 @@ def run_preview_mode(config, render_frame_func, contours, hierarchy, width, heig
         # Se è richiesto restart completo dello script
         if preview.restart_requested:
             print("🔄 RESTART COMPLETO RICHIESTO - Uscendo per rilancio script...")
-            return 'RESTART_SCRIPT'
+            return 'RESTART_SCRIPT', preview.config
         else:
-            return result
+            return result, preview.config
             
     finally:
         preview.cleanup()
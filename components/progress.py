@@ -0,0 +1,173 @@
+"""
+📊 PROGRESS REPORTER - Crystal Therapy
+Avanzamento del rendering a frequenza fissa, per terminale, log o scheduler
+
+Costruire la barra ANSI e fare flush di stdout a ogni frame costa tempo e,
+quando l'output è rediretto (CI, file di log), produce righe illeggibili.
+Il ProgressReporter riceve gli aggiornamenti a ogni frame ma scrive solo a
+intervalli fissi:
+
+- 'bar':   barra colorata che si riscrive sulla stessa riga (PROGRESS_RATE_HZ)
+- 'plain': una riga di testo semplice ogni PROGRESS_LOG_INTERVAL secondi
+- 'json':  una riga JSON ogni PROGRESS_LOG_INTERVAL secondi (frame, fps, ETA,
+           tempi per stadio della pipeline) più un evento finale 'done'
+- 'off':   nessun output
+- 'auto':  'bar' se l'output è un terminale, altrimenti 'plain'
+"""
+
+import json
+import sys
+import time
+
+
+PROGRESS_MODES = ('auto', 'bar', 'plain', 'json', 'off')
+
+# --- Codici ANSI per la barra ---
+C_CYAN = '\033[96m'
+C_GREEN = '\033[92m'
+C_YELLOW = '\033[93m'
+C_BLUE = '\033[94m'
+C_MAGENTA = '\033[95m'
+C_RED = '\033[91m'
+C_BOLD = '\033[1m'
+C_END = '\033[0m'
+
+_BAR_COLORS = [C_MAGENTA, C_BLUE, C_CYAN, C_GREEN, C_YELLOW, C_RED]
+_PARTIAL_CHARS = ['▏', '▎', '▍', '▌', '▋', '▊', '▉', '█']
+_SPINNER = ['🌊', '🌀', '💫', '✨', '🔮', '💎', '⭐', '🌟']
+
+
+def resolve_progress_mode(mode, stream=None):
+    """Risolve 'auto' in 'bar' (terminale) o 'plain' (pipe, file, CI)."""
+    stream = stream or sys.stdout
+    if mode not in PROGRESS_MODES:
+        raise ValueError(f"Modalità di avanzamento sconosciuta: {mode} (valide: {', '.join(PROGRESS_MODES)})")
+    if mode == 'auto':
+        isatty = getattr(stream, 'isatty', None)
+        return 'bar' if isatty and isatty() else 'plain'
+    return mode
+
+
+class ProgressReporter:
+    def __init__(self, total, first_frame=0, mode='auto', rate_hz=4.0, log_interval=2.0,
+                 stages=None, label="Natisone Trip", stream=None):
+        """
+        Args:
+            total: Numero di frame da renderizzare
+            first_frame: Indice del primo frame (per --frames)
+            mode: Una di PROGRESS_MODES
+            rate_hz: Aggiornamenti al secondo della barra su terminale
+            log_interval: Secondi tra due righe in modalità 'plain' e 'json'
+            stages: Lista di StageMetrics della pipeline (tempi per stadio), opzionale
+            label: Nome mostrato nella barra
+            stream: Destinazione (default sys.stdout)
+        """
+        self.stream = stream or sys.stdout
+        self.mode = resolve_progress_mode(mode, self.stream)
+        self.total = max(1, int(total))
+        self.first_frame = first_frame
+        self.stages = stages or []
+        self.label = label
+        self.interval = 1.0 / rate_hz if self.mode == 'bar' else log_interval
+        self.rendered = 0
+        self.frame_index = first_frame
+        self.start_time = time.perf_counter()
+        self._last_emit = None
+        self._updates = 0
+
+    # --- Aggiornamento (chiamato a ogni frame, deve costare poco) ---
+
+    def update(self, frame_index, rendered):
+        """Registra il frame completato; scrive solo se è trascorso l'intervallo."""
+        self.frame_index = frame_index
+        self.rendered = rendered
+        if self.mode == 'off':
+            return
+        now = time.perf_counter()
+        if self._last_emit is not None and now - self._last_emit < self.interval and rendered < self.total:
+            return
+        self._last_emit = now
+        self._emit(now)
+
+    def finish(self):
+        """Scrive lo stato finale (sempre) e chiude la riga della barra."""
+        if self.mode == 'off':
+            return
+        now = time.perf_counter()
+        if self.mode == 'json':
+            self._write(json.dumps(dict(self.snapshot(now), event='done')) + "\n")
+        else:
+            if self._last_emit is None or self.rendered < self.total:
+                self._emit(now)
+            if self.mode == 'bar':
+                self._write("\n")
+
+    # --- Stato ---
+
+    def snapshot(self, now=None):
+        """Stato corrente come dizionario (usato anche dalla modalità json)."""
+        now = time.perf_counter() if now is None else now
+        elapsed = now - self.start_time
+        fps = self.rendered / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.rendered
+        return {
+            'event': 'progress',
+            'frame': self.frame_index,
+            'rendered': self.rendered,
+            'total': self.total,
+            'progress': round(self.rendered / self.total, 4),
+            'fps': round(fps, 3),
+            'elapsed_s': round(elapsed, 2),
+            'eta_s': round(remaining / fps, 1) if fps > 0 else None,
+            'stages_ms': {m.name: round(m.ms_per_item, 2) for m in self.stages},
+        }
+
+    # --- Output ---
+
+    def _write(self, text):
+        self.stream.write(text)
+        self.stream.flush()
+
+    def _emit(self, now):
+        self._updates += 1
+        state = self.snapshot(now)
+        if self.mode == 'json':
+            self._write(json.dumps(state) + "\n")
+        elif self.mode == 'plain':
+            eta = self._format_eta(state['eta_s'])
+            self._write(f"{self.label}: {state['rendered']}/{state['total']} frame "
+                        f"({state['progress']:.1%}) {state['fps']:.1f}fps ETA {eta}\n")
+        else:
+            self._write(self._format_bar(state))
+
+    @staticmethod
+    def _format_eta(eta_seconds):
+        if eta_seconds is None:
+            return "--:--"
+        minutes, seconds = divmod(int(eta_seconds), 60)
+        return f"{minutes:02d}:{seconds:02d}"
+
+    def _format_bar(self, state):
+        progress = state['progress']
+        fps = state['fps']
+        bar_length = 30
+        filled_length = int(bar_length * progress)
+
+        # Barra colorata dinamica con gradiente e carattere di riempimento parziale
+        bar_color = _BAR_COLORS[min(int(progress * len(_BAR_COLORS)), len(_BAR_COLORS) - 1)]
+        partial_fill = (bar_length * progress) - filled_length
+        partial_index = int(partial_fill * len(_PARTIAL_CHARS))
+        partial_symbol = _PARTIAL_CHARS[min(partial_index, len(_PARTIAL_CHARS) - 1)] if partial_fill > 0 and filled_length < bar_length else ''
+        bar = f"{bar_color}{'█' * filled_length}{partial_symbol}{C_END}{'░' * (bar_length - filled_length - (1 if partial_symbol else 0))}"
+
+        spinner = _SPINNER[self._updates % len(_SPINNER)]
+        fps_color = C_GREEN if fps >= 15 else C_YELLOW if fps >= 8 else C_RED
+        last_frame = self.first_frame + self.total
+
+        return (
+            f"\r{spinner} {C_BOLD}{C_GREEN}{self.label}{C_END} "
+            f"{C_CYAN}[{bar}]{C_END} {C_BOLD}{progress:.1%}{C_END} "
+            f"│ {fps_color}⚡{fps:.1f}fps{C_END} "
+            f"│ {C_MAGENTA}⏱️{self._format_eta(state['eta_s'])}{C_END} "
+            f"│ {C_YELLOW}🎬{self.frame_index + 1}/{last_frame}{C_END}"
+        )
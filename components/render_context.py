@@ -0,0 +1,85 @@
+"""
+🧰 RENDER CONTEXT - Crystal Therapy
+Pool di buffer pre-allocati per il rendering dei frame
+
+A 1080x1920 ogni layer float32 a tre canali pesa circa 25 MB: allocarne una
+dozzina per frame (np.zeros_like, .astype(np.float32), meshgrid, merge) mette
+sotto pressione allocatore e GC. Il RenderContext possiede buffer riutilizzabili
+dimensionati a WIDTH x HEIGHT che le fasi di render_frame riempiono in place.
+
+Attenzione: i buffer vengono sovrascritti al frame successivo. Tutto ciò che
+esce da render_frame (frame finale, bordi per i traccianti) deve restare un
+array nuovo e non un buffer del pool.
+
+La creazione dei buffer è protetta da un lock: le bande del TileScheduler
+chiedono lo stesso buffer da thread diversi e ne scrivono ciascuna le proprie
+righe (senza zero=True, che azzererebbe il buffer intero).
+"""
+
+import threading
+
+import numpy as np
+
+
+class RenderContext:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._buffers = {}
+        self._grid = None
+        self._lock = threading.Lock()
+
+    def buffer(self, name, channels=None, dtype=np.float32, zero=False):
+        """
+        Restituisce il buffer riutilizzabile associato a `name`.
+
+        Args:
+            name: Nome logico del buffer (una fase, un uso)
+            channels: Numero di canali (None = buffer a un canale 2D)
+            dtype: Tipo numpy del buffer
+            zero: Se True azzera il contenuto prima di restituirlo
+        """
+        shape = (self.height, self.width) if channels is None else (self.height, self.width, channels)
+        key = (name, shape, np.dtype(dtype))
+        buf = self._buffers.get(key)
+        if buf is None:
+            with self._lock:
+                buf = self._buffers.get(key)
+                if buf is None:
+                    buf = np.zeros(shape, dtype=dtype)
+                    self._buffers[key] = buf
+                    return buf
+        if zero:
+            buf.fill(0)
+        return buf
+
+    def grid(self):
+        """Griglia di coordinate (x, y) float32 condivisa dalle rimappature. Sola lettura."""
+        with self._lock:
+            if self._grid is None:
+                grid_x, grid_y = np.meshgrid(np.arange(self.width, dtype=np.float32),
+                                             np.arange(self.height, dtype=np.float32))
+                grid_x.flags.writeable = False
+                grid_y.flags.writeable = False
+                self._grid = (grid_x, grid_y)
+        return self._grid
+
+    @property
+    def nbytes(self):
+        """Memoria totale occupata dai buffer del pool."""
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+
+# Contesti condivisi per dimensione del frame
+_contexts = {}
+_contexts_lock = threading.Lock()
+
+
+def get_render_context(width, height):
+    """Restituisce il RenderContext condiviso per le dimensioni richieste."""
+    with _contexts_lock:
+        ctx = _contexts.get((width, height))
+        if ctx is None:
+            ctx = RenderContext(width, height)
+            _contexts[(width, height)] = ctx
+        return ctx
@@ -0,0 +1,119 @@
+"""
+📏 LOGO SDF - Crystal Therapy
+Campo di distanza con segno del logo: maschera, bordi, glow e maschera morbida da rampe per pixel
+
+Di norma il logo è una maschera binaria: a ogni frame viene deformata, poi
+sfocata con kernel ampi per glow (GLOW_KERNEL_SIZE) e maschera morbida
+(EDGE_SOFTNESS) e passata a Canny per traccianti e bordi del blending.
+
+Con LOGO_SDF_ENABLED il logo viene convertito una volta sola in un campo di
+distanza con segno (SDF): cv2.distanceTransform su un raster a risoluzione
+LOGO_SDF_SUPERSAMPLE volte più alta, riportato alla risoluzione del video.
+Il valore di ogni pixel è la distanza dal bordo in pixel del video, positiva
+dentro il logo. Le deformazioni (organica e lenti) rimappano l'SDF invece della
+maschera e tutto il resto diventa un'operazione per pixel sul campo deformato:
+
+- maschera:         copertura anti-aliased su un pixel attorno a distanza 0
+- traccianti:       banda |d| <= 1 (al posto di Canny + dilatazione)
+- glow / morbida:   rampa logistica d / sigma, che per un bordo dritto coincide
+                    (entro ~1%) con la sfocatura gaussiana della maschera; sugli
+                    angoli convessi il glow resta un po' più pieno
+- bordi blending:   rampa attorno alla banda |d| <= larghezza della dilatazione
+
+Nessuna rampa guarda i pixel vicini: le bande non hanno bisogno di halo.
+La distanza nel campo deformato non è più euclidea (la deformazione stira il
+logo), ma per glow e bordi morbidi la differenza non si vede.
+"""
+
+import cv2
+import numpy as np
+
+from components.blur import kernel_sigma, odd_kernel_size
+
+
+# Approssimazione logistica della CDF normale: Phi(x) ~ 1 / (1 + exp(-1.702 x))
+_LOGISTIC_GAUSS = 1.702
+
+
+def build_signed_distance(mask, supersample=2):
+    """
+    Campo di distanza con segno della maschera, calcolato su un raster ingrandito.
+
+    Args:
+        mask: Maschera del logo uint8 (0/255, eventuali bordi anti-aliased)
+        supersample: Fattore di ingrandimento del raster (1 = risoluzione del video)
+
+    Returns:
+        np.ndarray: float32 (altezza, larghezza), distanza dal bordo in pixel del video (> 0 dentro)
+    """
+    height, width = mask.shape[:2]
+    supersample = max(1, int(supersample))
+    if supersample > 1:
+        # Interpolazione bilineare + soglia: bordi lisci tra i pixel del raster originale
+        raster = cv2.resize(mask, (width * supersample, height * supersample), interpolation=cv2.INTER_LINEAR)
+    else:
+        raster = mask
+    inside = (raster > 127).astype(np.uint8)
+
+    # Distanza dal pixel più vicino dell'altra regione; il bordo sta a metà pixel
+    inside_distance = cv2.distanceTransform(inside, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+    outside_distance = cv2.distanceTransform(1 - inside, cv2.DIST_L2, cv2.DIST_MASK_PRECISE)
+    signed = np.where(inside > 0, inside_distance - 0.5, 0.5 - outside_distance)
+    signed *= np.float32(1.0 / supersample)
+
+    if supersample > 1:
+        # Media dei sotto-pixel: valore al centro di ogni pixel del video
+        signed = cv2.resize(signed, (width, height), interpolation=cv2.INTER_AREA)
+    return signed.astype(np.float32, copy=False)
+
+
+def sdf_coverage(sdf, out=None):
+    """Maschera uint8 0-255 con bordo anti-aliased di un pixel (maschera > 0 dove d > -0.5)."""
+    coverage = np.multiply(sdf, np.float32(255.0))
+    coverage += np.float32(127.5)
+    np.clip(coverage, 0, 255, out=coverage)
+    if out is None:
+        out = np.empty(sdf.shape, dtype=np.uint8)
+    np.copyto(out, coverage, casting='unsafe')
+    return out
+
+
+def sdf_edge_band(sdf, half_width=1.0):
+    """Banda uint8 (255) di pixel entro half_width dal bordo, come Canny + dilatazione 2x2."""
+    band = np.abs(sdf) <= half_width
+    return band.astype(np.uint8) * np.uint8(255)
+
+
+def _logistic(x, out=None):
+    """1 / (1 + exp(-x)) in float32 (cv2.exp è molto più veloce di np.exp)."""
+    t = np.multiply(x, np.float32(-1.0), out=out)
+    cv2.exp(t, t)
+    t += np.float32(1.0)
+    return np.divide(np.float32(1.0), t, out=t)
+
+
+def sdf_blur_ramp(sdf, ksize):
+    """
+    Equivalente per pixel di BlurPyramid(maschera).blur(ksize): float32 0-255.
+
+    La sfocatura gaussiana di un bordo a distanza d vale Phi(d / sigma).
+    """
+    sigma = kernel_sigma(odd_kernel_size(ksize))
+    ramp = _logistic(sdf * np.float32(_LOGISTIC_GAUSS / sigma))
+    ramp *= np.float32(255.0)
+    return ramp
+
+
+def sdf_edge_ramp(sdf, half_width, ksize):
+    """
+    Maschera dei bordi del blending avanzato (Canny, dilatazione, sfocatura) in float32 0-1.
+
+    Args:
+        half_width: Semi-larghezza della banda dilatata attorno al bordo, in pixel
+        ksize: Kernel della sfocatura (EDGE_BLUR_RADIUS)
+    """
+    sigma = kernel_sigma(odd_kernel_size(ksize))
+    x = np.abs(sdf)
+    np.subtract(np.float32(half_width), x, out=x)
+    x *= np.float32(_LOGISTIC_GAUSS / sigma)
+    return _logistic(x, out=x)
@@ -0,0 +1,208 @@
+"""
+⚙️ RENDER SETTINGS - Crystal Therapy
+Impostazioni di rendering immutabili, confrontabili e serializzabili
+
+La classe Config resta la sorgente dei valori di default (e della loro
+documentazione), ma le fasi di rendering ricevono un RenderSettings: un
+dataclass congelato con un campo per ogni parametro di Config più WIDTH e
+HEIGHT. Essendo immutabile e hashable può essere passato a processi worker,
+usato come chiave di cache e convive con altre impostazioni nello stesso
+processo. Le modifiche passano da replace(), che restituisce un nuovo oggetto.
+
+load_settings() legge il file `config` nel formato KEY=valore già usato dalla
+preview e dal main (colori _B/_G/_R, liste separate da virgole, commenti #).
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+
+from components.config import Config
+
+
+# Parametri dipendenti dalla risoluzione calcolata in main()
+_EXTRA_FIELDS = {
+    'WIDTH': None,
+    'HEIGHT': None,
+}
+
+# Chiavi del file config che modificano un solo canale di un colore BGR
+_COLOR_CHANNELS = {'_B': 0, '_G': 1, '_R': 2}
+
+
+def _freeze(value):
+    """Converte liste (anche annidate) in tuple, così il valore resta hashable."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _config_defaults(source=Config):
+    """Parametri pubblici (MAIUSCOLI) di una classe di configurazione, in ordine di definizione."""
+    defaults = {}
+    for name, value in vars(source).items():
+        if name.isupper() and not callable(value):
+            defaults[name] = _freeze(value)
+    for name, value in _EXTRA_FIELDS.items():
+        defaults.setdefault(name, value)
+    return defaults
+
+
+class _RenderSettingsMixin:
+    """Metodi comuni di RenderSettings (i campi sono generati da Config)."""
+
+    @classmethod
+    def from_config(cls, source=Config, **overrides):
+        """
+        Crea le impostazioni a partire da una classe/oggetto stile Config.
+
+        Gli attributi di `source` che non sono campi di RenderSettings vengono ignorati.
+        """
+        values = {}
+        for field in dataclasses.fields(cls):
+            if hasattr(source, field.name):
+                values[field.name] = _freeze(getattr(source, field.name))
+        values.update({key: _freeze(value) for key, value in overrides.items()})
+        return cls(**values)
+
+    def replace(self, **changes):
+        """
+        Restituisce una copia con i parametri indicati modificati.
+
+        Se cambiano FPS o DURATION_SECONDS e TOTAL_FRAMES non è specificato,
+        TOTAL_FRAMES viene ricalcolato.
+        """
+        changes = {key: _freeze(value) for key, value in changes.items()}
+        if ('FPS' in changes or 'DURATION_SECONDS' in changes) and 'TOTAL_FRAMES' not in changes:
+            fps = changes.get('FPS', self.FPS)
+            duration = changes.get('DURATION_SECONDS', self.DURATION_SECONDS)
+            changes['TOTAL_FRAMES'] = duration * fps
+        return dataclasses.replace(self, **changes)
+
+    def to_dict(self):
+        """Parametri come dizionario semplice (tuple comprese)."""
+        return {field.name: getattr(self, field.name) for field in dataclasses.fields(self)}
+
+    def digest(self):
+        """Impronta stabile delle impostazioni (identica tra processi ed esecuzioni)."""
+        payload = json.dumps(self.to_dict(), sort_keys=True, default=repr)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+RenderSettings = dataclasses.make_dataclass(
+    'RenderSettings',
+    [(name, object, dataclasses.field(default=value)) for name, value in _config_defaults().items()],
+    bases=(_RenderSettingsMixin,),
+    frozen=True,
+)
+RenderSettings.__module__ = __name__
+RenderSettings.__doc__ = "Impostazioni di rendering immutabili (un campo per ogni parametro di Config)."
+
+SETTING_NAMES = frozenset(field.name for field in dataclasses.fields(RenderSettings))
+
+
+# --- Compatibilità con il file `config` ---
+
+def parse_config_line(line):
+    """
+    Estrae (chiave, valore grezzo) da una riga del file config.
+
+    Restituisce None per righe vuote, commenti o righe senza '='.
+    """
+    line = line.strip()
+    if not line or line.startswith('#') or '=' not in line:
+        return None
+    key, value = line.split('=', 1)
+    key = key.strip()
+    # Separa il valore dal commento e rimuove le virgolette se presenti
+    if '#' in value:
+        value = value.split('#')[0]
+    value = value.strip().strip('"\'')
+    return key, value
+
+
+def coerce_config_value(settings, key, value):
+    """
+    Converte un valore grezzo del file config nelle modifiche da applicare.
+
+    Returns:
+        dict: {campo: valore} pronto per settings.replace()
+
+    Raises:
+        KeyError: se la chiave non corrisponde a nessun parametro
+        ValueError: se il valore non è convertibile nel tipo del parametro
+    """
+    # Canali BGR dei colori (es. LOGO_COLOR_B, TRACER_BASE_COLOR_R)
+    suffix = key[-2:]
+    color_key = key[:-2]
+    if suffix in _COLOR_CHANNELS and color_key.endswith('_COLOR') and color_key in SETTING_NAMES:
+        color = list(getattr(settings, color_key))
+        color[_COLOR_CHANNELS[suffix]] = int(value)
+        return {color_key: tuple(color)}
+
+    if key not in SETTING_NAMES:
+        raise KeyError(key)
+
+    current_value = getattr(settings, key)
+    # Converti in base al tipo del parametro esistente
+    if isinstance(current_value, bool):
+        new_value = value.lower() in ('true', '1', 'yes', 'on')
+    elif isinstance(current_value, int):
+        new_value = int(value)
+    elif isinstance(current_value, float):
+        new_value = float(value)
+    elif isinstance(current_value, tuple):
+        # Liste (es. file audio) separate da virgole
+        new_value = tuple(item.strip() for item in value.split(','))
+    else:
+        new_value = value
+    return {key: new_value}
+
+
+def load_settings(config_file="config", base=None):
+    """
+    Carica le impostazioni dal file config (se esiste) sopra ai default di Config.
+
+    Args:
+        config_file: Percorso del file KEY=valore
+        base: RenderSettings di partenza (default: valori della classe Config)
+    """
+    settings = base if base is not None else RenderSettings.from_config()
+    if not os.path.exists(config_file):
+        print("📄 File config non trovato, uso valori di default")
+        return settings
+
+    print("📄 Caricamento parametri dal file config...")
+
+    try:
+        updates = {}
+        with open(config_file, 'r') as f:
+            for line_num, line in enumerate(f, 1):
+                parsed = parse_config_line(line)
+                if parsed is None:
+                    continue
+                key, value = parsed
+                try:
+                    # I colori a canali separati si accumulano sullo stato già aggiornato
+                    current = settings.replace(**updates) if updates else settings
+                    updates.update(coerce_config_value(current, key, value))
+                except KeyError:
+                    print(f"⚠️  Parametro sconosciuto '{key}' alla riga {line_num}")
+                except Exception as e:
+                    print(f"⚠️  Errore nel parsing della riga {line_num}: {line.strip()} ({e})")
+
+        settings = settings.replace(**updates)
+
+        # Ricalcola i valori dipendenti
+        if settings.TEST_MODE:
+            settings = settings.replace(FPS=1, DURATION_SECONDS=4)
+        settings = settings.replace(TOTAL_FRAMES=settings.DURATION_SECONDS * settings.FPS)
+
+        print("✅ Configurazione caricata dal file config")
+
+    except Exception as e:
+        print(f"⚠️  Errore nel caricamento del file config: {e}")
+        print("📄 Uso valori di default")
+
+    return settings
@@ -0,0 +1,96 @@
+"""
+⏱️ STARTUP CHECK - Crystal Therapy
+Controllo di regressione sul tempo di avvio del generatore
+
+librosa, PyMuPDF, scipy, svgpathtools, noise, PIL e Numba vengono importati solo
+nei percorsi che li usano. Questo controllo importa natisone_trip_generator in
+un interprete pulito con `python -X importtime`, verifica che nessuna di queste
+dipendenze venga caricata all'avvio e che `--help` resti sotto il budget.
+
+Uso:
+    python -m components.startup                # budget di default (1 secondo)
+    python -m components.startup --budget 0.5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+# Moduli che non devono essere importati all'avvio (solo nei percorsi che li usano)
+HEAVY_MODULES = ('librosa', 'scipy', 'fitz', 'pymupdf', 'svgpathtools', 'noise',
+                 'PIL', 'numba', 'skimage', 'cairosvg')
+
+DEFAULT_BUDGET_S = 1.0
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile():
+    """
+    Importa il generatore in un interprete pulito con -X importtime.
+
+    Returns:
+        list: (modulo, tempo cumulativo in secondi, profondità) per ogni import
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import natisone_trip_generator'],
+        cwd=_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import del generatore fallito:\n{result.stderr}")
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        profile.append((name.strip(), int(cumulative) / 1e6, depth))
+    return profile
+
+
+def help_wall_time():
+    """Tempo reale di `natisone_trip_generator.py --help` (interprete incluso), in secondi."""
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, 'natisone_trip_generator.py', '--help'],
+                   cwd=_ROOT, capture_output=True, check=True)
+    return time.perf_counter() - t0
+
+
+def check_startup(budget=DEFAULT_BUDGET_S):
+    """
+    Returns:
+        tuple: (problemi trovati, moduli top-level più lenti, tempo di --help)
+    """
+    profile = import_profile()
+    problems = []
+    loaded_heavy = sorted({name for name, _, _ in profile if name.split('.')[0] in HEAVY_MODULES})
+    if loaded_heavy:
+        problems.append(f"dipendenze pesanti importate all'avvio: {', '.join(loaded_heavy)}")
+    wall = help_wall_time()
+    if wall > budget:
+        problems.append(f"--help impiega {wall:.2f}s (budget {budget:.2f}s)")
+    # Import diretti del generatore (profondità 1), più il totale (profondità 0)
+    total = [entry for entry in profile if entry[0] == 'natisone_trip_generator']
+    direct = sorted((entry for entry in profile if entry[2] == 1), key=lambda entry: -entry[1])
+    return problems, total + direct[:8], wall
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Controllo del tempo di avvio")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_S,
+                        help="Tempo massimo in secondi per --help (default: %(default)s)")
+    args = parser.parse_args()
+
+    problems, slowest, wall = check_startup(args.budget)
+    print(f"⏱️ --help in {wall:.2f}s (budget {args.budget:.2f}s)")
+    print("   import più lenti:")
+    for name, seconds, _ in slowest:
+        print(f"   {seconds * 1000:8.1f} ms  {name}")
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        raise SystemExit(1)
+    print("✅ Avvio leggero")
@@ -0,0 +1,279 @@
+"""
+🎨 TEXTURE ASSET - Crystal Therapy
+Cache della texture pre-processata per il blending per-frame
+
+La texture viene caricata e ridimensionata una sola volta; la versione float
+normalizzata e i termini usati dalle modalità di blending (1-t, 2t, ...) sono
+calcolati alla prima richiesta e poi riutilizzati da tutti i frame, così il
+costo per-frame resta solo quello del blending vero e proprio.
+
+Supporta anche una texture animata (scorrimento o zoom nel tempo) ottenuta
+con cv2.remap sulla texture già in memoria, senza ricaricare il file.
+
+Per il rendering a bande region() restituisce una vista su un intervallo di
+righe che riusa i termini della texture intera invece di ricalcolarli.
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from components.precision import apply_lut, cached_lut, lut_grid
+
+
+# Modalità di animazione disponibili per TEXTURE_ANIMATION
+TEXTURE_ANIMATIONS = ('none', 'scroll', 'zoom')
+
+
+class TextureAsset:
+    def __init__(self, image):
+        """
+        Args:
+            image: Texture BGR uint8 già ridimensionata alle dimensioni del frame
+        """
+        self.image = image
+        self.height, self.width = image.shape[:2]
+        self._terms = {}
+        self._grid = None
+        self._frame_key = None
+        self._frame_asset = None
+        self._parent = None
+        self._rows = None
+        self._regions = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_array(cls, texture):
+        """Restituisce un TextureAsset anche se riceve un array numpy grezzo."""
+        if texture is None or isinstance(texture, cls):
+            return texture
+        return cls(texture)
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    def region(self, y0, y1):
+        """
+        Vista della texture sulle righe [y0, y1) (una banda del TileScheduler).
+
+        I termini della vista sono fette dei termini della texture intera, quindi
+        vengono calcolati una volta sola per tutte le bande.
+        """
+        if y0 == 0 and y1 == self.height:
+            return self
+        with self._lock:
+            region = self._regions.get((y0, y1))
+            if region is None:
+                region = TextureAsset(self.image[y0:y1])
+                region._parent = self
+                region._rows = slice(y0, y1)
+                self._regions[(y0, y1)] = region
+            return region
+
+    # --- Termini pre-calcolati ---
+
+    def term(self, name):
+        """
+        Restituisce (e memorizza) un termine derivato dalla texture normalizzata.
+
+        Termini disponibili: 'float' (t), 'inv' (1-t), 'double' (2t),
+        'inv_double' (2(1-t)), 'one_minus_double' (1-2t), 'lt_half' (t<0.5),
+        'le_half' (t<=0.5), 'dodge_rcp' (1/(1-t)), 'burn_rcp' (1/t),
+        'is_one' (t>=1), 'is_zero' (t<=0)
+        """
+        cached = self._terms.get(name)
+        if cached is not None:
+            return cached
+
+        if self._parent is not None:
+            value = self._parent.term(name)[self._rows]
+            self._terms[name] = value
+            return value
+
+        with self._lock:
+            cached = self._terms.get(name)
+            if cached is None:
+                cached = self._terms[name] = self._compute_term(name)
+            return cached
+
+    def _compute_term(self, name):
+        if name == 'float':
+            value = self.image.astype(np.float32)
+            value *= 1.0 / 255.0
+        else:
+            t = self.term('float')
+            if name == 'inv':
+                value = 1.0 - t
+            elif name == 'double':
+                value = 2.0 * t
+            elif name == 'inv_double':
+                value = 2.0 * self.term('inv')
+            elif name == 'one_minus_double':
+                value = 1.0 - self.term('double')
+            elif name == 'lt_half':
+                value = t < 0.5
+            elif name == 'le_half':
+                value = t <= 0.5
+            elif name == 'dodge_rcp':
+                value = 1.0 / (self.term('inv') + 1e-10)
+            elif name == 'burn_rcp':
+                value = 1.0 / (t + 1e-10)
+            elif name == 'is_one':
+                value = t >= 1.0
+            elif name == 'is_zero':
+                value = t <= 0.0
+            else:
+                raise KeyError(f"Termine texture sconosciuto: {name}")
+        return value
+
+    # --- Animazione ---
+
+    def at_frame(self, frame_index, config):
+        """
+        Restituisce la texture da usare per il frame richiesto.
+
+        Con TEXTURE_ANIMATION='none' ritorna se stessa (tutti i termini restano
+        in cache). Negli altri casi la texture viene rimappata dalla sorgente in
+        memoria e il risultato è memorizzato per il frame corrente, così quando
+        TEXTURE_TARGET='both' logo e sfondo condividono gli stessi termini.
+        """
+        animation = getattr(config, 'TEXTURE_ANIMATION', 'none')
+        if animation not in ('scroll', 'zoom'):
+            return self
+
+        if animation == 'scroll':
+            params = (getattr(config, 'TEXTURE_SCROLL_SPEED_X', 0.0),
+                      getattr(config, 'TEXTURE_SCROLL_SPEED_Y', 0.0))
+        else:
+            params = (getattr(config, 'TEXTURE_ZOOM_SPEED', 0.0),
+                      getattr(config, 'TEXTURE_ZOOM_AMPLITUDE', 0.0))
+
+        key = (frame_index, animation, params)
+        if key == self._frame_key:
+            return self._frame_asset
+
+        if self._grid is None:
+            self._grid = np.meshgrid(np.arange(self.width, dtype=np.float32),
+                                     np.arange(self.height, dtype=np.float32))
+        grid_x, grid_y = self._grid
+
+        if animation == 'scroll':
+            # Scorrimento continuo con wrap ai bordi
+            map_x = grid_x + np.float32(frame_index * params[0])
+            map_y = grid_y + np.float32(frame_index * params[1])
+            border = cv2.BORDER_WRAP
+        else:
+            # Zoom pulsante attorno al centro della texture
+            zoom = 1.0 + params[1] * np.sin(frame_index * params[0])
+            cx, cy = self.width / 2.0, self.height / 2.0
+            map_x = (grid_x - cx) * np.float32(1.0 / zoom) + np.float32(cx)
+            map_y = (grid_y - cy) * np.float32(1.0 / zoom) + np.float32(cy)
+            border = cv2.BORDER_REFLECT
+
+        animated = cv2.remap(self.image, map_x, map_y, interpolation=cv2.INTER_LINEAR, borderMode=border)
+        self._frame_key = key
+        self._frame_asset = TextureAsset(animated)
+        return self._frame_asset
+
+    # --- Blending ---
+
+    def blend(self, base_image, alpha, blending_mode='overlay', mask=None, precision='float32'):
+        """
+        Applica la texture su un'immagine con la modalità di blending richiesta.
+        Stessa semantica di apply_texture_blending, ma con i termini della
+        texture già pronti.
+
+        Args:
+            precision: 'fixed' usa una tabella 256x256 (base, texture) -> uint8 al
+                       posto dei layer float32 (components/precision.py)
+        """
+        if alpha <= 0:
+            return base_image.copy()
+        if precision == 'fixed':
+            return self._blend_fixed(base_image, alpha, blending_mode, mask)
+
+        b = base_image.astype(np.float32)
+        b *= 1.0 / 255.0
+        t = self.term('float')
+
+        if blending_mode == 'normal':
+            blended = t
+        elif blending_mode == 'multiply':
+            blended = b * t
+        elif blending_mode == 'screen':
+            blended = 1.0 - (1.0 - b) * self.term('inv')
+        elif blending_mode == 'soft_light':
+            k = self.term('one_minus_double')
+            blended = np.where(self.term('le_half'),
+                               b - k * b * (1.0 - b),
+                               b - k * (np.sqrt(b) - b))
+        elif blending_mode == 'hard_light':
+            blended = np.where(self.term('lt_half'),
+                               b * self.term('double'),
+                               1.0 - (1.0 - b) * self.term('inv_double'))
+        elif blending_mode == 'color_dodge':
+            blended = np.where(self.term('is_one'), 1.0,
+                               np.minimum(1.0, b * self.term('dodge_rcp')))
+        elif blending_mode == 'color_burn':
+            blended = np.where(self.term('is_zero'), 0.0,
+                               1.0 - np.minimum(1.0, (1.0 - b) * self.term('burn_rcp')))
+        elif blending_mode == 'darken':
+            blended = np.minimum(b, t)
+        elif blending_mode == 'lighten':
+            blended = np.maximum(b, t)
+        elif blending_mode == 'difference':
+            blended = np.abs(b - t)
+        elif blending_mode == 'exclusion':
+            blended = b + t - b * self.term('double')
+        else:
+            # Overlay (anche come default)
+            blended = np.where(b < 0.5,
+                               b * self.term('double'),
+                               1.0 - (1.0 - b) * self.term('inv_double'))
+
+        # Miscela con alpha: b + (blended - b) * alpha
+        result = blended - b
+        result *= alpha
+        result += b
+
+        # Applica maschera se fornita
+        if mask is not None:
+            mask_norm = mask.astype(np.float32)
+            mask_norm *= 1.0 / 255.0
+            if mask_norm.ndim == 2:
+                mask_norm = mask_norm[:, :, np.newaxis]
+            result -= b
+            result *= mask_norm
+            result += b
+
+        result *= 255.0
+        np.clip(result, 0, 255, out=result)
+        return result.astype(np.uint8)
+
+    def _blend_fixed(self, base_image, alpha, blending_mode, mask):
+        """
+        blend() su interi: la tabella contiene il risultato del percorso float per
+        ogni coppia (base, texture), quindi senza maschera il risultato è identico.
+        La maschera miscela base e risultato in uint8 (arrotondato).
+        """
+        lut = blend_lut(alpha, blending_mode)
+        result = apply_lut(lut, base_image, self.image)
+        if mask is None:
+            return result
+        if mask.ndim == 2 and base_image.ndim == 3:
+            mask = cv2.merge([mask] * base_image.shape[2])
+        # base * (255 - m) / 255 + risultato * m / 255
+        cv2.multiply(result, mask, dst=result, scale=1.0 / 255.0)
+        cv2.add(result, cv2.multiply(base_image, cv2.bitwise_not(mask), scale=1.0 / 255.0), dst=result)
+        return result
+
+
+def blend_lut(alpha, blending_mode):
+    """Tabella (base, texture) -> uint8 di TextureAsset.blend per opacità e modalità."""
+    def build():
+        base, texture = lut_grid()
+        return TextureAsset(texture).blend(base, alpha, blending_mode)
+
+    return cached_lut(('texture', blending_mode, float(alpha)), build)
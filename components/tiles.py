@@ -0,0 +1,138 @@
+"""
+🧩 TILE SCHEDULER - Crystal Therapy
+Rendering di un singolo frame per bande orizzontali su più thread
+
+Remap, texture, traccianti e blending sono operazioni locali ai pixel e OpenCV
+/ NumPy rilasciano il GIL: dividendo il frame in bande orizzontali le fasi
+possono girare in parallelo anche quando serve un solo frame alla volta (live
+preview, --still).
+
+Ogni banda scrive solo le proprie righe nei buffer a frame intero del
+RenderContext, quindi non servono copie né lock. Le fasi che guardano i vicini
+(sfocature, Canny) leggono un margine (halo) di righe sopra e sotto la banda e
+tengono solo le righe interne.
+
+Con TILE_BANDS <= 1 c'è una sola banda che copre il frame e il lavoro gira
+nel thread chiamante, senza overhead.
+"""
+
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Le bande iniziano su multipli di 8 righe: i livelli della piramide di blur
+# restano allineati tra banda e frame intero
+BAND_ALIGN = 8
+
+
+class Band(namedtuple('Band', ['index', 'y0', 'y1', 'height'])):
+    """Banda di righe [y0, y1) di un frame alto `height`."""
+
+    __slots__ = ()
+
+    @property
+    def rows(self):
+        return slice(self.y0, self.y1)
+
+    @property
+    def is_full_frame(self):
+        return self.y0 == 0 and self.y1 == self.height
+
+    def context(self, margin):
+        """
+        Righe da leggere con un margine attorno alla banda.
+
+        Returns:
+            tuple: (righe con halo nel frame, righe della banda dentro la regione con halo)
+        """
+        top = max(0, self.y0 - margin)
+        bottom = min(self.height, self.y1 + margin)
+        return slice(top, bottom), slice(self.y0 - top, self.y1 - top)
+
+
+def align_margin(margin):
+    """Arrotonda un halo al multiplo di BAND_ALIGN successivo."""
+    margin = max(0, int(margin))
+    return -(-margin // BAND_ALIGN) * BAND_ALIGN
+
+
+def split_bands(height, count):
+    """Divide `height` righe in al massimo `count` bande allineate a BAND_ALIGN."""
+    count = max(1, min(int(count), height // BAND_ALIGN or 1))
+    step = align_margin(-(-height // count))
+    bands = []
+    y0 = 0
+    while y0 < height:
+        y1 = min(height, y0 + step)
+        bands.append(Band(len(bands), y0, y1, height))
+        y0 = y1
+    return bands
+
+
+class TileScheduler:
+    def __init__(self, bands=4, workers=None):
+        """
+        Args:
+            bands: Numero di bande orizzontali per frame (<= 1 disattiva il tiling)
+            workers: Thread del pool (default: min(bande, CPU))
+        """
+        self.band_count = max(1, int(bands))
+        self.workers = workers or min(self.band_count, os.cpu_count() or 1)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._bands = {}
+
+    @property
+    def enabled(self):
+        return self.band_count > 1
+
+    def bands(self, height):
+        """Bande (in cache) per un frame alto `height`."""
+        bands = self._bands.get(height)
+        if bands is None:
+            bands = split_bands(height, self.band_count)
+            self._bands[height] = bands
+        return bands
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tile")
+            return self._executor
+
+    def map(self, func, height):
+        """
+        Esegue func(band) per ogni banda del frame e attende tutte le bande.
+
+        Returns:
+            list: Risultati di func in ordine di banda (un'eccezione viene rilanciata)
+        """
+        bands = self.bands(height)
+        if len(bands) == 1 or self.workers <= 1:
+            return [func(band) for band in bands]
+        futures = [self._pool().submit(func, band) for band in bands]
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+# Scheduler condivisi per numero di bande
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_tile_scheduler(bands):
+    """Restituisce il TileScheduler condiviso per il numero di bande richiesto."""
+    bands = max(1, int(bands))
+    with _schedulers_lock:
+        scheduler = _schedulers.get(bands)
+        if scheduler is None:
+            scheduler = TileScheduler(bands)
+            _schedulers[bands] = scheduler
+        return scheduler
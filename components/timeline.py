@@ -0,0 +1,173 @@
+"""
+📈 PARAMETER TIMELINE - Crystal Therapy
+Parametri dinamici di tutti i frame calcolati in anticipo, in forma vettoriale
+
+get_dynamic_parameters calcolava a ogni frame una dozzina di np.sin/np.cos
+scalari e costruiva un dict nuovo. La timeline calcola gli stessi valori per
+tutti i frame in una volta sola (operazioni vettoriali NumPy, risultati
+identici bit per bit) in un array strutturato con un campo per parametro:
+
+- glow_intensity
+- deformation_speed, deformation_scale, deformation_intensity
+- lens_speed_factor, lens_strength_multiplier
+- tracer_opacity_multiplier, bg_tracer_opacity_multiplier
+
+La lettura di un frame è O(1): i dict per frame vengono preparati insieme
+all'array e condivisi (vanno trattati come sola lettura).
+
+Con un file di automazione (components/automation.py) i parametri di base
+(GLOW_INTENSITY, DEFORMATION_*, LENS_SPEED_FACTOR, VARIATION_*...) sono curve
+con un valore per frame invece di costanti.
+
+Export per grafici e tuning: `natisone_trip_generator.py --export-timeline timeline.csv`
+(con le stesse opzioni del render, es. --test).
+"""
+
+import numpy as np
+
+
+TIMELINE_FIELDS = (
+    'glow_intensity',
+    'deformation_speed',
+    'deformation_scale',
+    'deformation_intensity',
+    'lens_speed_factor',
+    'lens_strength_multiplier',
+    'tracer_opacity_multiplier',
+    'bg_tracer_opacity_multiplier',
+)
+
+TIMELINE_DTYPE = np.dtype([(name, np.float64) for name in TIMELINE_FIELDS])
+
+
+def compute_dynamic_parameters(frame_indices, total_frames, config, curves=None):
+    """
+    Versione vettoriale di get_dynamic_parameters: stesse formule, tutti i frame insieme.
+
+    Args:
+        frame_indices: Array di indici di frame
+        total_frames: Numero totale di frame (per la pulsazione del glow)
+        config: RenderSettings
+        curves: {parametro: valori per frame} dell'automazione, al posto dei valori di config
+
+    Returns:
+        np.ndarray: array strutturato TIMELINE_DTYPE, un elemento per frame
+    """
+    frames = np.asarray(frame_indices)
+    values = np.empty(frames.shape, dtype=TIMELINE_DTYPE)
+
+    def param(name):
+        # Curva automatizzata (ferma oltre l'ultimo frame) o valore costante
+        if curves and name in curves:
+            curve = curves[name]
+            return curve[np.clip(frames, 0, len(curve) - 1)]
+        return getattr(config, name)
+
+    # Pulsazione del glow
+    t = frames / total_frames
+    values['glow_intensity'] = param('GLOW_INTENSITY') + (np.sin(t * np.pi) * 0.2)
+
+    if config.DYNAMIC_VARIATION_ENABLED:
+        base_seed = frames * 0.001
+        amplitude = param('VARIATION_AMPLITUDE')
+
+        # Variazioni lente per deformazioni organiche
+        slow = base_seed * param('VARIATION_SPEED_SLOW')
+        values['deformation_speed'] = param('DEFORMATION_SPEED') * (1.0 + np.sin(slow + 1.0) * amplitude)
+        values['deformation_scale'] = param('DEFORMATION_SCALE') * (1.0 + np.cos(slow + 2.5) * amplitude)
+        values['deformation_intensity'] = param('DEFORMATION_INTENSITY') * (1.0 + np.sin(slow + 4.0) * amplitude)
+
+        # Variazioni medie per lenti
+        medium = base_seed * param('VARIATION_SPEED_MEDIUM')
+        values['lens_speed_factor'] = param('LENS_SPEED_FACTOR') * (1.0 + np.sin(medium + 3.0) * amplitude)
+        values['lens_strength_multiplier'] = 1.0 + np.cos(medium + 5.5) * amplitude
+
+        # Variazioni veloci per traccianti
+        fast = base_seed * param('VARIATION_SPEED_FAST')
+        values['tracer_opacity_multiplier'] = 1.0 + np.sin(fast + 2.0) * amplitude
+        values['bg_tracer_opacity_multiplier'] = 1.0 + np.cos(fast + 6.0) * amplitude
+    else:
+        # Valori fissi se le variazioni sono disabilitate
+        values['deformation_speed'] = param('DEFORMATION_SPEED')
+        values['deformation_scale'] = param('DEFORMATION_SCALE')
+        values['deformation_intensity'] = param('DEFORMATION_INTENSITY')
+        values['lens_speed_factor'] = param('LENS_SPEED_FACTOR')
+        values['lens_strength_multiplier'] = 1.0
+        values['tracer_opacity_multiplier'] = 1.0
+        values['bg_tracer_opacity_multiplier'] = 1.0
+    return values
+
+
+class ParameterTimeline:
+    def __init__(self, config, total_frames, curves=None):
+        """
+        Args:
+            config: RenderSettings del render (dopo preset e override da linea di comando)
+            total_frames: Numero di frame del video
+            curves: Curve dell'automazione (Automation.evaluate), se presenti
+        """
+        self.config = config
+        self.total_frames = total_frames
+        self.curves = curves or {}
+        self.values = compute_dynamic_parameters(np.arange(total_frames), total_frames, config, self.curves)
+        # Un dict per frame, costruito una volta: la lettura non alloca nulla
+        self._rows = [dict(zip(TIMELINE_FIELDS, row)) for row in self.values.tolist()]
+
+    def __len__(self):
+        return self.total_frames
+
+    def params(self, frame_index):
+        """
+        Parametri del frame come dict (stesse chiavi di get_dynamic_parameters), da non modificare.
+
+        Fuori dalla timeline (es. live preview oltre l'ultimo frame) i valori vengono calcolati al volo.
+        """
+        if 0 <= frame_index < self.total_frames:
+            return self._rows[frame_index]
+        row = compute_dynamic_parameters(np.array([frame_index]), self.total_frames, self.config, self.curves)
+        return dict(zip(TIMELINE_FIELDS, row.tolist()[0]))
+
+    def column(self, name):
+        """Valori di un parametro per tutti i frame (vista, nessuna copia)."""
+        return self.values[name]
+
+    def to_csv(self, path, fps=None):
+        """
+        Scrive la timeline in CSV: una riga per frame, colonne frame, time (se fps), parametri
+        dinamici e curve dell'automazione (con il nome del parametro del Config).
+
+        Returns:
+            str: path
+        """
+        frames = np.arange(self.total_frames)
+        columns = [frames]
+        header = ['frame']
+        if fps:
+            columns.append(frames / fps)
+            header.append('time')
+        columns += [self.values[name] for name in TIMELINE_FIELDS]
+        header += TIMELINE_FIELDS
+        columns += list(self.curves.values())
+        header += list(self.curves)
+        np.savetxt(path, np.column_stack(columns), delimiter=',', header=','.join(header),
+                   comments='', fmt=['%d'] + ['%.10g'] * (len(columns) - 1))
+        return path
+
+
+_timeline_cache = {}
+
+
+def get_parameter_timeline(config, total_frames):
+    """
+    Timeline per queste impostazioni, calcolata alla prima richiesta e poi riusata.
+
+    La chiave è l'identità di config (RenderSettings è immutabile): il riferimento
+    tenuto in cache impedisce che l'id venga riusato da un altro oggetto.
+    """
+    key = (id(config), total_frames)
+    entry = _timeline_cache.get(key)
+    if entry is None or entry.config is not config:
+        if len(_timeline_cache) >= 8:
+            _timeline_cache.clear()
+        entry = _timeline_cache[key] = ParameterTimeline(config, total_frames)
+    return entry
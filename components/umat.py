@@ -0,0 +1,205 @@
+"""
+🧮 UMAT - Crystal Therapy
+Backend OpenCV T-API (cv2.UMat) per le fasi del frame fatte solo di chiamate cv2
+
+Le funzioni cv2 accettano indifferentemente np.ndarray e cv2.UMat: con un UMat
+OpenCV sceglie da sé dove eseguire (kernel OpenCL, anche su runtime OpenCL per
+CPU, oppure il codice CPU ottimizzato). Lo stesso codice serve i due backend:
+le fasi caricano l'ingresso in un UMat, lo tengono lì per tutta la catena cv2 e
+tornano a NumPy solo quando il risultato serve alle parti NumPy della composizione.
+
+Fasi con il backend 'umat':
+- process_background: resize, scurimento, grigio, blur, Canny, dilatazione
+- deformazione organica: resize del noise, mappe e remap cubico
+- prodotti della maschera: Canny + dilatazione dei traccianti e piramide di
+  sfocatura di glow e maschera morbida, sul frame intero invece che per banda
+
+CV_BACKEND:
+- 'numpy': array NumPy (default)
+- 'umat':  cv2.UMat, con OpenCL se disponibile, altrimenti dispatch CPU di OpenCV
+- 'auto':  cv2.UMat solo se OpenCL è disponibile
+
+Se una chiamata su UMat fallisce (driver OpenCL, memoria del dispositivo) la fase
+viene ripetuta con NumPy e il resto del processo resta su NumPy.
+`python -m components.umat` misura le fasi con i due backend.
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+
+CV_BACKENDS = ('numpy', 'umat', 'auto')
+
+_disabled = False
+_announced = False
+
+
+def opencl_device():
+    """Nome del dispositivo OpenCL usato da OpenCV, None se OpenCL non c'è."""
+    if not cv2.ocl.haveOpenCL():
+        return None
+    cv2.ocl.setUseOpenCL(True)
+    if not cv2.ocl.useOpenCL():
+        return None
+    device = cv2.ocl.Device_getDefault()
+    return f"{device.name()} ({device.vendorName()})"
+
+
+def resolve_cv_backend(backend='numpy'):
+    """Restituisce 'umat' o 'numpy' in base alla richiesta, a OpenCL e a eventuali errori precedenti."""
+    if backend not in CV_BACKENDS:
+        raise ValueError(f"Backend OpenCV sconosciuto: {backend} (validi: {', '.join(CV_BACKENDS)})")
+    if backend == 'numpy' or _disabled or not hasattr(cv2, 'UMat'):
+        return 'numpy'
+    device = opencl_device()
+    if backend == 'auto' and device is None:
+        return 'numpy'
+    return 'umat'
+
+
+def describe_cv_backend(backend='numpy'):
+    """Riga di log per l'avvio del render: backend risolto e dispositivo OpenCL."""
+    resolved = resolve_cv_backend(backend)
+    if resolved == 'numpy':
+        if backend == 'umat':
+            return "⚠️ cv2.UMat non disponibile in questa build di OpenCV: uso NumPy"
+        return None
+    device = opencl_device()
+    if device is None:
+        return "🧮 Backend OpenCV: UMat senza OpenCL (kernel CPU di OpenCV)"
+    return f"🧮 Backend OpenCV: UMat su OpenCL, {device}"
+
+
+def disable_umat(error):
+    """Torna a NumPy per il resto del processo dopo un errore su UMat."""
+    global _disabled, _announced
+    _disabled = True
+    if not _announced:
+        _announced = True
+        print(f"⚠️ OpenCV T-API non riuscita ({str(error).strip().splitlines()[-1]}): continuo con NumPy")
+
+
+def with_fallback(backend, function, *args, **kwargs):
+    """
+    Esegue function(*args, backend=backend, **kwargs); se con 'umat' OpenCV
+    solleva un errore, la ripete con 'numpy' (function non deve avere effetti collaterali).
+    """
+    if backend == 'umat':
+        try:
+            return function(*args, backend='umat', **kwargs)
+        except cv2.error as error:
+            disable_umat(error)
+    return function(*args, backend='numpy', **kwargs)
+
+
+def upload(image, backend):
+    """Immagine nel formato del backend (UMat con 'umat', invariata con 'numpy')."""
+    if backend == 'umat' and not isinstance(image, cv2.UMat):
+        return cv2.UMat(np.ascontiguousarray(image))
+    return image
+
+
+def download(image):
+    """np.ndarray da un risultato cv2 (copia da UMat, invariato se è già un array)."""
+    return image.get() if isinstance(image, cv2.UMat) else image
+
+
+def crop(image, y0, y1, x0, x1):
+    """Ritaglio senza copia, anche di un UMat (ROI)."""
+    if isinstance(image, cv2.UMat):
+        return cv2.UMat(image, (y0, y1), (x0, x1))
+    return image[y0:y1, x0:x1]
+
+
+_umat_cache = {}
+
+
+def cached_umat(array):
+    """
+    UMat di un array a lunga vita e in sola lettura (es. griglia del RenderContext),
+    caricato una volta sola. La cache tiene il riferimento all'array: l'id non viene riusato.
+    """
+    entry = _umat_cache.get(id(array))
+    if entry is None or entry[0] is not array:
+        if len(_umat_cache) >= 8:
+            _umat_cache.clear()
+        entry = _umat_cache[id(array)] = (array, cv2.UMat(array))
+    return entry[1]
+
+
+# --- Benchmark ---
+
+def benchmark(width=1920, height=1080, frames=10):
+    """
+    Tempi per frame (ms) delle fasi UMat con i due backend su un frame di prova, e
+    differenza massima tra i risultati.
+
+    Returns:
+        list: (fase, ms numpy, ms umat, differenza max)
+    """
+    # Le fasi sono quelle del generatore, importato solo qui
+    import natisone_trip_generator as generator
+    from components.render_context import get_render_context
+    from components.settings import load_settings
+
+    settings = load_settings("config").replace(WIDTH=width, HEIGHT=height)
+    settings = generator.apply_blending_preset(settings)
+    rng = np.random.default_rng(0)
+    bg_frame = cv2.GaussianBlur(rng.integers(0, 256, (height * 3 // 4, width * 3 // 4, 3), dtype=np.uint8), (9, 9), 0)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    cv2.putText(mask, "Crystal", (width // 12, height * 2 // 3), cv2.FONT_HERSHEY_SIMPLEX, width / 260, 255,
+                thickness=max(2, width // 60), lineType=cv2.LINE_AA)
+    ctx = get_render_context(width, height)
+    # Noise della deformazione organica su griglia ridotta (come apply_organic_deformation)
+    noise_x, noise_y = (np.float32(rng.standard_normal((height // 6 + 1, width // 6 + 1)) * 0.5) for _ in range(2))
+
+    stages = [
+        ('sfondo (resize, Canny, dilatazione)',
+         lambda backend: generator._process_background(bg_frame, settings, backend=backend)),
+        ('deformazione organica (resize, remap)',
+         lambda backend: generator._organic_remap(mask, noise_x, noise_y, settings.DEFORMATION_INTENSITY, ctx,
+                                                  cv2.BORDER_CONSTANT, backend=backend)),
+        ('prodotti maschera (Canny, glow, morbida)',
+         lambda backend: generator.logo_mask_products(mask, settings, settings.ADVANCED_BLENDING, backend=backend)),
+    ]
+
+    rows = []
+    for name, stage in stages:
+        timings, results = {}, {}
+        for backend in ('numpy', 'umat'):
+            stage(backend)  # riscaldamento (compilazione dei kernel OpenCL, buffer)
+            start = time.perf_counter()
+            for _ in range(frames):
+                results[backend] = stage(backend)
+            timings[backend] = (time.perf_counter() - start) / frames * 1000
+        rows.append((name, timings['numpy'], timings['umat'], _max_difference(results['numpy'], results['umat'])))
+    return rows
+
+
+def _max_difference(a, b):
+    if isinstance(a, dict):
+        return max((_max_difference(a[key], b[key]) for key in a), default=0.0)
+    if isinstance(a, tuple):
+        return max(_max_difference(x, y) for x, y in zip(a, b))
+    if a is None:
+        return 0.0
+    return float(np.abs(download(a).astype(np.float64) - download(b).astype(np.float64)).max())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark delle fasi cv2 con array NumPy e cv2.UMat")
+    parser.add_argument('--size', default='1920x1080', help="Dimensioni del frame LARGHEZZAxALTEZZA")
+    parser.add_argument('--frames', type=int, default=10, help="Ripetizioni per fase")
+    args = parser.parse_args()
+    width, height = (int(value) for value in args.size.lower().split('x'))
+
+    rows = benchmark(width, height, args.frames)
+    device = opencl_device()
+    print(f"\n🧮 OpenCV {cv2.__version__}, OpenCL: {device or 'non disponibile (UMat usa i kernel CPU)'}, "
+          f"{cv2.getNumThreads()} thread, frame {width}x{height}")
+    print(f"   {'fase':<42} {'numpy':>9} {'umat':>9} {'diff max':>9}")
+    for name, numpy_ms, umat_ms, diff in rows:
+        print(f"   {name:<42} {numpy_ms:>7.1f}ms {umat_ms:>7.1f}ms {diff:>9.3g}")
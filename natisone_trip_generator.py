@@ -1,107 +1,120 @@
 import cv2
 import numpy as np
 import datetime
-from scipy.interpolate import splprep, splev
-from noise import pnoise2
-import multiprocessing
-from functools import partial
 import time
 import os
 import argparse
 from collections import deque
 import xml.etree.ElementTree as ET
-from svgpathtools import svg2paths2
 import re
 import subprocess
+import hashlib
 import sys
 
 # Import dei nuovi moduli
-from components.config import Config
+from components.settings import load_settings
 from components.preview import run_preview_mode
-
-# Import condizionale per PDF
-try:
-    import fitz  # PyMuPDF per PDF
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    print("⚠️ PyMuPDF non disponibile, solo modalità SVG")
+from components.texture import TextureAsset
+from components.blur import BlurPyramid, blur_halo
+from components.render_context import get_render_context
+from components.tiles import Band, align_margin, get_tile_scheduler
+from components.kernels import (apply_blend_mode, lens_field, lens_stats, plan_lenses, prepare_kernel_backend,
+                               resolve_kernel_backend)
+from components.umat import (CV_BACKENDS, cached_umat, crop, describe_cv_backend, download, resolve_cv_backend, upload,
+                             with_fallback)
+from components.pipeline import FramePipeline
+from components.progress import ProgressReporter, PROGRESS_MODES
+from components.frame_store import FrameStore
+from components.encoders import MultiEncoder, parse_output_profiles
+from components.incremental import IncrementalState
+from components.timeline import ParameterTimeline, get_parameter_timeline
+from components.automation import automated_frame_settings, load_automation
+from components.sdf import build_signed_distance, sdf_blur_ramp, sdf_coverage, sdf_edge_band, sdf_edge_ramp
+from components.contact_sheet import contact_sheet
+from components.logo import pdf_logo_contours, svg_logo_contours
+from components.precision import (COMPOSITE_PRECISIONS, TRACER_FIXED_SHIFT, apply_lut, blend_mode_lut, fixed_tracer_scalars,
+                                  glow_layer_fixed)
+
+# Le dipendenze pesanti (librosa, PyMuPDF, scipy, svgpathtools, noise, PIL) vengono
+# importate solo nei percorsi che le usano: --help, preview e render senza audio
+# partono senza pagarne l'import. `python -m components.startup` lo verifica.
+
+# PyMuPDF (PDF) e librosa (audio) verranno importati solo se necessario
+PDF_AVAILABLE = None
+AUDIO_AVAILABLE = None
 
 # CAIROSVG verrà importato solo se necessario
 CAIROSVG_AVAILABLE = None
 
-# Disabilita il warning PIL per le immagini ad alta risoluzione
-from PIL import Image
-Image.MAX_IMAGE_PIXELS = None  # Rimuove il limite di sicurezza PIL
-
-# Import per gestione audio (opzionale)
-try:
-    import librosa
-    import librosa.display
-    AUDIO_AVAILABLE = True
-    print("🎵 Librosa disponibile - Supporto audio attivato!")
-except ImportError:
-    AUDIO_AVAILABLE = False
-    print("⚠️ Librosa non disponibile. Per supporto audio: pip install librosa")
+
+def _load_fitz():
+    """Importa PyMuPDF al primo logo PDF; restituisce il modulo o None."""
+    global PDF_AVAILABLE
+    try:
+        import fitz  # PyMuPDF per PDF
+        PDF_AVAILABLE = True
+        return fitz
+    except ImportError:
+        if PDF_AVAILABLE is None:
+            print("⚠️ PyMuPDF non disponibile, solo modalità SVG")
+        PDF_AVAILABLE = False
+        return None
+
+
+def _load_librosa():
+    """Importa librosa alla prima analisi audio; restituisce il modulo o None."""
+    global AUDIO_AVAILABLE
+    try:
+        import librosa
+        if AUDIO_AVAILABLE is None:
+            print("🎵 Librosa disponibile - Supporto audio attivato!")
+        AUDIO_AVAILABLE = True
+        return librosa
+    except ImportError:
+        if AUDIO_AVAILABLE is None:
+            print("⚠️ Librosa non disponibile. Per supporto audio: pip install librosa")
+        AUDIO_AVAILABLE = False
+        return None
+
 # --- FUNZIONI DI SUPPORTO ---
 
-def get_dynamic_parameters(frame_index, total_frames):
+def get_dynamic_parameters(frame_index, total_frames, config):
     """
-    Calcola parametri che cambiano automaticamente nel tempo per creare variazioni.
+    Parametri che cambiano automaticamente nel tempo per creare variazioni.
+    
+    I valori vengono letti dalla timeline precalcolata per `config` (vedi
+    components/timeline.py): il dict restituito è condiviso, da non modificare.
     """
-    t = frame_index / total_frames  # Progresso animazione (0.0 a 1.0)
-    params = {}
+    return get_parameter_timeline(config, total_frames).params(frame_index)
 
-    # Pulsazione del glow
-    glow_pulse = np.sin(t * np.pi)
-    params['glow_intensity'] = Config.GLOW_INTENSITY + (glow_pulse * 0.2)
-
-    # Variazioni automatiche dei parametri principali
-    if Config.DYNAMIC_VARIATION_ENABLED:
-        base_seed = frame_index * 0.001
-        
-        # Variazioni lente per deformazioni organiche
-        deform_var_x = np.sin(base_seed * Config.VARIATION_SPEED_SLOW + 1.0) * Config.VARIATION_AMPLITUDE
-        deform_var_y = np.cos(base_seed * Config.VARIATION_SPEED_SLOW + 2.5) * Config.VARIATION_AMPLITUDE
-        deform_var_z = np.sin(base_seed * Config.VARIATION_SPEED_SLOW + 4.0) * Config.VARIATION_AMPLITUDE
-        
-        params['deformation_speed'] = Config.DEFORMATION_SPEED * (1.0 + deform_var_x)
-        params['deformation_scale'] = Config.DEFORMATION_SCALE * (1.0 + deform_var_y)
-        params['deformation_intensity'] = Config.DEFORMATION_INTENSITY * (1.0 + deform_var_z)
-        
-        # Variazioni medie per lenti
-        lens_var_x = np.sin(base_seed * Config.VARIATION_SPEED_MEDIUM + 3.0) * Config.VARIATION_AMPLITUDE
-        lens_var_y = np.cos(base_seed * Config.VARIATION_SPEED_MEDIUM + 5.5) * Config.VARIATION_AMPLITUDE
-        
-        params['lens_speed_factor'] = Config.LENS_SPEED_FACTOR * (1.0 + lens_var_x)
-        params['lens_strength_multiplier'] = 1.0 + lens_var_y
-        
-        # Variazioni veloci per traccianti
-        tracer_var_x = np.sin(base_seed * Config.VARIATION_SPEED_FAST + 2.0) * Config.VARIATION_AMPLITUDE
-        tracer_var_y = np.cos(base_seed * Config.VARIATION_SPEED_FAST + 6.0) * Config.VARIATION_AMPLITUDE
-        
-        params['tracer_opacity_multiplier'] = 1.0 + tracer_var_x
-        params['bg_tracer_opacity_multiplier'] = 1.0 + tracer_var_y
-    else:
-        # Usa valori fissi se le variazioni sono disabilitate
-        params['deformation_speed'] = Config.DEFORMATION_SPEED
-        params['deformation_scale'] = Config.DEFORMATION_SCALE
-        params['deformation_intensity'] = Config.DEFORMATION_INTENSITY
-        params['lens_speed_factor'] = Config.LENS_SPEED_FACTOR
-        params['lens_strength_multiplier'] = 1.0
-        params['tracer_opacity_multiplier'] = 1.0
-        params['bg_tracer_opacity_multiplier'] = 1.0
-    
-    return params
-
-def get_timestamp_filename():
+def parse_frame_range(spec, total_frames):
+    """
+    Interpreta un intervallo 'START:END' (END escluso, estremi opzionali) sui frame del video.
+    
+    Returns:
+        tuple: (start, end) con 0 <= start < end <= total_frames
+    
+    Raises:
+        ValueError: se il formato non è valido o l'intervallo è vuoto
+    """
+    if ':' not in spec:
+        raise ValueError(f"Intervallo frame '{spec}' non valido: usa START:END")
+    start_text, end_text = spec.split(':', 1)
+    start = int(start_text) if start_text.strip() else 0
+    end = int(end_text) if end_text.strip() else total_frames
+    end = min(end, total_frames)
+    if start < 0 or start >= end:
+        raise ValueError(f"Intervallo frame '{spec}' vuoto o fuori dal video (0-{total_frames - 1})")
+    return start, end
+
+def get_timestamp_filename(config):
     """Genera nome file con timestamp e carattere decorativo."""
     now = datetime.datetime.now()
     magic_chars = ['α', 'β', 'γ', 'δ', 'ε', 'ζ', 'η', 'θ', 'ι', 'κ', 'λ', 'μ', 'ν', 'ξ', 'ο', 'π', 'ρ', 'σ', 'τ', 'υ', 'φ', 'χ', 'ψ', 'ω', 'ॐ', '☯', '✨', 'Δ', 'Σ', 'Ω']
     magic_char = np.random.choice(magic_chars)
     
     # File di test vanno nella sottocartella test/
-    if Config.TEST_MODE:
+    if config.TEST_MODE:
         return f"output/test/crystalpy_{now.strftime('%Y%m%d_%H%M%S')}_TEST_{magic_char}.mp4"
     else:
         return f"output/crystalpy_{now.strftime('%Y%m%d_%H%M%S')}_{magic_char}.mp4"
@@ -114,7 +127,7 @@ class AudioSmoothingState:
         self.prev_speed = None
         self.prev_scale = None
 
-# Istanza globale per il smoothing
+# Istanza globale per il smoothing (azzerata da main a ogni render)
 _audio_smoothing_state = AudioSmoothingState()
 
 def add_audio_to_video(video_path, audio_data, duration):
@@ -222,6 +235,10 @@ def load_audio_analysis(audio_files, duration, fps=30, random_selection=True, ra
         selected_audio = existing_files[0]
         print(f"🎵 Usando audio: {selected_audio}")
     
+    librosa = _load_librosa()
+    if librosa is None:
+        return None
+    
     try:
         # Prima carica per ottenere la durata totale del file audio
         y_full, sr = librosa.load(selected_audio)
@@ -395,137 +412,140 @@ def get_organic_deformation_factors(audio_data, frame_idx, config):
     
     return dynamic_params
 
+# Preset di blending (BLENDING_PRESET, --compare-presets): parametri del blending avanzato
+# che sovrascrivono quelli del config (derivati da blending_presets.py)
+BLENDING_PRESETS = {
+    'cinematic': {
+        'BLENDING_MODE': 'overlay',
+        'BLENDING_STRENGTH': 0.7,
+        'EDGE_DETECTION_ENABLED': False,
+        'EDGE_BLUR_RADIUS': 3,
+        'ADAPTIVE_BLENDING': True,
+        'COLOR_HARMONIZATION': True,
+        'LUMINANCE_MATCHING': False,
+        'BLEND_TRANSPARENCY': 0.2,
+        'COLOR_BLENDING_STRENGTH': 0.9
+    },
+    'artistic': {
+        'BLENDING_MODE': 'difference',
+        'BLENDING_STRENGTH': 0.9,
+        'EDGE_DETECTION_ENABLED': True,
+        'EDGE_BLUR_RADIUS': 5,
+        'ADAPTIVE_BLENDING': False,
+        'COLOR_HARMONIZATION': False,
+        'LUMINANCE_MATCHING': False,
+        'BLEND_TRANSPARENCY': 0.1,
+        'COLOR_BLENDING_STRENGTH': 0.2
+    },
+    'soft': {
+        'BLENDING_MODE': 'soft_light',
+        'BLENDING_STRENGTH': 0.6,
+        'EDGE_DETECTION_ENABLED': True,
+        'EDGE_BLUR_RADIUS': 3,
+        'ADAPTIVE_BLENDING': True,
+        'COLOR_HARMONIZATION': True,
+        'LUMINANCE_MATCHING': True,
+        'BLEND_TRANSPARENCY': 0.4,
+        'COLOR_BLENDING_STRENGTH': 0.5
+    },
+    'dramatic': {
+        'BLENDING_MODE': 'multiply',
+        'BLENDING_STRENGTH': 0.85,
+        'EDGE_DETECTION_ENABLED': True,
+        'EDGE_BLUR_RADIUS': 3,
+        'ADAPTIVE_BLENDING': True,
+        'COLOR_HARMONIZATION': False,
+        'LUMINANCE_MATCHING': True,
+        'BLEND_TRANSPARENCY': 0.15,
+        'COLOR_BLENDING_STRENGTH': 0.3
+    },
+    'bright': {
+        'BLENDING_MODE': 'screen',
+        'BLENDING_STRENGTH': 0.7,
+        'EDGE_DETECTION_ENABLED': False,
+        'EDGE_BLUR_RADIUS': 5,
+        'ADAPTIVE_BLENDING': True,
+        'COLOR_HARMONIZATION': True,
+        'LUMINANCE_MATCHING': False,
+        'BLEND_TRANSPARENCY': 0.3,
+        'COLOR_BLENDING_STRENGTH': 0.4
+    },
+    'intense': {
+        'BLENDING_MODE': 'hard_light',
+        'BLENDING_STRENGTH': 0.9,
+        'EDGE_DETECTION_ENABLED': True,
+        'EDGE_BLUR_RADIUS': 3,
+        'ADAPTIVE_BLENDING': False,
+        'COLOR_HARMONIZATION': False,
+        'LUMINANCE_MATCHING': False,
+        'BLEND_TRANSPARENCY': 0.1,
+        'COLOR_BLENDING_STRENGTH': 0.25
+    },
+    'psychedelic': {
+        'BLENDING_MODE': 'exclusion',
+        'BLENDING_STRENGTH': 0.95,
+        'EDGE_DETECTION_ENABLED': True,
+        'EDGE_BLUR_RADIUS': 3,
+        'ADAPTIVE_BLENDING': False,
+        'COLOR_HARMONIZATION': False,
+        'LUMINANCE_MATCHING': False,
+        'BLEND_TRANSPARENCY': 0.05,
+        'COLOR_BLENDING_STRENGTH': 0.1
+    },
+    'glow': {
+        'BLENDING_MODE': 'color_dodge',
+        'BLENDING_STRENGTH': 0.75,
+        'EDGE_DETECTION_ENABLED': False,
+        'EDGE_BLUR_RADIUS': 3,
+        'ADAPTIVE_BLENDING': True,
+        'COLOR_HARMONIZATION': True,
+        'LUMINANCE_MATCHING': False,
+        'BLEND_TRANSPARENCY': 0.2,
+        'COLOR_BLENDING_STRENGTH': 0.35
+    },
+    'dark': {
+        'BLENDING_MODE': 'color_burn',
+        'BLENDING_STRENGTH': 0.8,
+        'EDGE_DETECTION_ENABLED': True,
+        'EDGE_BLUR_RADIUS': 3,
+        'ADAPTIVE_BLENDING': True,
+        'COLOR_HARMONIZATION': False,
+        'LUMINANCE_MATCHING': True,
+        'BLEND_TRANSPARENCY': 0.25,
+        'COLOR_BLENDING_STRENGTH': 0.4
+    },
+    'geometric': {
+        'BLENDING_MODE': 'normal',
+        'BLENDING_STRENGTH': 1.0,
+        'EDGE_DETECTION_ENABLED': True,
+        'EDGE_BLUR_RADIUS': 1,
+        'ADAPTIVE_BLENDING': False,
+        'COLOR_HARMONIZATION': False,
+        'LUMINANCE_MATCHING': False,
+        'BLEND_TRANSPARENCY': 0.0,
+        'COLOR_BLENDING_STRENGTH': 0.0
+    }
+}
+
 def apply_blending_preset(config):
     """
     🎨 Applica automaticamente i preset di blending alla configurazione.
     Se BLENDING_PRESET != 'manual', sovrascrive i parametri di blending.
+    
+    Returns:
+        RenderSettings: nuove impostazioni con il preset applicato (config non viene modificato)
     """
     if config.BLENDING_PRESET == 'manual':
         print("🔧 Usando configurazione blending manuale")
-        return
-    
-    # Definizione dei preset (importati dal file blending_presets.py)
-    presets = {
-        'cinematic': {
-            'BLENDING_MODE': 'overlay',
-            'BLENDING_STRENGTH': 0.7,
-            'EDGE_DETECTION_ENABLED': False,
-            'EDGE_BLUR_RADIUS': 3,
-            'ADAPTIVE_BLENDING': True,
-            'COLOR_HARMONIZATION': True,
-            'LUMINANCE_MATCHING': False,
-            'BLEND_TRANSPARENCY': 0.2,
-            'COLOR_BLENDING_STRENGTH': 0.9
-        },
-        'artistic': {
-            'BLENDING_MODE': 'difference',
-            'BLENDING_STRENGTH': 0.9,
-            'EDGE_DETECTION_ENABLED': True,
-            'EDGE_BLUR_RADIUS': 5,
-            'ADAPTIVE_BLENDING': False,
-            'COLOR_HARMONIZATION': False,
-            'LUMINANCE_MATCHING': False,
-            'BLEND_TRANSPARENCY': 0.1,
-            'COLOR_BLENDING_STRENGTH': 0.2
-        },
-        'soft': {
-            'BLENDING_MODE': 'soft_light',
-            'BLENDING_STRENGTH': 0.6,
-            'EDGE_DETECTION_ENABLED': True,
-            'EDGE_BLUR_RADIUS': 3,
-            'ADAPTIVE_BLENDING': True,
-            'COLOR_HARMONIZATION': True,
-            'LUMINANCE_MATCHING': True,
-            'BLEND_TRANSPARENCY': 0.4,
-            'COLOR_BLENDING_STRENGTH': 0.5
-        },
-        'dramatic': {
-            'BLENDING_MODE': 'multiply',
-            'BLENDING_STRENGTH': 0.85,
-            'EDGE_DETECTION_ENABLED': True,
-            'EDGE_BLUR_RADIUS': 3,
-            'ADAPTIVE_BLENDING': True,
-            'COLOR_HARMONIZATION': False,
-            'LUMINANCE_MATCHING': True,
-            'BLEND_TRANSPARENCY': 0.15,
-            'COLOR_BLENDING_STRENGTH': 0.3
-        },
-        'bright': {
-            'BLENDING_MODE': 'screen',
-            'BLENDING_STRENGTH': 0.7,
-            'EDGE_DETECTION_ENABLED': False,
-            'EDGE_BLUR_RADIUS': 5,
-            'ADAPTIVE_BLENDING': True,
-            'COLOR_HARMONIZATION': True,
-            'LUMINANCE_MATCHING': False,
-            'BLEND_TRANSPARENCY': 0.3,
-            'COLOR_BLENDING_STRENGTH': 0.4
-        },
-        'intense': {
-            'BLENDING_MODE': 'hard_light',
-            'BLENDING_STRENGTH': 0.9,
-            'EDGE_DETECTION_ENABLED': True,
-            'EDGE_BLUR_RADIUS': 3,
-            'ADAPTIVE_BLENDING': False,
-            'COLOR_HARMONIZATION': False,
-            'LUMINANCE_MATCHING': False,
-            'BLEND_TRANSPARENCY': 0.1,
-            'COLOR_BLENDING_STRENGTH': 0.25
-        },
-        'psychedelic': {
-            'BLENDING_MODE': 'exclusion',
-            'BLENDING_STRENGTH': 0.95,
-            'EDGE_DETECTION_ENABLED': True,
-            'EDGE_BLUR_RADIUS': 3,
-            'ADAPTIVE_BLENDING': False,
-            'COLOR_HARMONIZATION': False,
-            'LUMINANCE_MATCHING': False,
-            'BLEND_TRANSPARENCY': 0.05,
-            'COLOR_BLENDING_STRENGTH': 0.1
-        },
-        'glow': {
-            'BLENDING_MODE': 'color_dodge',
-            'BLENDING_STRENGTH': 0.75,
-            'EDGE_DETECTION_ENABLED': False,
-            'EDGE_BLUR_RADIUS': 3,
-            'ADAPTIVE_BLENDING': True,
-            'COLOR_HARMONIZATION': True,
-            'LUMINANCE_MATCHING': False,
-            'BLEND_TRANSPARENCY': 0.2,
-            'COLOR_BLENDING_STRENGTH': 0.35
-        },
-        'dark': {
-            'BLENDING_MODE': 'color_burn',
-            'BLENDING_STRENGTH': 0.8,
-            'EDGE_DETECTION_ENABLED': True,
-            'EDGE_BLUR_RADIUS': 3,
-            'ADAPTIVE_BLENDING': True,
-            'COLOR_HARMONIZATION': False,
-            'LUMINANCE_MATCHING': True,
-            'BLEND_TRANSPARENCY': 0.25,
-            'COLOR_BLENDING_STRENGTH': 0.4
-        },
-        'geometric': {
-            'BLENDING_MODE': 'normal',
-            'BLENDING_STRENGTH': 1.0,
-            'EDGE_DETECTION_ENABLED': True,
-            'EDGE_BLUR_RADIUS': 1,
-            'ADAPTIVE_BLENDING': False,
-            'COLOR_HARMONIZATION': False,
-            'LUMINANCE_MATCHING': False,
-            'BLEND_TRANSPARENCY': 0.0,
-            'COLOR_BLENDING_STRENGTH': 0.0
-        }
-    }
+        return config
     
     preset_name = config.BLENDING_PRESET.lower()
-    if preset_name in presets:
-        preset = presets[preset_name]
+    if preset_name in BLENDING_PRESETS:
+        preset = BLENDING_PRESETS[preset_name]
         print(f"🎨 Applicando preset blending: {preset_name.upper()}")
         
         # Applica tutti i parametri del preset alla configurazione
-        for param_name, param_value in preset.items():
-            setattr(config, param_name, param_value)
+        config = config.replace(**preset)
             
         # Mostra i parametri applicati
         print(f"   ✓ Modalità: {preset['BLENDING_MODE']}")
@@ -540,125 +560,78 @@ def apply_blending_preset(config):
         print("   🎬 cinematic, 🌟 artistic, 🌙 soft, ⚡ dramatic, ✨ bright")
         print("   🔥 intense, 🌈 psychedelic, 💡 glow, 🖤 dark, 📐 geometric")
         print("   🔧 Usando configurazione manuale...")
+    
+    return config
+
+def parse_preset_names(spec):
+    """
+    Preset da confrontare (--compare-presets): 'all' o nomi separati da virgola.
+
+    Raises:
+        ValueError: Se un nome non è in BLENDING_PRESETS
+    """
+    if spec.strip().lower() == 'all':
+        return list(BLENDING_PRESETS)
+    names = [name.strip().lower() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in BLENDING_PRESETS]
+    if unknown or not names:
+        raise ValueError(f"Preset sconosciuti: {', '.join(unknown) or spec} (disponibili: {', '.join(BLENDING_PRESETS)})")
+    return names
+
+def preset_variants(config, preset_names):
+    """Impostazioni da confrontare: il blending del config seguito da ogni preset (per composite_frame)."""
+    return [config] + [config.replace(**BLENDING_PRESETS[name]) for name in preset_names]
+
+# Texture già decodificate e ridimensionate: in un processo lungo (daemon, restart della
+# preview) lo stesso file non viene riletto finché non cambia
+_texture_cache = {}
 
 def load_texture(texture_path, width, height):
     """Carica e ridimensiona immagine di texture."""
     if not os.path.exists(texture_path):
         print(f"ATTENZIONE: File texture non trovato in '{texture_path}'. Il logo non verrà texturizzato.")
         return None
+    key = (os.path.abspath(texture_path), os.path.getmtime(texture_path), width, height)
+    cached = _texture_cache.get(key)
+    if cached is not None:
+        print("♻️ Texture già in memoria, nessuna rilettura")
+        return cached
     try:
         print("Analisi texture fornita da TV Int dalle acque del Natisone... completata.")
         print("Texture infusa con l'essenza digitale del team creativo.")
         texture = cv2.imread(texture_path, cv2.IMREAD_COLOR)
         if texture is None:
             raise Exception("cv2.imread ha restituito None.")
-        # Ridimensiona la texture per adattarla al frame
-        return cv2.resize(texture, (width, height), interpolation=cv2.INTER_LINEAR)
+        # Ridimensiona la texture una sola volta: float e termini di blending restano in cache
+        asset = TextureAsset(cv2.resize(texture, (width, height), interpolation=cv2.INTER_LINEAR))
+        if len(_texture_cache) >= 4:
+            _texture_cache.clear()
+        _texture_cache[key] = asset
+        return asset
     except Exception as e:
         print(f"Errore durante il caricamento della texture: {e}")
         return None
 
-def apply_texture_blending(base_image, texture_image, alpha, blending_mode='overlay', mask=None):
+def apply_texture_blending(base_image, texture_image, alpha, blending_mode='overlay', mask=None, precision='float32'):
     """
     Applica texture su un'immagine con diversi modalità di blending.
     
     Args:
         base_image: Immagine base (BGR)
-        texture_image: Texture da applicare (BGR)
+        texture_image: Texture da applicare (TextureAsset o array BGR)
         alpha: Opacità texture (0.0-1.0)
         blending_mode: Modalità blending ('normal', 'overlay', 'multiply', 'screen',
                       'soft_light', 'hard_light', 'color_dodge', 'color_burn', 
                       'darken', 'lighten', 'difference', 'exclusion')
         mask: Maschera opzionale per limitare l'applicazione
+        precision: COMPOSITE_PRECISION ('float32' o 'fixed', tabella a 8 bit)
     """
     if texture_image is None or alpha <= 0:
         return base_image.copy()
     
-    # Converti in float32 per calcoli precisi
-    base_float = base_image.astype(np.float32) / 255.0
-    texture_float = texture_image.astype(np.float32) / 255.0
-    
-    # Applica blending mode
-    if blending_mode == 'normal':
-        # Normal: sovrapposizione diretta
-        blended = texture_float
-    
-    elif blending_mode == 'overlay':
-        # Overlay: moltiplica se base < 0.5, altrimenti screen
-        condition = base_float < 0.5
-        blended = np.where(condition, 
-                          2 * base_float * texture_float,
-                          1 - 2 * (1 - base_float) * (1 - texture_float))
-    
-    elif blending_mode == 'multiply':
-        # Multiply: moltiplica i valori
-        blended = base_float * texture_float
-    
-    elif blending_mode == 'screen':
-        # Screen: inverso del multiply
-        blended = 1 - (1 - base_float) * (1 - texture_float)
-    
-    elif blending_mode == 'soft_light':
-        # Soft Light: versione più morbida di overlay
-        condition = texture_float <= 0.5
-        blended = np.where(condition,
-                          base_float - (1 - 2 * texture_float) * base_float * (1 - base_float),
-                          base_float + (2 * texture_float - 1) * (np.sqrt(base_float) - base_float))
-    
-    elif blending_mode == 'hard_light':
-        # Hard Light: overlay invertito
-        condition = texture_float < 0.5
-        blended = np.where(condition,
-                          2 * base_float * texture_float,
-                          1 - 2 * (1 - base_float) * (1 - texture_float))
-    
-    elif blending_mode == 'color_dodge':
-        # Color Dodge: schiarisce drasticamente
-        blended = np.where(texture_float >= 1.0, 
-                          1.0, 
-                          np.minimum(1.0, base_float / (1.0 - texture_float + 1e-10)))
-    
-    elif blending_mode == 'color_burn':
-        # Color Burn: scurisce drasticamente
-        blended = np.where(texture_float <= 0.0,
-                          0.0,
-                          1.0 - np.minimum(1.0, (1.0 - base_float) / (texture_float + 1e-10)))
-    
-    elif blending_mode == 'darken':
-        # Darken: prende il più scuro
-        blended = np.minimum(base_float, texture_float)
-    
-    elif blending_mode == 'lighten':
-        # Lighten: prende il più chiaro
-        blended = np.maximum(base_float, texture_float)
-    
-    elif blending_mode == 'difference':
-        # Difference: differenza assoluta
-        blended = np.abs(base_float - texture_float)
-    
-    elif blending_mode == 'exclusion':
-        # Exclusion: simile a difference ma più morbido
-        blended = base_float + texture_float - 2 * base_float * texture_float
-    
-    else:
-        # Default overlay
-        condition = base_float < 0.5
-        blended = np.where(condition, 
-                          2 * base_float * texture_float,
-                          1 - 2 * (1 - base_float) * (1 - texture_float))
-    
-    # Miscela con alpha
-    result = base_float * (1 - alpha) + blended * alpha
-    
-    # Applica maschera se fornita
-    if mask is not None:
-        mask_norm = mask.astype(np.float32) / 255.0
-        if len(mask_norm.shape) == 2:
-            mask_norm = cv2.cvtColor(mask_norm, cv2.COLOR_GRAY2BGR)
-        result = base_float * (1 - mask_norm) + result * mask_norm
-    
-    # Converti back a uint8
-    return np.clip(result * 255, 0, 255).astype(np.uint8)
+    # I termini della texture (float normalizzato, 1-t, 2t...) restano in cache nell'asset
+    texture = TextureAsset.from_array(texture_image)
+    return texture.blend(base_image, alpha, blending_mode, mask, precision)
 
 def get_svg_dimensions(svg_path):
     """Estrae dimensioni da file SVG."""
@@ -691,371 +664,46 @@ def get_svg_dimensions(svg_path):
         print(f"⚠️ Errore lettura dimensioni SVG: {e}")
         return 1920, 1080  # Fallback
 
-def extract_contours_from_svg(svg_path, width, height, padding, left_padding=0, logo_zoom_factor=1.0):
+def extract_contours_from_svg(svg_path, width, height, padding, left_padding=0, logo_zoom_factor=1.0, oversample=4.0):
     """
-    Estrae SOLO I CONTORNI/BORDI da un file SVG, senza riempimento.
-    Utilizza rasterizzazione + edge detection per ottenere linee precise.
+    Estrae SOLO I CONTORNI/BORDI da un file SVG, senza riempimento (components/logo.py).
     
     Args:
         left_padding: Padding aggiuntivo dal lato sinistro per SVG
         logo_zoom_factor: Fattore di zoom del logo (1.0=normale, 2.0=doppio, 0.5=metà)
+        oversample: Pixel del raster per pixel del logo nel video (LOGO_RASTER_OVERSAMPLE)
     """
     try:
         print("🎨 Caricamento SVG Crystal Therapy dalle acque del Natisone...")
-        
-        # Prima prova il metodo con PIL (più compatibile)
-        try:
-            from PIL import Image as PILImage, ImageDraw
-            import xml.etree.ElementTree as ET
-            
-            # Leggi l'SVG e ottieni le dimensioni
-            tree = ET.parse(svg_path)
-            root = tree.getroot()
-            svg_width = float(root.get('width', 100))
-            svg_height = float(root.get('height', 100))
-            
-            # Scala per rendering ad alta risoluzione
-            scale_factor = 4
-            render_width = int(svg_width * scale_factor)
-            render_height = int(svg_height * scale_factor)
-            
-            # Crea un'immagine bianca
-            pil_img = PILImage.new('RGB', (render_width, render_height), 'white')
-            draw = ImageDraw.Draw(pil_img)
-            
-            # Disegna solo i bordi del testo (non il riempimento)
-            # Questo approccio è limitato ma più compatibile
-            print("⚠️ Usando metodo semplificato - potrebbero includere riempimenti")
-            return extract_contours_from_svg_fallback(svg_path, width, height, padding, left_padding, logo_zoom_factor)
-            
-        except:
-            # Fallback al metodo cairosvg se PIL non funziona
-            import cairosvg
-            import io
-            from PIL import Image as PILImage
-        
-        # Rasterizza SVG ad alta risoluzione per preservare i dettagli
-        scale_factor = 4  # Alta risoluzione per migliore edge detection
-        render_width = width * scale_factor
-        render_height = height * scale_factor
-        
-        # Converti SVG in PNG ad alta risoluzione
-        png_data = cairosvg.svg2png(
-            url=svg_path,
-            output_width=render_width,
-            output_height=render_height
-        )
-        
-        # Carica l'immagine
-        pil_image = PILImage.open(io.BytesIO(png_data))
-        img_array = np.array(pil_image)
-        
-        # Converti RGBA in RGB se necessario
-        if img_array.shape[2] == 4:
-            # Rimuovi il canale alpha, assume sfondo bianco
-            img_rgb = img_array[:,:,:3]
-            alpha = img_array[:,:,3] / 255.0
-            img_rgb = img_rgb * alpha[:,:,np.newaxis] + 255 * (1 - alpha[:,:,np.newaxis])
-            img_array = img_rgb.astype(np.uint8)
-        
-        # Converti in BGR per OpenCV
-        img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-        
-        # Converti in scala di grigi
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-        
-        # EDGE DETECTION per ottenere SOLO i contorni/bordi
-        # Applica filtro Gaussiano per ridurre il rumore
-        blurred = cv2.GaussianBlur(gray, (3, 3), 0)
-        
-        # Usa Canny edge detection per ottenere solo i bordi
-        edges = cv2.Canny(blurred, 50, 150, apertureSize=3)
-        
-        # Dilata leggermente i bordi per assicurarsi che siano connessi
-        kernel = np.ones((2, 2), np.uint8)
-        edges = cv2.dilate(edges, kernel, iterations=1)
-        
-        # Trova i contorni dei bordi
-        contours, hierarchy = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if not contours:
-            raise Exception("Nessun contorno trovato nell'SVG.")
-        
-        print(f"📝 Trovati {len(contours)} contorni di bordi...")
-        
-        # Filtra e processa i contorni
-        processed_contours = []
-        for i, contour in enumerate(contours):
-            area = cv2.contourArea(contour)
-            # Filtra contorni troppo piccoli (rumore)
-            if area > 100:  # Area minima per essere considerato valido
-                # Scala il contorno alla risoluzione target
-                scaled_contour = contour.astype(np.float32) / scale_factor
-                processed_contours.append(scaled_contour.astype(np.int32))
-                print(f"  ✓ Contorno {i+1}: {len(contour)} punti, area: {area/scale_factor/scale_factor:.1f}")
-        
-        if not processed_contours:
-            raise Exception("Nessun contorno valido trovato dopo il filtraggio.")
-        
-        print(f"📐 Estratti {len(processed_contours)} contorni di BORDI (no riempimento)")
-        print("Estrazione contorni da SVG completata.")
-        return processed_contours, None
-        
-    except Exception as e:
-        print(f"Errore durante l'estrazione dall'SVG: {e}")
-        print("Tentativo fallback al metodo originale...")
-        return extract_contours_from_svg_fallback(svg_path, width, height, padding, left_padding, logo_zoom_factor)
-
-def extract_contours_from_svg_fallback(svg_path, width, height, padding, left_padding=0, logo_zoom_factor=1.0):
-    """
-    Metodo per l'estrazione SVG con OPZIONE per SOLO CONTORNI senza riempimento.
-    
-    Args:
-        left_padding: Padding aggiuntivo dal lato sinistro per SVG
-        logo_zoom_factor: Fattore di zoom del logo (1.0=normale, 2.0=doppio, 0.5=metà)
-    """
-    try:
-        print("🔄 Usando estrazione migliorata per SOLI CONTORNI...")
-        
-        # Carica il file SVG
-        paths, attributes, svg_attributes = svg2paths2(svg_path)
-        
-        if not paths:
-            raise Exception("Nessun path trovato nel file SVG.")
-        
-        # Converti i path SVG in punti
-        all_contours = []
-        
-        print(f"📝 Processando {len(paths)} path SVG per CONTORNI ESTERNI...")
-        
-        for i, path in enumerate(paths):
-            # Discretizza il path in punti
-            path_length = path.length()
-            if path_length == 0:
-                continue
-                
-            # Adatta il numero di punti alla complessità del path
-            num_points = max(100, min(1000, int(path_length * 3)))  # Più punti per maggiore precisione
-                
-            points = []
-            for j in range(num_points):
-                t = j / (num_points - 1)
-                try:
-                    point = path.point(t)
-                    # Verifica che il punto sia valido
-                    if not (np.isnan(point.real) or np.isnan(point.imag)):
-                        points.append([point.real, point.imag])
-                except:
-                    continue
-            
-            # Aggiungi contorno solo se ha abbastanza punti validi
-            if len(points) > 10:
-                contour = np.array(points, dtype=np.float32)
-                
-                # Verifica che il contour non sia degenere
-                area = cv2.contourArea(contour)
-                if area > 10:
-                    all_contours.append(contour)
-                    print(f"  ✓ Path {i+1}: {len(points)} punti, area: {area:.1f}")
-        
-        if not all_contours:
-            raise Exception("Nessun contorno valido estratto dall'SVG.")
-        
-        print(f"📐 Trovati {len(all_contours)} path originali")
-        
-        # NUOVA LOGICA: Estrai solo i contorni ESTERNI (bordi) senza riempimento
-        processed_contours = []
-        
-        # Calcola bounding box di tutti i contorni
-        all_points = np.vstack(all_contours)
-        x_min, y_min = np.min(all_points, axis=0)
-        x_max, y_max = np.max(all_points, axis=0)
-        
-        svg_width = x_max - x_min
-        svg_height = y_max - y_min
-        
-        if svg_width == 0 or svg_height == 0:
-            raise Exception("SVG ha dimensioni zero.")
-        
-        # Crea un'immagine per il rendering ad alta risoluzione
-        scale_factor = 4
-        render_width = int(svg_width * scale_factor) + 100
-        render_height = int(svg_height * scale_factor) + 100
-        
-        # Crea maschera binaria
-        mask = np.zeros((render_height, render_width), dtype=np.uint8)
-        
-        # Disegna tutti i path come forme piene
-        for contour in all_contours:
-            # Trasla e scala per il rendering
-            scaled_contour = (contour - np.array([x_min, y_min])) * scale_factor + 50
-            scaled_contour = scaled_contour.astype(np.int32)
-            cv2.fillPoly(mask, [scaled_contour], 255)
-        
-        # ESTRAI SOLO I BORDI usando operazioni morfologiche AGGRESSIVE
-        # Usa erosion più forte per ottenere solo i bordi sottili
-        kernel = np.ones((5,5), np.uint8)  # Kernel più grande per erosione più forte
-        eroded = cv2.erode(mask, kernel, iterations=2)  # Più iterazioni
-        
-        # Sottrai l'interno dall'originale per ottenere solo i bordi
-        edges = mask - eroded
-        
-        # Applica scheletonizzazione per ottenere linee sottili
-        from skimage.morphology import skeletonize
-        skeleton = skeletonize(edges > 0)
-        edges = (skeleton * 255).astype(np.uint8)
-        
-        # Trova i contorni dei bordi
-        contours, hierarchy = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        print(f"🔍 Estratti {len(contours)} contorni di BORDI usando erosione morfologica")
-        
-        # Filtra e scala i contorni alla risoluzione target
-        target_w = width - (2 * padding)
-        target_h = height - (2 * padding)
-        base_scale = min(target_w / svg_width, target_h / svg_height)
-        scale = base_scale * logo_zoom_factor  # Applica zoom del logo
-        
-        # Calcola offset per centrare con padding sinistro aggiuntivo
-        scaled_w = svg_width * scale
-        scaled_h = svg_height * scale
-        offset_x = (width - scaled_w) / 2 + left_padding  # Aggiungi padding sinistro
-        offset_y = (height - scaled_h) / 2
-        
-        if left_padding > 0:
-            print(f"📐 SVG con padding sinistro: {left_padding}px (offset_x: {offset_x:.1f})")
-        if logo_zoom_factor != 1.0:
-            print(f"🔍 Logo zoom attivo: {logo_zoom_factor}x (scala finale: {scale:.2f})")
-        
-        for i, contour in enumerate(contours):
-            area = cv2.contourArea(contour)
-            # Filtra contorni troppo piccoli
-            if area > 500:  # Area minima per essere considerato un bordo significativo
-                # Scala alla risoluzione target
-                scaled_contour = contour.astype(np.float32) / scale_factor  # Riporta alle coordinate originali
-                scaled_contour = (scaled_contour - 50) * scale  # Scala alla risoluzione target
-                scaled_contour = scaled_contour + np.array([offset_x, offset_y])  # Centra
-                
-                processed_contours.append(scaled_contour.astype(np.int32))
-                print(f"  ✓ Bordo {i+1}: {len(contour)} punti, area finale: {cv2.contourArea(scaled_contour.astype(np.int32)):.1f}")
-        
-        if not processed_contours:
-            print("⚠️ Nessun bordo trovato, uso i path originali...")
-            # Fallback ai path originali se la tecnica dei bordi non funziona
-            processed_contours = []
-            for contour in all_contours:
-                scaled_contour = contour.copy()
-                scaled_contour[:, 0] = (contour[:, 0] - x_min) * scale + offset_x
-                scaled_contour[:, 1] = (contour[:, 1] - y_min) * scale + offset_y
-                processed_contours.append(scaled_contour.astype(np.int32))
-        
-        print(f"📐 Risultato finale: {len(processed_contours)} contorni processati")
+        contours, hierarchy = svg_logo_contours(svg_path, width, height, padding, left_padding, logo_zoom_factor, oversample)
+        print(f"📐 Risultato finale: {len(contours)} contorni processati")
         print("Estrazione contorni da SVG completata.")
-        return processed_contours, None
-        
+        return contours, hierarchy
     except Exception as e:
         print(f"Errore durante l'estrazione dall'SVG: {e}")
         print("Assicurati che 'svgpathtools' sia installato: pip install svgpathtools")
         return None, None
 
-def extract_contours_from_pdf(pdf_path, width, height, padding, logo_zoom_factor=1.0):
+def extract_contours_from_pdf(pdf_path, width, height, padding, logo_zoom_factor=1.0, oversample=4.0):
     """
-    Estrae i contorni da un file PDF usando il metodo corretto di simple_logo_video.py.
-    Questo approccio gestisce correttamente i buchi nelle lettere e i contorni esterni.
+    Estrae i contorni da un file PDF con gestione dei buchi nelle lettere (components/logo.py,
+    lo stesso caricamento di simple_logo_video.py).
     
     Args:
         logo_zoom_factor: Fattore di zoom del logo (1.0=normale, 2.0=doppio, 0.5=metà)
+        oversample: Pixel del raster per pixel del logo nel video (LOGO_RASTER_OVERSAMPLE)
     """
-    if not PDF_AVAILABLE:
+    if _load_fitz() is None:
         raise Exception("PyMuPDF non disponibile. Installa con: pip install PyMuPDF")
     
     try:
         print("🎨 Caricamento PDF Crystal Therapy dalle acque del Natisone...")
-        
-        # STEP 1: Rasterizza il PDF usando il metodo di simple_logo_video.py
-        doc = fitz.open(pdf_path)
-        page = doc[0]  # Prima pagina
-        
-        # Usa scale factor 4 per alta qualità (come simple_logo_video.py usa scale=2)
-        scale_factor = 4
-        matrix = fitz.Matrix(scale_factor, scale_factor)
-        pix = page.get_pixmap(matrix=matrix)
-        
-        # Converti in array numpy (metodo simple_logo_video.py)
-        img_array = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
-        
-        doc.close()
-        
-        # STEP 2: Estrai contorni usando il metodo corretto di simple_logo_video.py
-        # Converti in BGR se necessario
-        if len(img_array.shape) == 3 and img_array.shape[2] == 4:
-            # RGBA to BGR
-            img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGBA2BGR)
-        elif len(img_array.shape) == 3 and img_array.shape[2] == 3:
-            # RGB to BGR
-            img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-        else:
-            # Grayscale to BGR
-            img_bgr = cv2.cvtColor(img_array, cv2.COLOR_GRAY2BGR)
-        
-        # Converti in scala di grigi
-        gray_img = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-        
-        # CRUCIALE: Usa THRESH_BINARY_INV come in simple_logo_video.py
-        # Questo inverte i colori: nero su bianco diventa bianco su nero
-        _, binary_img = cv2.threshold(gray_img, 50, 255, cv2.THRESH_BINARY_INV)
-        
-        # CRUCIALE: Usa RETR_CCOMP per gestire i buchi nelle lettere
-        contours, hierarchy = cv2.findContours(binary_img, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if not contours:
-            raise Exception("Nessun contorno trovato nel PDF.")
-        
-        print(f"📝 Estratti {len(contours)} contorni dal PDF con gestione buchi")
-        
-        # STEP 3: Centra e ridimensiona i contorni (adattato da simple_logo_video.py)
-        if not contours:
-            raise Exception("Nessun contorno valido trovato nel PDF.")
-        
-        # Calcola bounding box di tutti i contorni
-        all_points = np.vstack([c for c in contours])
-        x, y, w, h = cv2.boundingRect(all_points)
-        
-        # Trova centro dei contorni e del canvas target
-        contour_center_x = x + w / 2
-        contour_center_y = y + h / 2
-        canvas_center_x = width / 2
-        canvas_center_y = height / 2
-        
-        # Calcola area utilizzabile (con padding)
         padding_fraction = (padding * 2) / min(width, height)  # Converti padding in frazione
-        canvas_drawable_width = width * (1 - padding_fraction)
-        canvas_drawable_height = height * (1 - padding_fraction)
-        
-        # Calcola scala per adattare al canvas con zoom del logo
-        base_scale = min(canvas_drawable_width / w if w > 0 else 1, 
-                        canvas_drawable_height / h if h > 0 else 1)
-        scale = base_scale * logo_zoom_factor  # Applica zoom del logo
-        
+        contours, hierarchy = pdf_logo_contours(pdf_path, width, height, padding_fraction, logo_zoom_factor, oversample)
         if logo_zoom_factor != 1.0:
-            print(f"🔍 Logo PDF zoom attivo: {logo_zoom_factor}x (scala finale: {scale:.2f})")
-        
-        # Trasforma tutti i contorni
-        scaled_contours = []
-        for contour in contours:
-            # Converti in float per calcoli precisi
-            c_float = contour.astype(np.float32)
-            # Trasla al centro e scala (con zoom applicato)
-            c_float[:, 0, 0] = (c_float[:, 0, 0] - contour_center_x) * scale + canvas_center_x
-            c_float[:, 0, 1] = (c_float[:, 0, 1] - contour_center_y) * scale + canvas_center_y
-            # Riconverti in int32
-            scaled_contours.append(c_float.astype(np.int32))
-        
-        print(f"📐 Logo PDF centrato e ridimensionato ({len(scaled_contours)} contorni)")
-        print("Estrazione contorni da PDF completata con metodo simple_logo_video.py.")
-        
-        return scaled_contours, hierarchy
-        
+            print(f"🔍 Logo PDF zoom attivo: {logo_zoom_factor}x")
+        print(f"📐 Logo PDF centrato e ridimensionato ({len(contours)} contorni)")
+        return contours, hierarchy
     except Exception as e:
         print(f"❌ Errore nell'estrazione contorni da PDF: {e}")
         raise
@@ -1063,6 +711,7 @@ def extract_contours_from_pdf(pdf_path, width, height, padding, logo_zoom_factor
 def smooth_contour(contour, smoothing_factor):
     """Applica lo smussamento spline a un singolo contorno."""
     if len(contour) < 4: return contour
+    from scipy.interpolate import splprep, splev
     try:
         contour = contour.squeeze().astype(float)
         epsilon = smoothing_factor * cv2.arcLength(contour, True)
@@ -1076,8 +725,92 @@ def smooth_contour(contour, smoothing_factor):
     except Exception:
         return contour.astype(np.int32)
 
+# Maschere unificate già calcolate: i contorni del logo non cambiano tra i frame
+_unified_mask_cache = {}
+
 def create_unified_mask(contours, hierarchy, width, height, smoothing_enabled, smoothing_factor):
-    """Crea una maschera unificata con algoritmo avanzato per eliminare spaccature SVG."""
+    """
+    Crea una maschera unificata con algoritmo avanzato per eliminare spaccature SVG.
+    
+    Il risultato dipende solo dai contorni e dai parametri, quindi viene calcolato una
+    volta e riusato per tutti i frame (array in sola lettura).
+    """
+    digest = hashlib.sha1()
+    for contour in contours or []:
+        digest.update(np.ascontiguousarray(contour).tobytes())
+        digest.update(b'|')
+    if hierarchy is not None:
+        digest.update(np.ascontiguousarray(hierarchy).tobytes())
+    key = (digest.hexdigest(), hierarchy is None, width, height, smoothing_enabled, smoothing_factor)
+    
+    mask = _unified_mask_cache.get(key)
+    if mask is None:
+        mask = _build_unified_mask(contours, hierarchy, width, height, smoothing_enabled, smoothing_factor)
+        mask.flags.writeable = False
+        if len(_unified_mask_cache) >= 8:
+            _unified_mask_cache.clear()
+        _unified_mask_cache[key] = mask
+    return mask
+
+# Maschere di copertura del logo (LOGO_MASK_MODE='coverage'), una per maschera unificata e ingrandimento
+_logo_coverage_cache = {}
+
+def build_coverage_mask(mask, supersample=4):
+    """
+    Maschera di copertura a 8 bit: frazione di ogni pixel coperta dal logo, calcolata su
+    un raster ingrandito (interpolazione bilineare e soglia) e riportata alla risoluzione
+    del video con la media dei sotto-pixel. Bordi anti-aliased senza sfocature per frame.
+    """
+    supersample = max(1, int(supersample))
+    if supersample == 1:
+        return mask.copy()
+    height, width = mask.shape[:2]
+    raster = cv2.resize(mask, (width * supersample, height * supersample), interpolation=cv2.INTER_LINEAR)
+    _, raster = cv2.threshold(raster, 127, 255, cv2.THRESH_BINARY)
+    return cv2.resize(raster, (width, height), interpolation=cv2.INTER_AREA)
+
+def get_logo_coverage(contours, hierarchy, width, height, config):
+    """
+    Maschera di copertura del logo (build_coverage_mask), calcolata una volta per logo.
+    
+    La pulizia topologica di create_unified_mask (chiusure, buchi, spaccature) resta
+    binaria; la copertura si ricava una sola volta dalla maschera pulita.
+    """
+    mask = create_unified_mask(contours, hierarchy, width, height, config.SMOOTHING_ENABLED, config.SMOOTHING_FACTOR)
+    key = (id(mask), config.LOGO_COVERAGE_SUPERSAMPLE)
+    entry = _logo_coverage_cache.get(key)
+    if entry is None or entry[0] is not mask:
+        coverage = build_coverage_mask(mask, config.LOGO_COVERAGE_SUPERSAMPLE)
+        coverage.flags.writeable = False
+        if len(_logo_coverage_cache) >= 8:
+            _logo_coverage_cache.clear()
+        entry = _logo_coverage_cache[key] = (mask, coverage)
+    return entry[1]
+
+# Campi di distanza del logo (LOGO_SDF_ENABLED), uno per maschera unificata e fattore di ingrandimento
+_logo_sdf_cache = {}
+
+def get_logo_sdf(contours, hierarchy, width, height, config):
+    """
+    Campo di distanza con segno del logo (components/sdf.py), calcolato una volta per logo.
+    
+    Returns:
+        np.ndarray: float32 in sola lettura, distanza dal bordo in pixel (> 0 dentro il logo)
+    """
+    mask = create_unified_mask(contours, hierarchy, width, height, config.SMOOTHING_ENABLED, config.SMOOTHING_FACTOR)
+    key = (id(mask), config.LOGO_SDF_SUPERSAMPLE)
+    entry = _logo_sdf_cache.get(key)
+    # La maschera in cache tiene vivo l'oggetto: l'id non può essere riusato
+    if entry is None or entry[0] is not mask:
+        sdf = build_signed_distance(mask, config.LOGO_SDF_SUPERSAMPLE)
+        sdf.flags.writeable = False
+        if len(_logo_sdf_cache) >= 8:
+            _logo_sdf_cache.clear()
+        entry = _logo_sdf_cache[key] = (mask, sdf)
+    return entry[1]
+
+def _build_unified_mask(contours, hierarchy, width, height, smoothing_enabled, smoothing_factor):
+    """Costruisce la maschera unificata (vedi create_unified_mask)."""
     mask = np.zeros((height, width), dtype=np.uint8)
     
     if not contours:
@@ -1193,73 +926,52 @@ def create_gap_free_mask(contours, width, height):
         return base_mask
     
     # FASE 3: Trova le componenti principali (esclude background)
-    main_components = []
     min_area = (width * height) * 0.001  # Soglia minima 0.1% dell'area totale
+    main_labels = [i for i in range(1, num_labels) if stats[i, cv2.CC_STAT_AREA] > min_area]  # Salta il background (0)
     
-    for i in range(1, num_labels):  # Salta il background (0)
-        area = stats[i, cv2.CC_STAT_AREA]
-        if area > min_area:
-            component_mask = (labels == i).astype(np.uint8) * 255
-            main_components.append(component_mask)
-    
-    if len(main_components) <= 1:
+    if len(main_labels) <= 1:
         return base_mask
     
-    # FASE 4: Calcola i centroidi delle componenti principali
-    component_centroids = []
-    for component in main_components:
-        moments = cv2.moments(component)
-        if moments['m00'] > 0:
-            cx = int(moments['m10'] / moments['m00'])
-            cy = int(moments['m01'] / moments['m00'])
-            component_centroids.append((cx, cy))
-    
-    # FASE 5: Trova coppie di componenti che dovrebbero essere connesse
-    # Usa distanza euclidea e vicinanza per identificare lettere che si toccano
-    connections_needed = []
+    from scipy.spatial import cKDTree
+    from scipy.sparse.csgraph import minimum_spanning_tree
+    
+    # FASE 4: Punti di bordo di ogni componente, indicizzati con un KD-tree
+    boundary_points = []
+    for label in main_labels:
+        x, y, w, h = stats[label, :4]
+        component = (labels[y:y + h, x:x + w] == label).astype(np.uint8)
+        component_contours, _ = cv2.findContours(component, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
+        points = np.concatenate([c.reshape(-1, 2) for c in component_contours]) + (x, y)
+        boundary_points.append(points)
+    trees = [cKDTree(points) for points in boundary_points]
+    
+    # FASE 5: Distanza minima bordo-bordo tra ogni coppia di componenti
+    n = len(main_labels)
+    distances = np.zeros((n, n))
+    closest = {}
+    for i in range(n):
+        for j in range(i + 1, n):
+            # Interroga l'albero della componente più grande con i punti della più piccola
+            small, large = (i, j) if len(boundary_points[i]) <= len(boundary_points[j]) else (j, i)
+            dist, idx = trees[large].query(boundary_points[small])
+            k = int(np.argmin(dist))
+            pt_small = tuple(int(v) for v in boundary_points[small][k])
+            pt_large = tuple(int(v) for v in boundary_points[large][idx[k]])
+            distances[i, j] = max(dist[k], 1e-6)  # 0 sarebbe "nessun arco" per csgraph
+            closest[(i, j)] = (pt_small, pt_large)
+    
+    # FASE 6: Collega solo le coppie dell'albero ricoprente minimo (n-1 ponti al massimo)
     max_connection_distance = min(width, height) * 0.15  # 15% della dimensione minore
-    
-    for i in range(len(component_centroids)):
-        for j in range(i + 1, len(component_centroids)):
-            cx1, cy1 = component_centroids[i]
-            cx2, cy2 = component_centroids[j]
-            distance = np.sqrt((cx2 - cx1)**2 + (cy2 - cy1)**2)
-            
-            if distance < max_connection_distance:
-                connections_needed.append((i, j, distance))
-    
-    # FASE 6: Crea connessioni tra componenti vicine
     connected_mask = base_mask.copy()
+    mst = minimum_spanning_tree(distances).tocoo()
     
-    for i, j, distance in connections_needed:
-        # Trova i punti più vicini tra le due componenti
-        component1 = main_components[i]
-        component2 = main_components[j]
-        
-        # Estrai i contorni delle componenti
-        contours1, _ = cv2.findContours(component1, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        contours2, _ = cv2.findContours(component2, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        if contours1 and contours2:
-            # Trova i punti più vicini tra i contorni
-            min_dist = float('inf')
-            closest_points = None
-            
-            for c1 in contours1:
-                for c2 in contours2:
-                    for pt1 in c1:
-                        for pt2 in c2:
-                            dist = np.linalg.norm(pt1[0] - pt2[0])
-                            if dist < min_dist:
-                                min_dist = dist
-                                closest_points = (tuple(pt1[0]), tuple(pt2[0]))
-            
-            # Disegna una linea di connessione spessa
-            if closest_points and min_dist < max_connection_distance:
-                pt1, pt2 = closest_points
-                # Calcola thickness basato sulla distanza
-                thickness = max(3, int(15 - (min_dist / max_connection_distance) * 10))
-                cv2.line(connected_mask, pt1, pt2, 255, thickness)
+    for i, j, min_dist in zip(mst.row, mst.col, mst.data):
+        if min_dist >= max_connection_distance:
+            continue
+        pt1, pt2 = closest[(min(i, j), max(i, j))]
+        # Disegna una linea di connessione spessa, con thickness basato sulla distanza
+        thickness = max(3, int(15 - (min_dist / max_connection_distance) * 10))
+        cv2.line(connected_mask, pt1, pt2, 255, thickness)
     
     # FASE 7: Post-processing morfologico per smoothing finale
     # Operazione di chiusura per unificare le connessioni
@@ -1382,12 +1094,20 @@ def generate_cinematic_path(width, height, path_type, total_frames):
     
     return np.array(points)
 
-def apply_lens_deformation(mask, lenses, frame_index, config, dynamic_params=None, audio_factors=None):
+def apply_lens_deformation(mask, lenses, frame_index, config, dynamic_params=None, audio_factors=None, render_context=None,
+                           border_mode=cv2.BORDER_CONSTANT):
     """
     Applica una deformazione basata su "lenti" che seguono percorsi cinematografici predefiniti.
     Sistema completamente rivisto per movimenti ampi, fluidi e cinematografici con reattività audio.
+    
+    La sorgente può essere la maschera uint8 o il campo di distanza float32 del logo
+    (con border_mode=cv2.BORDER_REPLICATE: fuori dal frame resta "fuori dal logo").
     """
     h, w = mask.shape
+    ctx = render_context or get_render_context(w, h)
+    
+    # Raggio e forza per l'intervallo di questo frame (LENS_MAX_STRENGTH... automatizzati)
+    apply_lens_range(lenses, config)
     
     # Ottieni moltiplicatori dinamici se disponibili
     lens_strength_mult = dynamic_params.get('lens_strength_multiplier', 1.0) if dynamic_params else 1.0
@@ -1396,44 +1116,74 @@ def apply_lens_deformation(mask, lenses, frame_index, config, dynamic_params=Non
     if audio_factors:
         lens_strength_mult *= audio_factors['strength_factor']
     
-    map_x_grid, map_y_grid = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
-    final_map_x = np.copy(map_x_grid)
-    final_map_y = np.copy(map_y_grid)
+    # Griglia e mappe dal pool del RenderContext (niente meshgrid/copie per frame)
+    grid_x, grid_y = ctx.grid()
+    deformed_mask = np.empty_like(mask)
+    backend = resolve_kernel_backend(getattr(config, 'KERNEL_BACKEND', 'auto'))
+
+    # Culling: lenti fuori dal frame o che non raggiungono il logo (con sfondo a zero);
+    # le altre lavorano solo sul proprio rettangolo / sui propri tile
+    active_lenses, bounds = lenses, None
+    if getattr(config, 'LENS_CULLING_ENABLED', False):
+        zero_background = mask.dtype == np.uint8 and border_mode == cv2.BORDER_CONSTANT
+        active_lenses, bounds = plan_lenses(lenses, frame_index, lens_strength_mult, config.WORM_SHAPE_ENABLED,
+                                            config.WORM_LENGTH, w, h, mask if zero_background else None)
+    lens_stats.record(len(lenses), len(active_lenses))
+
+    def deform_band(band):
+        # Ogni banda calcola le proprie righe delle mappe e rimappa solo quelle
+        # (la sorgente del remap resta la maschera intera)
+        rows = band.rows
+        final_map_x = ctx.buffer('lens_map_x')[rows]
+        final_map_y = ctx.buffer('lens_map_y')[rows]
+        scratch = {name: ctx.buffer('lens_' + name)[rows] for name in ('dx', 'dy', 'dx_rot', 'dy_rot', 'distance')}
+        scratch['lens_mask'] = ctx.buffer('lens_mask', dtype=bool)[rows]
+
+        # Campo delle lenti (rotazione, verme, caduta, somma spostamenti): kernel Numba o NumPy
+        lens_field(final_map_x, final_map_y, grid_x[rows], grid_y[rows], band.y0, active_lenses, frame_index,
+                   config.WORM_SHAPE_ENABLED, config.WORM_LENGTH, lens_strength_mult, scratch, backend,
+                   bounds, getattr(config, 'LENS_BUCKET_SIZE', 32))
+
+        cv2.remap(mask, final_map_x, final_map_y, interpolation=cv2.INTER_LINEAR, dst=deformed_mask[rows],
+                  borderMode=border_mode, borderValue=0)
+
+    get_tile_scheduler(getattr(config, 'TILE_BANDS', 1)).map(deform_band, h)
+
+    # Porta le lenti allo stato del frame successivo
+    update_lenses(lenses, frame_index, config, w, h, audio_factors)
 
-    for lens in lenses:
-        dx = map_x_grid - lens['pos'][0]
-        dy = map_y_grid - lens['pos'][1]
-
-        if config.WORM_SHAPE_ENABLED:
-            # Deformazione a "verme": distorciamo lo spazio di calcolo della distanza
-            angle = lens['angle']
-            dx_rot = dx * np.cos(angle) - dy * np.sin(angle)
-            dy_rot = dx * np.sin(angle) + dy * np.cos(angle)
-            
-            # Allunghiamo la forma su un asse per creare il "corpo" del verme
-            dx_scaled = dx_rot / config.WORM_LENGTH
-            
-            # CORREZIONE ANTI-SFARFALLIO: Sostituisco noise casuale con pattern sinusoidale predicibile
-            # Il noise casuale causava lo sfarfallio, ora uso movimento fluido e prevedibile
-            wave_time = frame_index * 0.03 + lens['pulsation_offset']  # Velocità fissa controllata
-            sinusoidal_curve = np.sin(dx_rot * 0.01 + wave_time) * 30  # Ampiezza ridotta da 50 a 30
-            dy_scaled = dy_rot + sinusoidal_curve
-            
-            distance = np.sqrt(dx_scaled**2 + dy_scaled**2)
-        else:
-            distance = np.sqrt(dx**2 + dy**2)
+    return deformed_mask
 
-        normalized_distance = distance / (lens['radius'] + 1e-6)
-        lens_mask = normalized_distance < 1.0
-        
-        # Applica moltiplicatore dinamico alla forza della lente
-        dynamic_strength = lens['strength'] * lens_strength_mult
-        displacement = (1.0 - normalized_distance[lens_mask]) * dynamic_strength
-        
-        # Applica lo spostamento lungo la linea dal pixel al centro della lente
-        final_map_x[lens_mask] += dx[lens_mask] * displacement
-        final_map_y[lens_mask] += dy[lens_mask] * displacement
 
+def _lens_base(lens, name, low, high):
+    """
+    Raggio o forza base della lente per l'intervallo corrente del config (LENS_MIN/MAX_RADIUS,
+    LENS_MIN/MAX_STRENGTH, anche automatizzati): la lente mantiene la posizione nell'intervallo
+    estratta da initialize_lenses.
+    """
+    base = lens['base_' + name]
+    initial_low, initial_high = lens.get(name + '_range', (low, high))
+    if (low, high) == (initial_low, initial_high):
+        return base
+    unit = (base - initial_low) / (initial_high - initial_low) if initial_high != initial_low else 1.0
+    return low + unit * (high - low)
+
+def apply_lens_range(lenses, config):
+    """Raggio e forza delle lenti: base per l'intervallo del frame (automatizzabile) per la pulsazione."""
+    for lens in lenses:
+        lens['radius'] = _lens_base(lens, 'radius', config.LENS_MIN_RADIUS, config.LENS_MAX_RADIUS) \
+            * lens.get('radius_factor', 1.0)
+        lens['strength'] = _lens_base(lens, 'strength', config.LENS_MIN_STRENGTH, config.LENS_MAX_STRENGTH) \
+            * lens.get('strength_factor', 1.0)
+
+def update_lenses(lenses, frame_index, config, width, height, audio_factors=None):
+    """
+    Avanza di un frame lo stato delle lenti (pulsazione, movimento lungo il percorso, rotazione).
+    Non tocca nessuna immagine: è la parte di apply_lens_deformation da ripetere per
+    avanzare velocemente sui frame saltati.
+    """
+    w, h = width, height
+    
     # SISTEMA AGGIORNATO: Movimento cinematografico + PULSAZIONE DINAMICA ULTRA-POTENZIATA
     for lens in lenses:
         # === PULSAZIONE DINAMICA ULTRA-MIGLIORATA ===
@@ -1459,7 +1209,7 @@ def apply_lens_deformation(mask, lenses, frame_index, config, dynamic_params=Non
                 pulsation_amplitude *= audio_factors['pulsation_factor']
             
             pulsation_factor = 1.0 + pulsation_amplitude * total_pulsation * 0.5  # Ridotta ampiezza
-            lens['radius'] = lens['base_radius'] * pulsation_factor
+            lens['radius_factor'] = pulsation_factor
             
             # CORREZIONE: Pulsazione forza molto semplificata
             if config.LENS_FORCE_PULSATION_ENABLED:
@@ -1468,7 +1218,7 @@ def apply_lens_deformation(mask, lenses, frame_index, config, dynamic_params=Non
                 if audio_factors:
                     force_pulsation_amplitude *= audio_factors['strength_factor']
                 force_factor = 1.0 + force_pulsation_amplitude * force_pulsation * 0.3  # Ampiezza ridotta
-                lens['strength'] = lens['base_strength'] * force_factor
+                lens['strength_factor'] = force_factor
         
         # === MOVIMENTO LUNGO PERCORSI CINEMATOGRAFICI ULTRA-VELOCE ===
         # Velocità configurabile tramite parametri della Config, modulata dall'audio
@@ -1517,13 +1267,18 @@ def apply_lens_deformation(mask, lenses, frame_index, config, dynamic_params=Non
         lens['pos'][0] = np.clip(lens['pos'][0], margin, w - margin)
         lens['pos'][1] = np.clip(lens['pos'][1], margin, h - margin)
 
-    deformed_mask = cv2.remap(mask, final_map_x, final_map_y, interpolation=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
-    return deformed_mask
+    apply_lens_range(lenses, config)
 
 
-def apply_organic_deformation(mask, frame_index, params, dynamic_params=None):
-    """Applica una deformazione organica super fluida usando calcolo a griglia con parametri dinamici."""
+def apply_organic_deformation(mask, frame_index, params, dynamic_params=None, render_context=None,
+                              border_mode=cv2.BORDER_CONSTANT, cv_backend='numpy'):
+    """
+    Applica una deformazione organica super fluida usando calcolo a griglia con parametri dinamici.
+    
+    Con cv_backend='umat' mappe e remap restano in un cv2.UMat (components/umat.py).
+    """
     h, w = mask.shape
+    ctx = render_context or get_render_context(w, h)
     
     # Usa parametri dinamici se forniti, altrimenti quelli statici
     if dynamic_params:
@@ -1547,6 +1302,8 @@ def apply_organic_deformation(mask, frame_index, params, dynamic_params=None):
     noise_x = np.zeros((h_grid, w_grid), dtype=np.float32)
     noise_y = np.zeros((h_grid, w_grid), dtype=np.float32)
     
+    from noise import pnoise2
+    
     # Calcolo il noise solo sui punti della griglia
     for y in range(h_grid):
         for x in range(w_grid):
@@ -1564,28 +1321,46 @@ def apply_organic_deformation(mask, frame_index, params, dynamic_params=None):
                 octaves=4, persistence=0.5, lacunarity=2.0
             )
     
-    # Interpolo il noise per ottenere valori fluidi per tutti i pixel
-    noise_x_full = cv2.resize(noise_x, (w, h), interpolation=cv2.INTER_CUBIC)
-    noise_y_full = cv2.resize(noise_y, (w, h), interpolation=cv2.INTER_CUBIC)
-    
-    # Applico l'intensità dinamica
-    displacement_x = noise_x_full * intensity
-    displacement_y = noise_y_full * intensity
-    
-    # Creo le mappe di rimappatura
-    x_indices, y_indices = np.meshgrid(np.arange(w), np.arange(h))
-    map_x = (x_indices + displacement_x).astype(np.float32)
-    map_y = (y_indices + displacement_y).astype(np.float32)
+    return with_fallback(cv_backend, _organic_remap, mask, noise_x, noise_y, intensity, ctx, border_mode)
+
+def _organic_remap(mask, noise_x, noise_y, intensity, ctx, border_mode, backend='numpy'):
+    """Mappe della deformazione organica dal noise a griglia ridotta e rimappatura della maschera."""
+    h, w = mask.shape[:2]
+    x_indices, y_indices = ctx.grid()
+    if backend == 'umat':
+        # Mappe interamente nel UMat: la griglia viene caricata una volta sola
+        noise_x_full = cv2.resize(cv2.UMat(noise_x), (w, h), interpolation=cv2.INTER_CUBIC)
+        noise_y_full = cv2.resize(cv2.UMat(noise_y), (w, h), interpolation=cv2.INTER_CUBIC)
+        map_x = cv2.scaleAdd(noise_x_full, float(intensity), cached_umat(x_indices))
+        map_y = cv2.scaleAdd(noise_y_full, float(intensity), cached_umat(y_indices))
+    else:
+        # Interpolo il noise per ottenere valori fluidi per tutti i pixel
+        noise_x_full = cv2.resize(noise_x, (w, h), dst=ctx.buffer('organic_noise_x'), interpolation=cv2.INTER_CUBIC)
+        noise_y_full = cv2.resize(noise_y, (w, h), dst=ctx.buffer('organic_noise_y'), interpolation=cv2.INTER_CUBIC)
+        
+        # Applico l'intensità dinamica
+        displacement_x = np.multiply(noise_x_full, intensity, out=noise_x_full)
+        displacement_y = np.multiply(noise_y_full, intensity, out=noise_y_full)
+        
+        # Creo le mappe di rimappatura (in place sui buffer del RenderContext)
+        map_x = np.add(x_indices, displacement_x, out=ctx.buffer('organic_map_x'))
+        map_y = np.add(y_indices, displacement_y, out=ctx.buffer('organic_map_y'))
     
-    deformed_mask = cv2.remap(mask, map_x, map_y, interpolation=cv2.INTER_CUBIC, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+    deformed_mask = cv2.remap(upload(mask, backend), map_x, map_y, interpolation=cv2.INTER_CUBIC,
+                              borderMode=border_mode, borderValue=0)
     
-    return deformed_mask
+    return download(deformed_mask)
 
 def process_background(bg_frame, config):
     """
     Processa il frame di sfondo: lo adatta alle dimensioni video senza crop,
     lo scurisce e ne estrae i contorni per i traccianti.
     """
+    backend = resolve_cv_backend(getattr(config, 'CV_BACKEND', 'numpy'))
+    return with_fallback(backend, _process_background, bg_frame, config)
+
+def _process_background(bg_frame, config, backend='numpy'):
+    """Catena di sole chiamate cv2 di process_background: con 'umat' il frame resta in un cv2.UMat."""
     h, w, _ = bg_frame.shape
     
     # 1. NUOVO: Usa video originale senza crop, adattalo alle dimensioni target
@@ -1608,22 +1383,23 @@ def process_background(bg_frame, config):
         new_h = int(h * scale)
         
         # Ridimensiona
-        scaled_bg = cv2.resize(bg_frame, (new_w, new_h))
+        scaled_bg = cv2.resize(upload(bg_frame, backend), (new_w, new_h))
         
         # Centro-crop per adattare alle dimensioni esatte (il crop sarà più stretto con zoom > 1)
         start_x = (new_w - target_width) // 2
         start_y = (new_h - target_height) // 2
-        final_bg = scaled_bg[start_y:start_y + target_height, start_x:start_x + target_width]
+        final_bg = crop(scaled_bg, start_y, start_y + target_height, start_x, start_x + target_width)
         
     else:
         # Metodo originale con crop
         cropped_bg = bg_frame[config.BG_CROP_Y_START : config.BG_CROP_Y_END, :]
-        final_bg = cv2.resize(cropped_bg, (config.WIDTH, config.HEIGHT))
+        final_bg = cv2.resize(upload(cropped_bg, backend), (config.WIDTH, config.HEIGHT))
     
     # 2. Scurisce e contrasta
     if config.BG_DARKEN_FACTOR < 1.0:
         # Applica lo scurimento in modo più "morbido"
-        final_bg = cv2.addWeighted(final_bg, config.BG_DARKEN_FACTOR, np.zeros_like(final_bg), 1 - config.BG_DARKEN_FACTOR, 0)
+        # (equivale a addWeighted con un frame nero, senza allocarlo)
+        final_bg = cv2.convertScaleAbs(final_bg, alpha=config.BG_DARKEN_FACTOR, beta=0)
     if config.BG_CONTRAST_FACTOR > 1.0:
         final_bg = cv2.convertScaleAbs(final_bg, alpha=config.BG_CONTRAST_FACTOR, beta=0)
 
@@ -1642,76 +1418,72 @@ def process_background(bg_frame, config):
         kernel = np.ones((2,2), np.uint8)
         bg_edges = cv2.dilate(bg_edges, kernel, iterations=1)
     
-    return final_bg, logo_edges, bg_edges
+    # La composizione lavora su array NumPy
+    return download(final_bg), download(logo_edges), (download(bg_edges) if bg_edges is not None else None)
 
-def render_frame(contours, hierarchy, width, height, frame_index, total_frames, config, bg_frame, texture_image, tracer_history, bg_tracer_history, lenses, audio_data=None):
+def _tracer_scalars(history_length, base_color, max_opacity, frame_index, hue_speed, hue_step):
     """
-    Rende un singolo frame dell'animazione, applicando la pipeline di effetti completa.
+    Colori (già moltiplicati per l'opacità) delle scie, dal bordo più recente al più vecchio.
+    Calcolati una volta per frame e condivisi da tutte le bande.
     """
-    # --- 0. Ottieni Parametri Dinamici ---
-    dynamic_params = get_dynamic_parameters(frame_index, total_frames)
-    
-    # --- 0.5. Calcola Fattori Audio-Reattivi ---
-    audio_factors = get_audio_reactive_factors(audio_data, frame_index, config)
+    opacities = np.linspace(0, max_opacity, history_length)
+    base_color_hsv = cv2.cvtColor(np.uint8([[base_color]]), cv2.COLOR_BGR2HSV)[0][0]
+    
+    scalars = []
+    for i in range(history_length):
+        # --- Colore dinamico per i traccianti ---
+        hue_shift = (frame_index * hue_speed + i * hue_step) % 180
+        new_hue = (base_color_hsv[0] + hue_shift) % 180
+        dynamic_color_hsv = np.uint8([[[new_hue, base_color_hsv[1], base_color_hsv[2]]]])
+        dynamic_color_bgr = cv2.cvtColor(dynamic_color_hsv, cv2.COLOR_HSV2BGR)[0][0]
+        scalars.append(tuple(float(c) * opacities[i] for c in dynamic_color_bgr) + (0.0,))
+    return scalars
+
+def _accumulate_tracers(tracer_layer, history, scalars, rows=slice(None)):
+    """
+    Somma in place nel tracer_layer le scie della history con colore e opacità dinamici.
+    Ogni bordo passato contribuisce solo dove è acceso, senza layer temporanei a piena risoluzione.
+    `rows` limita la somma a una banda (tracer_layer è già la banda).
+    """
+    for past_edges, scalar in zip(reversed(history), scalars):
+        # Colora i bordi e applica l'opacità dinamica (solo dove il bordo è presente)
+        cv2.add(tracer_layer, scalar, dst=tracer_layer, mask=past_edges[rows])
 
-    # --- 1. Preparazione Sfondo e Traccianti ---
-    bg_result = process_background(bg_frame, config)
-    if len(bg_result) == 3:
-        final_frame, current_logo_edges, current_bg_edges = bg_result
-    else:
-        final_frame, current_logo_edges = bg_result
-        current_bg_edges = None
+def render_logo_mask(contours, hierarchy, width, height, frame_index, config, lenses, audio_data=None, dynamic_params=None, audio_factors=None, render_context=None):
+    """
+    Crea la maschera del logo per il frame e applica deformazione organica e lenti.
     
-    # --- 2. Creazione Layer Traccianti del Logo (CON PARAMETRI DINAMICI) ---
-    if config.TRACER_ENABLED and len(tracer_history) > 0:
-        tracer_layer = np.zeros_like(final_frame, dtype=np.float32)
-        # Applica moltiplicatore dinamico all'opacità
-        dynamic_opacity = config.TRACER_MAX_OPACITY * dynamic_params.get('tracer_opacity_multiplier', 1.0)
-        opacities = np.linspace(0, dynamic_opacity, len(tracer_history))
-        
-        for i, past_edges in enumerate(reversed(tracer_history)):
-            # --- NUOVO: Colore dinamico per i traccianti ---
-            hue_shift = (frame_index * 0.1 + i * 0.5) % 180
-            base_color_hsv = cv2.cvtColor(np.uint8([[config.TRACER_BASE_COLOR]]), cv2.COLOR_BGR2HSV)[0][0]
-            new_hue = (base_color_hsv[0] + hue_shift) % 180
-            dynamic_color_hsv = np.uint8([[[new_hue, base_color_hsv[1], base_color_hsv[2]]]])
-            dynamic_color_bgr = cv2.cvtColor(dynamic_color_hsv, cv2.COLOR_HSV2BGR)[0][0]
-            
-            # Colora i bordi e applica l'opacità dinamica
-            colored_tracer = cv2.cvtColor(past_edges, cv2.COLOR_GRAY2BGR).astype(np.float32)
-            colored_tracer[past_edges > 0] = np.array(dynamic_color_bgr, dtype=np.float32)
-            tracer_with_opacity = cv2.multiply(colored_tracer, opacities[i])
-            tracer_layer = cv2.add(tracer_layer, tracer_with_opacity)
-            
-        final_frame = cv2.add(final_frame.astype(np.float32), tracer_layer)
-        final_frame = np.clip(final_frame, 0, 255).astype(np.uint8)
-
-    # --- 2.5. NUOVO: Creazione Layer Traccianti Sfondo (CON PARAMETRI DINAMICI) ---
-    if hasattr(config, 'BG_TRACER_ENABLED') and config.BG_TRACER_ENABLED and len(bg_tracer_history) > 0:
-        bg_tracer_layer = np.zeros_like(final_frame, dtype=np.float32)
-        # Applica moltiplicatore dinamico all'opacità dello sfondo
-        dynamic_bg_opacity = config.BG_TRACER_MAX_OPACITY * dynamic_params.get('bg_tracer_opacity_multiplier', 1.0)
-        bg_opacities = np.linspace(0, dynamic_bg_opacity, len(bg_tracer_history))
-        
-        for i, past_bg_edges in enumerate(reversed(bg_tracer_history)):
-            # Colore dinamico per traccianti sfondo (diverso dal logo)
-            hue_shift_bg = (frame_index * 0.05 + i * 0.3) % 180  # Velocità diversa
-            base_color_hsv_bg = cv2.cvtColor(np.uint8([[config.BG_TRACER_BASE_COLOR]]), cv2.COLOR_BGR2HSV)[0][0]
-            new_hue_bg = (base_color_hsv_bg[0] + hue_shift_bg) % 180
-            dynamic_color_hsv_bg = np.uint8([[[new_hue_bg, base_color_hsv_bg[1], base_color_hsv_bg[2]]]])
-            dynamic_color_bgr_bg = cv2.cvtColor(dynamic_color_hsv_bg, cv2.COLOR_HSV2BGR)[0][0]
-            
-            # Colora i bordi dello sfondo e applica l'opacità dinamica
-            colored_bg_tracer = cv2.cvtColor(past_bg_edges, cv2.COLOR_GRAY2BGR).astype(np.float32)
-            colored_bg_tracer[past_bg_edges > 0] = np.array(dynamic_color_bgr_bg, dtype=np.float32)
-            bg_tracer_with_opacity = cv2.multiply(colored_bg_tracer, bg_opacities[i])
-            bg_tracer_layer = cv2.add(bg_tracer_layer, bg_tracer_with_opacity)
-            
-        final_frame = cv2.add(final_frame.astype(np.float32), bg_tracer_layer)
-        final_frame = np.clip(final_frame, 0, 255).astype(np.uint8)
+    Aggiorna lo stato tra frame (smoothing audio, lenti): va chiamata una volta per
+    frame, in ordine, come fa render_frame.
+    """
+    return render_logo_shape(contours, hierarchy, width, height, frame_index, config, lenses,
+                             audio_data, dynamic_params, audio_factors, render_context)[0]
 
-    # --- 3. Creazione Maschera del Logo ---
-    logo_mask = create_unified_mask(contours, hierarchy, width, height, config.SMOOTHING_ENABLED, config.SMOOTHING_FACTOR)
+def render_logo_shape(contours, hierarchy, width, height, frame_index, config, lenses, audio_data=None, dynamic_params=None, audio_factors=None, render_context=None):
+    """
+    Come render_logo_mask, restituendo anche il campo di distanza deformato del logo.
+    
+    Con LOGO_SDF_ENABLED le deformazioni rimappano il campo di distanza con segno
+    (components/sdf.py) e la maschera è la sua copertura anti-aliased. Con
+    LOGO_MASK_MODE='coverage' si deforma la maschera di copertura a 8 bit.
+    
+    Returns:
+        tuple: (maschera uint8, campo di distanza float32 deformato o None)
+    """
+    ctx = render_context or get_render_context(width, height)
+    use_sdf = getattr(config, 'LOGO_SDF_ENABLED', False)
+    
+    # --- 3. Creazione Maschera del Logo (o del suo campo di distanza) ---
+    if use_sdf:
+        logo_shape = get_logo_sdf(contours, hierarchy, width, height, config)
+        border_mode = cv2.BORDER_REPLICATE
+    elif getattr(config, 'LOGO_MASK_MODE', 'binary') == 'coverage':
+        # Le rimappature (cubica e lineare) mantengono la copertura a 8 bit sui bordi
+        logo_shape = get_logo_coverage(contours, hierarchy, width, height, config)
+        border_mode = cv2.BORDER_CONSTANT
+    else:
+        logo_shape = create_unified_mask(contours, hierarchy, width, height, config.SMOOTHING_ENABLED, config.SMOOTHING_FACTOR)
+        border_mode = cv2.BORDER_CONSTANT
 
     # --- 4. Applica Deformazione Organica (per movimento di base CON AUDIO REATTIVO) ---
     if config.DEFORMATION_ENABLED:
@@ -1725,217 +1497,683 @@ def render_frame(contours, hierarchy, width, height, frame_index, total_frames,
         # Calcola parametri dinamici basati sull'audio per movimento delicato
         dynamic_deformation_params = get_organic_deformation_factors(audio_data, frame_index, config)
         
-        logo_mask = apply_organic_deformation(logo_mask, frame_index, deformation_params, dynamic_deformation_params)
+        logo_shape = apply_organic_deformation(logo_shape, frame_index, deformation_params,
+                                               dynamic_deformation_params, ctx, border_mode,
+                                               resolve_cv_backend(getattr(config, 'CV_BACKEND', 'numpy')))
 
     # --- 5. Applica Deformazione a Lenti (sovrapposta alla prima) ---
     if config.LENS_DEFORMATION_ENABLED:
-        logo_mask = apply_lens_deformation(logo_mask, lenses, frame_index, config, dynamic_params, audio_factors)
+        logo_shape = apply_lens_deformation(logo_shape, lenses, frame_index, config, dynamic_params,
+                                            audio_factors, ctx, border_mode)
+    
+    if use_sdf:
+        return sdf_coverage(logo_shape), logo_shape
+    return logo_shape, None
 
-    # --- 5.5. Estrai Traccianti del Logo (NUOVO per maggiore aderenza) ---
-    logo_tracers = extract_logo_tracers(logo_mask, config)
-    # Combina i traccianti del logo con quelli dello sfondo per un effetto più ricco
+def advance_frame_state(frame_index, width, height, config, lenses, audio_data=None):
+    """
+    Avanza lo stato tra frame (smoothing audio della deformazione, lenti) senza
+    elaborare immagini. Equivale, per lo stato, a una chiamata di render_frame.
+    """
+    audio_factors = get_audio_reactive_factors(audio_data, frame_index, config)
+    if config.DEFORMATION_ENABLED:
+        get_organic_deformation_factors(audio_data, frame_index, config)
+    if config.LENS_DEFORMATION_ENABLED:
+        update_lenses(lenses, frame_index, config, width, height, audio_factors)
+
+def render_frame_edges(contours, hierarchy, width, height, frame_index, total_frames, config, bg_frame, lenses, audio_data=None, render_context=None, dynamic_params=None):
+    """
+    Calcola solo i bordi che render_frame consegnerebbe ai traccianti (logo e sfondo),
+    saltando texture, glow e blending. Aggiorna lo stato tra frame come render_frame.
+    
+    Returns:
+        tuple: (combined_logo_edges, bg_edges)
+    """
+    if dynamic_params is None:
+        dynamic_params = get_dynamic_parameters(frame_index, total_frames, config)
+    audio_factors = get_audio_reactive_factors(audio_data, frame_index, config)
+    
+    _, current_logo_edges, current_bg_edges = process_background(bg_frame, config)
+    logo_mask, logo_sdf = render_logo_shape(contours, hierarchy, width, height, frame_index, config, lenses,
+                                            audio_data, dynamic_params, audio_factors, render_context)
+    logo_tracers = sdf_edge_band(logo_sdf) if logo_sdf is not None else extract_logo_tracers(logo_mask, config)
     combined_logo_edges = cv2.add(current_logo_edges, logo_tracers)
+    return combined_logo_edges, current_bg_edges
 
-    # --- 6. Applicazione Texture Dinamica (NUOVO SISTEMA) ---
-    # Applica texture secondo la modalità configurata PRIMA di creare i layer del logo
-    if config.TEXTURE_ENABLED and texture_image is not None:
-        if config.TEXTURE_TARGET in ['background', 'both']:
-            # Applica texture allo sfondo
-            
-            final_frame = apply_texture_blending(
-                final_frame, 
-                texture_image, 
-                config.TEXTURE_BACKGROUND_ALPHA, 
-                config.TEXTURE_BLENDING_MODE
-            )
+def fast_forward_to_frame(target_frame, contours, hierarchy, width, height, total_frames, config,
+                          read_background, tracer_history, bg_tracer_history, lenses, audio_data=None,
+                          render_context=None, frame_settings=None, timeline=None):
+    """
+    Porta lo stato tra frame al frame `target_frame` senza renderizzare i frame precedenti.
     
-    # --- 7. Creazione Layer Logo e Glow ---
-    logo_layer = np.zeros_like(final_frame)
-    glow_layer = np.zeros_like(final_frame)
-
-    # Applica texture al logo (se configurato)
-    if config.TEXTURE_ENABLED and texture_image is not None and config.TEXTURE_TARGET in ['logo', 'both']:        
-        # Crea base di colore solido
-        solid_color_layer = np.zeros_like(final_frame)
-        solid_color_layer[logo_mask > 0] = config.LOGO_COLOR
-        
-        # Applica texture usando il nuovo sistema di blending
-        logo_layer = apply_texture_blending(
-            solid_color_layer,
-            texture_image,
-            config.TEXTURE_ALPHA,
-            config.TEXTURE_BLENDING_MODE,
-            logo_mask
-        )
+    Lenti e smoothing audio avanzano con advance_frame_state; solo gli ultimi frame che
+    finiscono nelle scie dei traccianti calcolano i bordi (render_frame_edges).
+    
+    Args:
+        read_background: funzione frame_index -> frame di sfondo grezzo
+        frame_settings: impostazioni di ogni frame con l'automazione (default: config per tutti)
+        timeline: ParameterTimeline del render (default: quella di config)
+    """
+    trail_length = 0
+    if config.TRACER_ENABLED:
+        trail_length = tracer_history.maxlen or 0
+    if getattr(config, 'BG_TRACER_ENABLED', False):
+        trail_length = max(trail_length, bg_tracer_history.maxlen or 0)
+    warmup_start = max(0, target_frame - trail_length)
+    
+    for i in range(target_frame):
+        frame_config = frame_settings[i] if frame_settings is not None else config
+        if i < warmup_start:
+            advance_frame_state(i, width, height, frame_config, lenses, audio_data)
+            continue
+        
+        dynamic_params = timeline.params(i) if timeline is not None else None
+        logo_edges, bg_edges = render_frame_edges(contours, hierarchy, width, height, i, total_frames,
+                                                  frame_config, read_background(i), lenses, audio_data,
+                                                  render_context, dynamic_params)
+        if config.TRACER_ENABLED:
+            tracer_history.append(logo_edges)
+        if getattr(config, 'BG_TRACER_ENABLED', False) and bg_edges is not None:
+            bg_tracer_history.append(bg_edges)
+
+def render_frame(contours, hierarchy, width, height, frame_index, total_frames, config, bg_frame, texture_image, tracer_history, bg_tracer_history, lenses, audio_data=None, render_context=None):
+    """
+    Rende un singolo frame dell'animazione, applicando la pipeline di effetti completa.
+    
+    I layer intermedi vivono nei buffer del RenderContext (condiviso per dimensione se
+    non specificato); frame finale e bordi restituiti sono sempre array nuovi.
+    """
+    ctx = render_context or get_render_context(width, height)
+
+    # --- 0. Ottieni Parametri Dinamici ---
+    dynamic_params = get_dynamic_parameters(frame_index, total_frames, config)
+    
+    # --- 0.5. Calcola Fattori Audio-Reattivi ---
+    audio_factors = get_audio_reactive_factors(audio_data, frame_index, config)
+
+    # --- 1. Preparazione Sfondo e Traccianti ---
+    background = process_background(bg_frame, config)
+
+    # --- 3-5. Maschera del Logo con deformazione organica e lenti ---
+    logo_mask, logo_sdf = render_logo_shape(contours, hierarchy, width, height, frame_index, config, lenses,
+                                            audio_data, dynamic_params, audio_factors, ctx)
+
+    return composite_frame(background, logo_mask, frame_index, config, texture_image,
+                           tracer_history, bg_tracer_history, dynamic_params, ctx, logo_sdf=logo_sdf)
+
+def composite_frame(background, logo_mask, frame_index, config, texture_image, tracer_history, bg_tracer_history, dynamic_params, render_context=None, incremental=None, logo_sdf=None, blend_variants=None):
+    """
+    Compone il frame finale a partire da sfondo processato e maschera del logo già deformata:
+    traccianti, texture, glow e blending. Non modifica lenti né storie dei traccianti.
+
+    Le fasi girano per bande orizzontali sul TileScheduler (TILE_BANDS): Canny e
+    sfocature leggono un margine di righe attorno alla banda, le statistiche
+    dell'adaptive blending vengono sommate su tutte le bande prima del blending.
+
+    Args:
+        background: Risultato di process_background (sfondo, bordi logo, bordi sfondo)
+        logo_mask: Maschera del logo per il frame (render_logo_mask)
+        incremental: IncrementalState del render per ricalcolare solo le zone cambiate
+                     rispetto al frame precedente (None = composizione completa)
+        logo_sdf: Campo di distanza deformato (render_logo_shape con LOGO_SDF_ENABLED):
+                  traccianti, glow e maschera morbida diventano rampe per pixel, senza
+                  Canny né sfocature (e senza composizione incrementale)
+        blend_variants: Impostazioni alternative del blending avanzato (es. preset, --compare-presets):
+                        il frame viene composto una volta fino al blending, poi miscelato con
+                        ciascuna in parallelo sulle bande. Richiede ADVANCED_BLENDING e
+                        incremental=None.
+
+    Returns:
+        tuple: (frame finale, bordi combinati del logo, bordi dello sfondo); con blend_variants
+               il primo elemento è la lista dei frame, uno per variante
+    """
+    height, width = logo_mask.shape[:2]
+    ctx = render_context or get_render_context(width, height)
+    tiles = get_tile_scheduler(getattr(config, 'TILE_BANDS', 1))
+    blur_quality = getattr(config, 'BLUR_QUALITY', 'balanced')
+    # Maschera di copertura: usata direttamente come alpha, senza ri-sfocarla per il blending
+    coverage_alpha = getattr(config, 'LOGO_MASK_MODE', 'binary') == 'coverage'
+    soft_from_blur = config.ADVANCED_BLENDING and not coverage_alpha
+    if blend_variants is not None and not config.ADVANCED_BLENDING:
+        raise ValueError("blend_variants richiede ADVANCED_BLENDING")
+    if blend_variants is not None and incremental is not None:
+        # Le bande riusate copiano solo il frame precedente dell'output singolo
+        raise ValueError("blend_variants non supporta la composizione incrementale")
+    blend_configs = list(blend_variants) if blend_variants is not None else [config]
+    # Somme dell'adaptive blending raccolte dalle bande se almeno una variante le usa
+    adaptive_sums = config.ADVANCED_BLENDING and any(variant.ADAPTIVE_BLENDING for variant in blend_configs)
+    # Composizione a virgola fissa (components/precision.py): layer interi invece di float32
+    precision = getattr(config, 'COMPOSITE_PRECISION', 'float32')
+    fixed = precision == 'fixed'
+
+    if len(background) == 3:
+        final_frame, current_logo_edges, current_bg_edges = background
     else:
-        # Usa colore solido se la texture è disabilitata o non per il logo
-        logo_layer[logo_mask > 0] = config.LOGO_COLOR
+        final_frame, current_logo_edges = background
+        current_bg_edges = None
 
-    # Applica l'effetto Glow (se abilitato)
+    # --- Parametri per frame, calcolati una volta e condivisi dalle bande ---
+    # Entrambe le scie si accumulano nello stesso buffer (float, o uint16 Q8.8) e vengono sommate una volta sola
+    tracer_passes = []
+    if config.TRACER_ENABLED and len(tracer_history) > 0:
+        # Applica moltiplicatore dinamico all'opacità
+        dynamic_opacity = config.TRACER_MAX_OPACITY * dynamic_params.get('tracer_opacity_multiplier', 1.0)
+        tracer_passes.append((tracer_history, _tracer_scalars(len(tracer_history), config.TRACER_BASE_COLOR,
+                                                              dynamic_opacity, frame_index, 0.1, 0.5)))
+    if hasattr(config, 'BG_TRACER_ENABLED') and config.BG_TRACER_ENABLED and len(bg_tracer_history) > 0:
+        # Colore dinamico per traccianti sfondo (velocità diversa dal logo)
+        dynamic_bg_opacity = config.BG_TRACER_MAX_OPACITY * dynamic_params.get('bg_tracer_opacity_multiplier', 1.0)
+        tracer_passes.append((bg_tracer_history, _tracer_scalars(len(bg_tracer_history), config.BG_TRACER_BASE_COLOR,
+                                                                 dynamic_bg_opacity, frame_index, 0.05, 0.3)))
+    if fixed:
+        tracer_passes = [(history, fixed_tracer_scalars(scalars)) for history, scalars in tracer_passes]
+
+    # Risolve la texture del frame una sola volta (animata o statica): logo e sfondo
+    # condividono così gli stessi termini pre-calcolati
+    texture = None
+    if config.TEXTURE_ENABLED and texture_image is not None:
+        texture = TextureAsset.from_array(texture_image).at_frame(frame_index, config)
+    texture_on_background = texture is not None and config.TEXTURE_TARGET in ['background', 'both']
+    texture_on_logo = texture is not None and config.TEXTURE_TARGET in ['logo', 'both']
+
+    glow_color = None
     if config.GLOW_ENABLED:
-        ksize = config.GLOW_KERNEL_SIZE if config.GLOW_KERNEL_SIZE % 2 != 0 else config.GLOW_KERNEL_SIZE + 1
-        blurred_mask = cv2.GaussianBlur(logo_mask, (ksize, ksize), 0)
-        glow_mask_3ch = cv2.cvtColor(blurred_mask, cv2.COLOR_GRAY2BGR)
-        glow_effect = cv2.multiply(glow_mask_3ch, np.array(config.LOGO_COLOR, dtype=np.float32) / 255.0, dtype=cv2.CV_32F)
-        glow_layer = np.clip(glow_effect * dynamic_params['glow_intensity'], 0, 255).astype(np.uint8)
+        glow_color = np.array(config.LOGO_COLOR, dtype=np.float32) * np.float32(dynamic_params['glow_intensity'] / 255.0)
+
+    # Righe di contesto per Canny dei traccianti e per le sfocature di glow e maschera morbida
+    halo = align_margin(max(_CANNY_HALO,
+                            blur_halo(config.GLOW_KERNEL_SIZE, blur_quality) if config.GLOW_ENABLED else 0,
+                            blur_halo(config.EDGE_SOFTNESS, blur_quality) if soft_from_blur else 0))
+    if logo_sdf is not None:
+        # Rampe per pixel sul campo di distanza: nessun contesto, niente da riusare tra frame
+        halo = 0
+        incremental = None
+
+    # Composizione incrementale: confronto con il frame precedente (components/incremental.py)
+    if incremental is not None:
+        valid = incremental.begin_frame(config, logo_mask, [history for history, _ in tracer_passes])
+        # Righe da cui la maschera influenza l'output (la maschera dei bordi del blending guarda più lontano)
+        influence_halo = halo
+        if config.ADVANCED_BLENDING and config.EDGE_DETECTION_ENABLED:
+            influence_halo = max(halo, _edge_mask_halo(config, blur_quality))
+        # Parametri del frame che cambiano il logo anche a maschera invariata
+        frame_params_equal = (valid
+                              and not (config.ADVANCED_BLENDING and config.ADAPTIVE_BLENDING)
+                              and (not texture_on_logo or texture is incremental.prev_texture)
+                              and (glow_color is None or np.array_equal(glow_color, incremental.prev_glow_color)))
+        background_static = not texture_on_background or texture is incremental.prev_texture
+
+    def mask_products(mask_region):
+        # Dipendono solo dalla maschera: in modalità incrementale restano in cache tra i frame
+        return logo_mask_products(mask_region, config, soft_from_blur)
+
+    def sdf_products(sdf_region):
+        # Stessi prodotti dal campo di distanza: banda attorno al bordo e rampe al posto delle sfocature
+        return {
+            'logo_tracers': sdf_edge_band(sdf_region),
+            'glow_blur': sdf_blur_ramp(sdf_region, config.GLOW_KERNEL_SIZE) if config.GLOW_ENABLED else None,
+            'soft_blur': sdf_blur_ramp(sdf_region, config.EDGE_SOFTNESS) if soft_from_blur else None,
+        }
 
-    # --- 6. Composizione Finale con BLENDING AVANZATO SCRITTA-SFONDO ---
-    
-    # A. Aggiungi il glow allo sfondo in modo additivo
-    final_frame_with_glow = cv2.add(final_frame, glow_layer)
+    # Backend UMat: prodotti della maschera in una sola catena cv2 sul frame intero, tagliati poi per banda
+    frame_products = None
+    cv_backend = resolve_cv_backend(getattr(config, 'CV_BACKEND', 'numpy'))
+    if cv_backend == 'umat' and incremental is None and logo_sdf is None:
+        frame_products = with_fallback(cv_backend, logo_mask_products, logo_mask, config, soft_from_blur)
+
+    # Output nuovi a ogni frame (restano vivi nella storia dei traccianti / nel video)
+    combined_logo_edges = np.empty((height, width), dtype=np.uint8)
+    output = np.empty((height, width, 3), dtype=np.uint8)
+    reused_bands = set()
+
+    def compose_band(band):
+        rows = band.rows
+        halo_rows, inner = band.context(halo)
+        band_mask = logo_mask[rows]
+        frame = final_frame[rows]
+
+        if incremental is not None:
+            tracer_free = incremental.tracer_free(rows)
+            if background_static and incremental.band_reusable(band, valid, final_frame, logo_mask, current_logo_edges,
+                                                               influence_halo, frame_params_equal, tracer_free):
+                # Banda identica al frame precedente: niente da ricomporre (nemmeno nel blending)
+                reused_bands.add(band)
+                np.copyto(output[rows], incremental.prev_output[rows])
+                np.copyto(combined_logo_edges[rows], incremental.prev_combined_edges[rows])
+                return np.zeros(7) if adaptive_sums else None
+            products = incremental.band_products(band, logo_mask, halo, valid, mask_products)
+        elif logo_sdf is not None:
+            products = sdf_products(logo_sdf[rows])
+        elif frame_products is not None:
+            products = {name: (values[rows] if values is not None else None) for name, values in frame_products.items()}
+        else:
+            products = {name: (values[inner] if values is not None else None)
+                        for name, values in mask_products(logo_mask[halo_rows]).items()}
+
+        # --- 2. Layer Traccianti Logo + Sfondo (CON PARAMETRI DINAMICI) ---
+        if tracer_passes and fixed:
+            # Scie in uint16 a virgola fissa (cv2.add satura a 65535, cioè a 255 dopo lo shift)
+            tracer_layer = ctx.buffer('tracer_layer_fixed', 3, np.uint16)[rows]
+            tracer_layer.fill(0)
+            for history, scalars in tracer_passes:
+                _accumulate_tracers(tracer_layer, history, scalars, rows)
+
+            # Parte intera delle scie + sfondo: lo sfondo è intero, il troncamento resta quello del float
+            tracer_layer >>= TRACER_FIXED_SHIFT
+            with_tracers = ctx.buffer('frame_with_tracers', 3, np.uint8)[rows]
+            np.copyto(with_tracers, tracer_layer, casting='unsafe')
+            frame = cv2.add(with_tracers, frame, dst=with_tracers)
+        elif tracer_passes:
+            tracer_layer = ctx.buffer('tracer_layer', 3)[rows]
+            tracer_layer.fill(0)
+            for history, scalars in tracer_passes:
+                _accumulate_tracers(tracer_layer, history, scalars, rows)
+
+            # Somma e satura con troncamento (come la conversione astype originale)
+            tracer_layer += frame
+            np.clip(tracer_layer, 0, 255, out=tracer_layer)
+            frame = ctx.buffer('frame_with_tracers', 3, np.uint8)[rows]
+            np.copyto(frame, tracer_layer, casting='unsafe')
+
+        # --- 5.5. Estrai Traccianti del Logo (NUOVO per maggiore aderenza) ---
+        logo_tracers = products['logo_tracers']
+        # Combina i traccianti del logo con quelli dello sfondo per un effetto più ricco
+        cv2.add(current_logo_edges[rows], logo_tracers, dst=combined_logo_edges[rows])
+
+        # --- 6. Applicazione Texture Dinamica (NUOVO SISTEMA) ---
+        # Applica texture secondo la modalità configurata PRIMA di creare i layer del logo
+        if texture_on_background:
+            frame = texture.region(band.y0, band.y1).blend(
+                frame,
+                config.TEXTURE_BACKGROUND_ALPHA,
+                config.TEXTURE_BLENDING_MODE,
+                precision=precision
+            )
 
-    # B. Crea una versione "pulita" del logo (senza glow)
-    final_logo_layer = np.zeros_like(final_frame)
-    
-    # Crea una maschera booleana per un'applicazione precisa
-    logo_mask_bool = logo_mask > 0
-    
-    # Applica il logo (texturizzato o a colore solido) alla sua area
-    final_logo_layer[logo_mask_bool] = logo_layer[logo_mask_bool]
+        # --- 7. Creazione Layer Logo e Glow ---
+        # Crea una maschera booleana per un'applicazione precisa
+        logo_mask_bool = np.greater(band_mask, 0, out=ctx.buffer('logo_mask_bool', dtype=bool)[rows])
+
+        if texture_on_logo:
+            # Crea base di colore solido e applica la texture con il sistema di blending
+            solid_color_layer = ctx.buffer('solid_color_layer', 3, np.uint8)[rows]
+            solid_color_layer.fill(0)
+            solid_color_layer[logo_mask_bool] = config.LOGO_COLOR
+            logo_layer = texture.region(band.y0, band.y1).blend(
+                solid_color_layer,
+                config.TEXTURE_ALPHA,
+                config.TEXTURE_BLENDING_MODE,
+                band_mask,
+                precision
+            )
+        else:
+            # Usa colore solido se la texture è disabilitata o non per il logo
+            logo_layer = ctx.buffer('logo_layer', 3, np.uint8)[rows]
+            logo_layer.fill(0)
+            logo_layer[logo_mask_bool] = config.LOGO_COLOR
+
+        # A. Aggiungi il glow (se abilitato) allo sfondo in modo additivo
+        final_frame_with_glow = ctx.buffer('frame_with_glow', 3, np.uint8)[rows]
+        if config.GLOW_ENABLED:
+            # Glow e maschera morbida condividono la stessa piramide di sfocatura (mask_products)
+            blurred_mask = products['glow_blur']
+            glow_layer = ctx.buffer('glow_layer', 3, np.uint8)[rows]
+            if fixed:
+                glow_layer_fixed(blurred_mask, glow_color, glow_layer)
+            else:
+                glow_effect = np.multiply(blurred_mask[:, :, np.newaxis], glow_color, out=ctx.buffer('glow_effect', 3)[rows])
+                np.clip(glow_effect, 0, 255, out=glow_effect)
+                np.copyto(glow_layer, glow_effect, casting='unsafe')
+            cv2.add(frame, glow_layer, dst=final_frame_with_glow)
+        else:
+            np.copyto(final_frame_with_glow, frame)
+
+        # B. Crea una versione "pulita" del logo (senza glow) e applicala alla sua area
+        final_logo_layer = ctx.buffer('final_logo_layer', 3, np.uint8)[rows]
+        final_logo_layer.fill(0)
+        np.copyto(final_logo_layer, logo_layer, where=logo_mask_bool[:, :, np.newaxis])
+
+        if config.ADVANCED_BLENDING:
+            # La maschera morbida serve al blending: si calcola qui con la stessa piramide del glow
+            # (con la maschera di copertura è la copertura stessa)
+            soft_source = band_mask if coverage_alpha else products['soft_blur']
+            if fixed:
+                _soft_mask_fixed(soft_source, ctx.buffer('blend_soft_mask_u8', dtype=np.uint8)[rows])
+            else:
+                np.multiply(soft_source, np.float32(1.0 / 255.0), out=ctx.buffer('blend_soft_mask')[rows])
+            if adaptive_sums:
+                return advanced_blending_sums(final_frame_with_glow, final_logo_layer, logo_mask_bool)
+        elif coverage_alpha:
+            # Copertura come alpha: logo * a + sfondo con glow * (1 - a), bordi anti-aliased
+            alpha = np.multiply(band_mask, np.float32(1.0 / 255.0), out=ctx.buffer('coverage_alpha')[rows])
+            inverse = np.subtract(np.float32(1.0), alpha, out=ctx.buffer('coverage_inverse')[rows])
+            cv2.blendLinear(final_logo_layer, final_frame_with_glow, alpha, inverse, dst=output[rows])
+        else:
+            # Metodo tradizionale: sovrapponi il logo pulito allo sfondo con glow
+            final_frame_with_glow[logo_mask_bool] = 0
+            cv2.add(final_frame_with_glow, final_logo_layer, dst=output[rows])
+        return None
+
+    partial_sums = tiles.map(compose_band, height)
 
-    # C. NUOVO: Applica il Blending Avanzato se abilitato
+    # --- 6. Composizione Finale con BLENDING AVANZATO SCRITTA-SFONDO ---
+    outputs = [output] + [np.empty_like(output) for _ in blend_configs[1:]]
     if config.ADVANCED_BLENDING:
-        final_frame = apply_advanced_blending(final_frame_with_glow, final_logo_layer, logo_mask, config)
-    else:
-        # Metodo tradizionale: sovrapponi il logo pulito allo sfondo con glow
-        final_frame_with_glow[logo_mask_bool] = 0
-        final_frame = cv2.add(final_frame_with_glow, final_logo_layer)
+        sums = np.sum(partial_sums, axis=0) if adaptive_sums else None
+        # Le statistiche dipendono dalla variante (armonizzazione, luminanza), le somme no
+        blend_stats = [advanced_blending_stats(sums, variant) if variant.ADAPTIVE_BLENDING else None
+                       for variant in blend_configs]
+        final_frame_with_glow = ctx.buffer('frame_with_glow', 3, np.uint8)
+        final_logo_layer = ctx.buffer('final_logo_layer', 3, np.uint8)
+        if fixed:
+            soft_mask, blend_band = ctx.buffer('blend_soft_mask_u8', dtype=np.uint8), _advanced_blending_band_fixed
+        else:
+            soft_mask, blend_band = ctx.buffer('blend_soft_mask'), _advanced_blending_band
+
+        def blend_variants_band(band):
+            # Le varianti di una banda condividono i buffer del blending: una dopo l'altra
+            if band in reused_bands:
+                return
+            for variant, stats, variant_output in zip(blend_configs, blend_stats, outputs):
+                blend_band(band, final_frame_with_glow, final_logo_layer, logo_mask, soft_mask, variant, stats, ctx,
+                           variant_output, logo_sdf)
+
+        tiles.map(blend_variants_band, height)
+
+    if incremental is not None:
+        incremental.end_frame(final_frame, logo_mask, current_logo_edges, output, combined_logo_edges,
+                              texture, glow_color)
+    if blend_variants is not None:
+        return outputs, combined_logo_edges, current_bg_edges
+    return output, combined_logo_edges, current_bg_edges
+
+
+# Righe di contesto per Canny + dilatazione dei traccianti del logo
+_CANNY_HALO = 16
+
+# Pesi di luminanza (BGR) per il luminance matching
+_LUMA_WEIGHTS_BGR = np.array([0.299, 0.587, 0.114])
+
+
+def _edge_mask_halo(config, blur_quality):
+    """Righe di contesto per la maschera dei bordi del blending avanzato (Canny + dilatazione + blur)."""
+    kernel_size = config.EDGE_BLUR_RADIUS // 3
+    return align_margin(_CANNY_HALO + 2 * kernel_size + blur_halo(config.EDGE_BLUR_RADIUS, blur_quality))
+
+
+def advanced_blending_sums(background_frame, logo_layer, logo_area):
+    """
+    Somme parziali per l'adaptive blending sull'area del logo (una banda o il frame):
+    [pixel, somma BGR dello sfondo, somma BGR del logo]. Si sommano tra le bande.
+    """
+    sums = np.zeros(7, dtype=np.float64)
+    sums[0] = np.count_nonzero(logo_area)
+    if sums[0] > 0:
+        sums[1:4] = background_frame[logo_area].sum(axis=0, dtype=np.float64)
+        sums[4:7] = logo_layer[logo_area].sum(axis=0, dtype=np.float64)
+    return sums
 
-    return final_frame, combined_logo_edges, current_bg_edges
 
+def advanced_blending_stats(sums, config):
+    """
+    Statistiche globali dell'adaptive blending a partire dalle somme di tutte le bande.
 
-def apply_advanced_blending(background_frame, logo_layer, logo_mask, config):
+    Returns:
+        dict con 'avg_bg_color' (per COLOR_HARMONIZATION) e 'luminance_factor'
+        (per LUMINANCE_MATCHING), oppure None se non c'è nulla da adattare
+    """
+    if not config.ADAPTIVE_BLENDING or sums[0] == 0:
+        return None
+
+    # Colori medi (0-1) di sfondo e logo nell'area del logo
+    avg_bg_color = sums[1:4] / (sums[0] * 255.0)
+    avg_logo_color = sums[4:7] / (sums[0] * 255.0)
+    stats = {'avg_bg_color': None, 'luminance_factor': None}
+
+    if config.COLOR_HARMONIZATION:
+        stats['avg_bg_color'] = avg_bg_color.astype(np.float32)
+        # L'armonizzazione è lineare: la media del logo armonizzato si ricava dalle medie
+        avg_logo_color = avg_logo_color * (1 - config.COLOR_BLENDING_STRENGTH) + \
+                         avg_bg_color * config.COLOR_BLENDING_STRENGTH
+
+    if config.LUMINANCE_MATCHING:
+        avg_bg_luminance = float(np.dot(avg_bg_color, _LUMA_WEIGHTS_BGR))
+        avg_logo_luminance = float(np.dot(avg_logo_color, _LUMA_WEIGHTS_BGR))
+        if avg_logo_luminance > 0:
+            stats['luminance_factor'] = avg_bg_luminance / avg_logo_luminance
+
+    return stats
+
+
+def apply_advanced_blending(background_frame, logo_layer, logo_mask, config, mask_blur=None, render_context=None):
     """
     Applica un blending avanzato configurabile tra la scritta e lo sfondo.
     Supporta diversi modi di blending e opzioni avanzate.
+
+    Args:
+        mask_blur: BlurPyramid opzionale della logo_mask, per riusare i livelli già
+                   calcolati per il glow
+        render_context: RenderContext opzionale con i buffer float riutilizzabili
     """
-    # Converti tutto in float32 per calcoli precisi
-    bg_frame_f = background_frame.astype(np.float32) / 255.0
-    logo_layer_f = logo_layer.astype(np.float32) / 255.0
-    
-    # 1. NUOVO: Crea maschera avanzata con rilevamento bordi
-    if config.EDGE_DETECTION_ENABLED:
-        # Rileva i bordi del logo per blending selettivo
-        logo_edges = cv2.Canny((logo_mask).astype(np.uint8), 50, 150)
-        # Espandi i bordi
-        kernel = np.ones((config.EDGE_BLUR_RADIUS//3, config.EDGE_BLUR_RADIUS//3), np.uint8)
-        logo_edges = cv2.dilate(logo_edges, kernel, iterations=2)
-        # Crea maschera sfumata per i bordi
-        edge_mask = cv2.GaussianBlur(logo_edges.astype(np.float32), 
-                                   (config.EDGE_BLUR_RADIUS, config.EDGE_BLUR_RADIUS), 0) / 255.0
+    h, w = logo_mask.shape[:2]
+    ctx = render_context or get_render_context(w, h)
+    if getattr(config, 'LOGO_MASK_MODE', 'binary') == 'coverage':
+        # La copertura a 8 bit è già la maschera morbida
+        soft_source = logo_mask
     else:
-        edge_mask = np.ones_like(logo_mask.astype(np.float32))
-    
-    # 2. Crea maschera base del logo
-    if config.EDGE_SOFTNESS % 2 == 0:
-        edge_softness = config.EDGE_SOFTNESS + 1
+        if mask_blur is None:
+            mask_blur = BlurPyramid(logo_mask, getattr(config, 'BLUR_QUALITY', 'balanced'))
+        soft_source = mask_blur.blur(config.EDGE_SOFTNESS)
+
+    if getattr(config, 'COMPOSITE_PRECISION', 'float32') == 'fixed':
+        soft_mask = _soft_mask_fixed(soft_source, ctx.buffer('blend_soft_mask_u8', dtype=np.uint8))
+        blend_band = _advanced_blending_band_fixed
     else:
-        edge_softness = config.EDGE_SOFTNESS
-    
-    soft_mask = cv2.GaussianBlur(logo_mask.astype(np.float32), 
-                                (edge_softness, edge_softness), 0) / 255.0
-    soft_mask_3ch = cv2.merge([soft_mask, soft_mask, soft_mask])
-    
-    # 3. NUOVO: Adattamento colori e luminanza
-    blended_logo = logo_layer_f.copy()
-    
+        soft_mask = np.multiply(soft_source, np.float32(1.0 / 255.0), out=ctx.buffer('blend_soft_mask'))
+        blend_band = _advanced_blending_band
+    stats = None
     if config.ADAPTIVE_BLENDING:
-        # Estrai colori dello sfondo nell'area del logo
-        logo_area_mask = logo_mask > 0
-        if np.any(logo_area_mask):
-            # Calcola colore medio dello sfondo nell'area del logo
-            bg_colors_in_logo = bg_frame_f[logo_area_mask]
-            avg_bg_color = np.mean(bg_colors_in_logo, axis=0)
-            
-            if config.COLOR_HARMONIZATION:
-                # Armonizza i colori del logo con lo sfondo
-                logo_colors = blended_logo[logo_area_mask]
-                # Mix tra colore originale del logo e colore medio dello sfondo
-                harmonized_colors = logo_colors * (1 - config.COLOR_BLENDING_STRENGTH) + \
-                                  avg_bg_color * config.COLOR_BLENDING_STRENGTH
-                blended_logo[logo_area_mask] = harmonized_colors
-            
-            if config.LUMINANCE_MATCHING:
-                # Adatta la luminosità del logo alla luminosità locale dello sfondo
-                logo_luminance = np.dot(blended_logo[..., :3], [0.299, 0.587, 0.114])
-                bg_luminance = np.dot(bg_frame_f[..., :3], [0.299, 0.587, 0.114])
-                
-                # Calcola fattore di correzione luminanza
-                avg_bg_luminance = np.mean(bg_luminance[logo_area_mask])
-                avg_logo_luminance = np.mean(logo_luminance[logo_area_mask])
-                
-                if avg_logo_luminance > 0:
-                    luminance_factor = avg_bg_luminance / avg_logo_luminance
-                    # Applica correzione con moderazione
-                    correction_strength = 0.5
-                    blended_logo[logo_area_mask] *= (1 - correction_strength + correction_strength * luminance_factor)
-    
-    # 4. NUOVO: Applica modalità di blending configurabile
-    def apply_blend_mode(base, blend, mode, strength):
-        """Applica diverse modalità di blending"""
-        base = np.clip(base, 0, 1)
-        blend = np.clip(blend, 0, 1)
-        
-        if mode == 'normal':
-            result = blend
-        elif mode == 'multiply':
-            result = base * blend
-        elif mode == 'screen':
-            result = 1 - (1 - base) * (1 - blend)
-        elif mode == 'overlay':
-            result = np.where(base < 0.5, 
-                            2 * base * blend, 
-                            1 - 2 * (1 - base) * (1 - blend))
-        elif mode == 'soft_light':
-            result = np.where(blend < 0.5,
-                            base - (1 - 2 * blend) * base * (1 - base),
-                            base + (2 * blend - 1) * (np.sqrt(base) - base))
-        elif mode == 'hard_light':
-            result = np.where(blend < 0.5,
-                            2 * base * blend,
-                            1 - 2 * (1 - base) * (1 - blend))
-        elif mode == 'color_dodge':
-            result = np.where(blend >= 1, 1, np.minimum(1, base / (1 - blend + 1e-6)))
-        elif mode == 'color_burn':
-            result = np.where(blend <= 0, 0, 1 - np.minimum(1, (1 - base) / (blend + 1e-6)))
-        elif mode == 'difference':
-            result = np.abs(base - blend)
-        elif mode == 'exclusion':
-            result = base + blend - 2 * base * blend
-        else:
-            result = blend  # Fallback to normal
-        
-        # Applica la forza del blending
-        return base * (1 - strength) + result * strength
-    
+        stats = advanced_blending_stats(advanced_blending_sums(background_frame, logo_layer, logo_mask > 0), config)
+
+    result = np.empty((h, w, 3), dtype=np.uint8)
+    blend_band(Band(0, 0, h, h), background_frame, logo_layer, logo_mask, soft_mask, config, stats, ctx, result)
+    return result
+
+
+def _soft_mask_fixed(soft_source, out):
+    """Maschera morbida uint8 0-255 (arrotondata) da una sfocatura float o dalla copertura uint8."""
+    if soft_source.dtype == np.uint8:
+        np.copyto(out, soft_source)
+        return out
+    return cv2.convertScaleAbs(soft_source, dst=out)
+
+
+def _blending_edge_mask(band, logo_mask, config, logo_sdf=None):
+    """
+    Maschera dei bordi del blending avanzato per le righe della banda (float 0-1),
+    None se EDGE_DETECTION_ENABLED è spento.
+    """
+    if not config.EDGE_DETECTION_ENABLED:
+        return None
+    if logo_sdf is not None:
+        # Banda dilatata (due passate del kernel quadrato) attorno al bordo, sfumata
+        return sdf_edge_ramp(logo_sdf[band.rows], config.EDGE_BLUR_RADIUS // 3, config.EDGE_BLUR_RADIUS)
+    blur_quality = getattr(config, 'BLUR_QUALITY', 'balanced')
+    kernel_size = config.EDGE_BLUR_RADIUS // 3
+    halo_rows, inner = band.context(_edge_mask_halo(config, blur_quality))
+    # Rileva i bordi del logo per blending selettivo
+    logo_edges = cv2.Canny((logo_mask[halo_rows]).astype(np.uint8), 50, 150)
+    # Espandi i bordi
+    kernel = np.ones((kernel_size, kernel_size), np.uint8)
+    logo_edges = cv2.dilate(logo_edges, kernel, iterations=2)
+    # Crea maschera sfumata per i bordi (stesso motore a piramide)
+    return BlurPyramid(logo_edges, blur_quality).blur(config.EDGE_BLUR_RADIUS)[inner] / 255.0
+
+
+def _advanced_blending_band(band, background_frame, logo_layer, logo_mask, soft_mask, config, stats, ctx, out,
+                            logo_sdf=None):
+    """
+    Blending avanzato sulle righe di una banda, scritto in out[band.rows].
+
+    Args:
+        background_frame, logo_layer, logo_mask: Array a frame intero (uint8)
+        soft_mask: Maschera morbida float 0-1 a frame intero (già calcolata per la banda)
+        stats: Statistiche globali di advanced_blending_stats (o None)
+        logo_sdf: Campo di distanza deformato: la maschera dei bordi diventa una rampa per pixel
+    """
+    rows = band.rows
+
+    # Converti tutto in float32 per calcoli precisi (nei buffer del RenderContext)
+    bg_frame_f = np.multiply(background_frame[rows], np.float32(1.0 / 255.0), out=ctx.buffer('blend_bg_f', 3)[rows])
+    logo_layer_f = np.multiply(logo_layer[rows], np.float32(1.0 / 255.0), out=ctx.buffer('blend_logo_f', 3)[rows])
+
+    # 1. NUOVO: Crea maschera avanzata con rilevamento bordi
+    edge_mask = _blending_edge_mask(band, logo_mask, config, logo_sdf)
+
+    # 2. Maschera base del logo (vista a tre canali per broadcasting, niente cv2.merge)
+    soft_mask_3ch = soft_mask[rows][:, :, np.newaxis]
+
+    # 3. NUOVO: Adattamento colori e luminanza
+    blended_logo = ctx.buffer('blend_logo_adapted', 3)[rows]
+    np.copyto(blended_logo, logo_layer_f)
+
+    if stats is not None:
+        # Le medie sono calcolate sull'intero frame: ogni banda applica la stessa correzione
+        logo_area_mask = logo_mask[rows] > 0
+        if stats['avg_bg_color'] is not None:
+            # Armonizza i colori del logo con lo sfondo
+            logo_colors = blended_logo[logo_area_mask]
+            # Mix tra colore originale del logo e colore medio dello sfondo
+            harmonized_colors = logo_colors * (1 - config.COLOR_BLENDING_STRENGTH) + \
+                              stats['avg_bg_color'] * config.COLOR_BLENDING_STRENGTH
+            blended_logo[logo_area_mask] = harmonized_colors
+
+        if stats['luminance_factor'] is not None:
+            # Applica correzione della luminosità con moderazione
+            correction_strength = 0.5
+            blended_logo[logo_area_mask] *= (1 - correction_strength + correction_strength * stats['luminance_factor'])
+
+    # 4. NUOVO: Modalità di blending configurabile (kernel Numba o NumPy)
+    backend = resolve_kernel_backend(getattr(config, 'KERNEL_BACKEND', 'auto'))
+
     # 5. Applica il blending nelle aree appropriate
-    logo_area_mask_3ch = soft_mask_3ch > 0.1
-    
     # Blending principale
-    bg_in_logo_area = bg_frame_f * soft_mask_3ch
-    blended_result = apply_blend_mode(bg_in_logo_area, blended_logo * soft_mask_3ch, 
-                                    config.BLENDING_MODE, config.BLENDING_STRENGTH)
-    
+    bg_in_logo_area = np.multiply(bg_frame_f, soft_mask_3ch, out=ctx.buffer('blend_bg_in_logo', 3)[rows])
+    np.multiply(blended_logo, soft_mask_3ch, out=blended_logo)
+    blended_result = apply_blend_mode(bg_in_logo_area, blended_logo,
+                                    config.BLENDING_MODE, config.BLENDING_STRENGTH, backend)
+
     # 6. Composizione finale
     # Applica trasparenza se configurata
     if config.BLEND_TRANSPARENCY > 0:
         alpha = 1.0 - config.BLEND_TRANSPARENCY
-        blended_result = blended_result * alpha + bg_frame_f * soft_mask_3ch * config.BLEND_TRANSPARENCY
-    
-    # Combina con lo sfondo
-    final_result = bg_frame_f * (1 - soft_mask_3ch) + blended_result
-    
+        blended_result *= alpha
+        bg_in_logo_area *= config.BLEND_TRANSPARENCY
+        blended_result += bg_in_logo_area
+
+    # Combina con lo sfondo: bg * (1 - soft) + blended
+    final_result = np.multiply(bg_frame_f, 1.0 - soft_mask_3ch, out=ctx.buffer('blend_final', 3)[rows])
+    final_result += blended_result
+
     # Gestione bordi con edge mask se abilitata
-    if config.EDGE_DETECTION_ENABLED:
-        edge_mask_3ch = cv2.merge([edge_mask, edge_mask, edge_mask])
+    if edge_mask is not None:
+        edge_mask_3ch = edge_mask[:, :, np.newaxis]
         # Blending più intenso sui bordi
-        edge_blended = apply_blend_mode(bg_frame_f, logo_layer_f, 
-                                      config.BLENDING_MODE, config.BLENDING_STRENGTH * 1.5)
-        final_result = final_result * (1 - edge_mask_3ch) + edge_blended * edge_mask_3ch * soft_mask_3ch
-    
-    # Riconverti a uint8 e ritorna
-    return np.clip(final_result * 255, 0, 255).astype(np.uint8)
+        edge_blended = apply_blend_mode(bg_frame_f, logo_layer_f,
+                                      config.BLENDING_MODE, config.BLENDING_STRENGTH * 1.5, backend)
+        final_result *= 1 - edge_mask_3ch
+        edge_blended *= edge_mask_3ch * soft_mask_3ch
+        final_result += edge_blended
+
+    # Riconverti a uint8 nelle righe della banda
+    final_result *= 255
+    np.clip(final_result, 0, 255, out=final_result)
+    np.copyto(out[rows], final_result, casting='unsafe')
+
+
+def _advanced_blending_band_fixed(band, background_frame, logo_layer, logo_mask, soft_mask, config, stats, ctx, out,
+                                  logo_sdf=None):
+    """
+    _advanced_blending_band a virgola fissa (COMPOSITE_PRECISION = 'fixed'): layer uint8,
+    prodotti con la maschera morbida in cv2 (arrotondati) e modo di blending da tabella 256x256.
 
+    Differenze dal percorso float32: arrotondamenti di un livello e, dove armonizzazione e
+    luminanza portano il logo oltre 255 o il blending dei bordi oltre 1, valori saturati
+    prima della miscela invece che alla fine.
+
+    Args:
+        soft_mask: Maschera morbida uint8 0-255 a frame intero (_soft_mask_fixed)
+    """
+    rows = band.rows
+    bg = background_frame[rows]
+    logo = logo_layer[rows]
+    scale = 1.0 / 255.0
+
+    edge_mask = _blending_edge_mask(band, logo_mask, config, logo_sdf)
+
+    # Maschera morbida a tre canali per i prodotti cv2
+    soft_mask_3ch = cv2.merge([soft_mask[rows]] * 3, dst=ctx.buffer('blend_soft_mask_3ch', 3, np.uint8)[rows])
+
+    # Adattamento colori e luminanza: lineare, solo sui pixel del logo
+    blended_logo = ctx.buffer('blend_logo_adapted_u8', 3, np.uint8)[rows]
+    np.copyto(blended_logo, logo)
+    if stats is not None:
+        logo_area_mask = logo_mask[rows] > 0
+        logo_colors = blended_logo[logo_area_mask].astype(np.float32)
+        if stats['avg_bg_color'] is not None:
+            logo_colors *= 1 - config.COLOR_BLENDING_STRENGTH
+            logo_colors += stats['avg_bg_color'] * np.float32(255.0 * config.COLOR_BLENDING_STRENGTH)
+        if stats['luminance_factor'] is not None:
+            correction_strength = 0.5
+            logo_colors *= (1 - correction_strength + correction_strength * stats['luminance_factor'])
+        blended_logo[logo_area_mask] = np.clip(np.rint(logo_colors), 0, 255)
+
+    # Blending principale: tabella del modo sui layer moltiplicati per la maschera
+    bg_in_logo_area = cv2.multiply(bg, soft_mask_3ch, dst=ctx.buffer('blend_bg_in_logo_u8', 3, np.uint8)[rows],
+                                   scale=scale)
+    cv2.multiply(blended_logo, soft_mask_3ch, dst=blended_logo, scale=scale)
+    index = ctx.buffer('blend_lut_index', 3, np.uint16)[rows]
+    blended_result = apply_lut(blend_mode_lut(config.BLENDING_MODE, config.BLENDING_STRENGTH),
+                               bg_in_logo_area, blended_logo, ctx.buffer('blend_result_u8', 3, np.uint8)[rows], index)
+
+    if config.BLEND_TRANSPARENCY > 0:
+        cv2.addWeighted(blended_result, 1.0 - config.BLEND_TRANSPARENCY, bg_in_logo_area, config.BLEND_TRANSPARENCY, 0,
+                        dst=blended_result)
+
+    # Combina con lo sfondo: bg * (255 - soft) / 255 + blended
+    inverse_soft = cv2.bitwise_not(soft_mask_3ch, dst=ctx.buffer('blend_inverse_u8', 3, np.uint8)[rows])
+    final_result = cv2.multiply(bg, inverse_soft, dst=out[rows], scale=scale)
+    cv2.add(final_result, blended_result, dst=final_result)
+
+    if edge_mask is not None:
+        edge_mask_3ch = cv2.merge([cv2.convertScaleAbs(edge_mask, alpha=255.0)] * 3, dst=inverse_soft)
+        # Blending più intenso sui bordi, pesato da bordi e maschera morbida
+        edge_blended = apply_lut(blend_mode_lut(config.BLENDING_MODE, config.BLENDING_STRENGTH * 1.5),
+                                 bg, logo, blended_result, index)
+        cv2.multiply(edge_blended, edge_mask_3ch, dst=edge_blended, scale=scale)
+        cv2.multiply(edge_blended, soft_mask_3ch, dst=edge_blended, scale=scale)
+        cv2.multiply(final_result, cv2.bitwise_not(edge_mask_3ch, dst=edge_mask_3ch), dst=final_result, scale=scale)
+        cv2.add(final_result, edge_blended, dst=final_result)
+
+
+def logo_mask_products(mask, config, soft_from_blur, backend='numpy'):
+    """
+    Prodotti che dipendono solo dalla maschera (o da una sua regione): traccianti del
+    logo, sfocatura del glow e, se richiesta, della maschera morbida.
+    
+    Con backend='umat' la maschera viene caricata una volta e tutta la catena
+    (Canny, dilatazione, piramide di sfocatura) resta in cv2.UMat.
+    
+    Returns:
+        dict: {'logo_tracers', 'glow_blur', 'soft_blur'} come array NumPy (o None)
+    """
+    source = upload(mask, backend)
+    mask_blur = BlurPyramid(source, getattr(config, 'BLUR_QUALITY', 'balanced'), size=mask.shape[:2])
+    return {
+        'logo_tracers': download(extract_logo_tracers(source, config)),
+        'glow_blur': download(mask_blur.blur(config.GLOW_KERNEL_SIZE)) if config.GLOW_ENABLED else None,
+        'soft_blur': download(mask_blur.blur(config.EDGE_SOFTNESS)) if soft_from_blur else None,
+    }
 
 def extract_logo_tracers(logo_mask, config):
     """
@@ -2002,6 +2240,9 @@ def initialize_lenses(config):
             'base_radius': base_radius,  # Raggio base per pulsazione
             'strength': base_strength,
             'base_strength': base_strength,  # NUOVO: forza base per pulsazione
+            # Intervalli da cui sono stati estratti raggio e forza (per l'automazione, vedi _lens_base)
+            'radius_range': (config.LENS_MIN_RADIUS, config.LENS_MAX_RADIUS),
+            'strength_range': (config.LENS_MIN_STRENGTH, config.LENS_MAX_STRENGTH),
             'angle': np.random.uniform(0, 2 * np.pi),
             'rotation_speed': np.random.uniform(-0.008, 0.008),  # Rotazione leggermente più veloce
             'pulsation_offset': np.random.uniform(0, 2 * np.pi),  # Offset fase per pulsazione asincrona
@@ -2020,7 +2261,7 @@ def initialize_lenses(config):
     
     return lenses
 
-def find_texture_file():
+def find_texture_file(config):
     """
     Cerca automaticamente un file texture con priorità: texture.tif > texture.png > texture.jpg
     Se non trova nessuno, usa il fallback configurato.
@@ -2036,18 +2277,18 @@ def find_texture_file():
             return texture_path
     
     # Se non trova nessuna texture.*, usa il fallback
-    if os.path.exists(Config.TEXTURE_FALLBACK_PATH):
-        print(f"🎨 Uso texture fallback: {Config.TEXTURE_FALLBACK_PATH}")
-        return Config.TEXTURE_FALLBACK_PATH
+    if os.path.exists(config.TEXTURE_FALLBACK_PATH):
+        print(f"🎨 Uso texture fallback: {config.TEXTURE_FALLBACK_PATH}")
+        return config.TEXTURE_FALLBACK_PATH
     
     print(f"⚠️ Nessuna texture trovata, il logo non sarà texturizzato")
     return None
 
-def get_background_frame(bg_video, frame_index):
+def get_background_frame(bg_video, frame_index, config):
     """Funzione helper per ottenere un frame di sfondo"""
     if bg_video and bg_video.isOpened():
         # Calcola il frame considerando il rallentamento
-        bg_frame_index = int(frame_index / Config.BG_SLOWDOWN_FACTOR)
+        bg_frame_index = int(frame_index / config.BG_SLOWDOWN_FACTOR)
         bg_video.set(cv2.CAP_PROP_POS_FRAMES, bg_frame_index)
         ret, bg_frame = bg_video.read()
         
@@ -2055,7 +2296,7 @@ def get_background_frame(bg_video, frame_index):
             return bg_frame
     
     # Fallback: frame nero
-    return np.zeros((Config.HEIGHT, Config.WIDTH, 3), dtype=np.uint8)
+    return np.zeros((config.HEIGHT, config.WIDTH, 3), dtype=np.uint8)
 
 def load_texture_wrapper(texture_path, width, height):
     """Wrapper per la funzione load_texture"""
@@ -2117,131 +2358,26 @@ def print_blending_options():
     
     print()
 
-def load_config_from_file():
-    """Carica i parametri dal file config se esiste"""
-    config_file = "config"
-    if not os.path.exists(config_file):
-        print("📄 File config non trovato, uso valori di default")
-        return
-    
-    print("📄 Caricamento parametri dal file config...")
-    
-    try:
-        with open(config_file, 'r') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    try:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        # Separa il valore dal commento
-                        if '#' in value:
-                            value = value.split('#')[0].strip()
-                        else:
-                            value = value.strip()
-                        
-                        # Rimuove le virgolette se presenti
-                        value = value.strip('"\'')
-                        
-                        # Converti il valore nel tipo appropriato e gestisci parametri speciali
-                        # Gestione speciale per parametri BGR (prima del controllo hasattr)
-                        if key == 'LOGO_COLOR_B':
-                            current_color = list(Config.LOGO_COLOR)
-                            current_color[0] = int(value)
-                            Config.LOGO_COLOR = tuple(current_color)
-                        elif key == 'LOGO_COLOR_G':
-                            current_color = list(Config.LOGO_COLOR)
-                            current_color[1] = int(value)
-                            Config.LOGO_COLOR = tuple(current_color)
-                        elif key == 'LOGO_COLOR_R':
-                            current_color = list(Config.LOGO_COLOR)
-                            current_color[2] = int(value)
-                            Config.LOGO_COLOR = tuple(current_color)
-                        elif key == 'TRACER_BASE_COLOR_B':
-                            current_color = list(Config.TRACER_BASE_COLOR)
-                            current_color[0] = int(value)
-                            Config.TRACER_BASE_COLOR = tuple(current_color)
-                        elif key == 'TRACER_BASE_COLOR_G':
-                            current_color = list(Config.TRACER_BASE_COLOR)
-                            current_color[1] = int(value)
-                            Config.TRACER_BASE_COLOR = tuple(current_color)
-                        elif key == 'TRACER_BASE_COLOR_R':
-                            current_color = list(Config.TRACER_BASE_COLOR)
-                            current_color[2] = int(value)
-                            Config.TRACER_BASE_COLOR = tuple(current_color)
-                        elif key == 'BG_TRACER_BASE_COLOR_B':
-                            current_color = list(Config.BG_TRACER_BASE_COLOR)
-                            current_color[0] = int(value)
-                            Config.BG_TRACER_BASE_COLOR = tuple(current_color)
-                        elif key == 'BG_TRACER_BASE_COLOR_G':
-                            current_color = list(Config.BG_TRACER_BASE_COLOR)
-                            current_color[1] = int(value)
-                            Config.BG_TRACER_BASE_COLOR = tuple(current_color)
-                        elif key == 'BG_TRACER_BASE_COLOR_R':
-                            current_color = list(Config.BG_TRACER_BASE_COLOR)
-                            current_color[2] = int(value)
-                            Config.BG_TRACER_BASE_COLOR = tuple(current_color)
-                        elif key == 'AUDIO_FILES':
-                            if ',' in value:
-                                Config.AUDIO_FILES = [item.strip() for item in value.split(',')]
-                            else:
-                                Config.AUDIO_FILES = [value]
-                        elif hasattr(Config, key):
-                            current_value = getattr(Config, key)
-                            
-                            # Converti in base al tipo dell'attributo esistente
-                            if isinstance(current_value, bool):
-                                new_value = value.lower() in ('true', '1', 'yes', 'on')
-                            elif isinstance(current_value, int):
-                                new_value = int(value)
-                            elif isinstance(current_value, float):
-                                new_value = float(value)
-                            elif isinstance(current_value, str):
-                                new_value = value
-                            elif isinstance(current_value, tuple):
-                                # Per i colori BGR
-                                if key.endswith('_COLOR_B') or key.endswith('_COLOR_G') or key.endswith('_COLOR_R'):
-                                    current_color = list(getattr(Config, key.rsplit('_', 1)[0]))
-                                    if key.endswith('_B'):
-                                        current_color[0] = int(value)
-                                    elif key.endswith('_G'):
-                                        current_color[1] = int(value)
-                                    elif key.endswith('_R'):
-                                        current_color[2] = int(value)
-                                    setattr(Config, key.rsplit('_', 1)[0], tuple(current_color))
-                                    continue
-                            elif isinstance(current_value, list):
-                                # Per liste di file audio
-                                if ',' in value:
-                                    new_value = [item.strip() for item in value.split(',')]
-                                else:
-                                    new_value = [value]
-                            else:
-                                new_value = value
-                            
-                            # Imposta il valore normalmente per parametri standard
-                            setattr(Config, key, new_value)
-                        else:
-                            print(f"⚠️  Parametro sconosciuto '{key}' alla riga {line_num}")
-                    except Exception as e:
-                        print(f"⚠️  Errore nel parsing della riga {line_num}: {line} ({e})")
-        
-        # Ricalcola i valori dipendenti
-        if Config.TEST_MODE:
-            Config.FPS = 1
-            Config.DURATION_SECONDS = 4
-        Config.TOTAL_FRAMES = Config.DURATION_SECONDS * Config.FPS
-        
-        print("✅ Configurazione caricata dal file config")
+def main(argv=None):
+    """
+    Funzione principale per generare l'animazione del logo.
     
-    except Exception as e:
-        print(f"⚠️  Errore nel caricamento del file config: {e}")
-        print("📄 Uso valori di default")
+    Args:
+        argv: Argomenti da linea di comando (default: sys.argv[1:]); il daemon di
+              rendering la chiama più volte nello stesso processo
 
-def main():
-    """Funzione principale per generare l'animazione del logo."""
+    Raises:
+        SystemExit: Codice 1 se il render fallisce (argomenti, logo o codec), così
+                    la CLI e il daemon riportano l'errore a chi li ha chiamati
+    """
     import os  # Assicuriamoci che os sia disponibile
     import sys  # Assicuriamoci che sys sia disponibile
+    global _audio_smoothing_state
+    
+    # Smoothing audio da zero a ogni render: il daemon e il riavvio della preview chiamano
+    # main più volte nello stesso processo, e lo stato del render precedente cambierebbe
+    # i primi frame (e l'avanzamento veloce di --frames) rispetto a un render da CLI
+    _audio_smoothing_state = AudioSmoothingState()
     
     # --- Parsing degli argomenti da linea di comando ---
     parser = argparse.ArgumentParser(description='Crystal Therapy Video Generator')
@@ -2249,29 +2385,92 @@ def main():
                        help='Avvia modalità Live Preview')
     parser.add_argument('--test', action='store_true',
                        help='Modalità test rapida (5 secondi)')
-    args = parser.parse_args()
+    parser.add_argument('--frames', metavar='START:END',
+                       help='Renderizza solo i frame START..END-1 (es. 80:120, 80:, :40)')
+    parser.add_argument('--still', type=int, metavar='N',
+                       help='Renderizza solo il frame N in un PNG')
+    parser.add_argument('--png', action='store_true',
+                       help='Con --frames salva una sequenza PNG invece di una clip')
+    parser.add_argument('--seed', type=int,
+                       help='Seed casuale (lenti, random start, audio) per ri-renderizzare gli stessi frame')
+    parser.add_argument('--outputs', metavar='PROFILI',
+                       help="Varianti codificate in parallelo dallo stesso render, es. master,whatsapp,preview (default: OUTPUT_PROFILES)")
+    parser.add_argument('--incremental', action='store_true',
+                       help="Composizione incrementale: ricalcola solo le zone cambiate rispetto al frame precedente")
+    parser.add_argument('--verify-incremental', action='store_true',
+                       help="Con --incremental confronta ogni frame con la composizione completa (più lento)")
+    parser.add_argument('--frame-store', action='store_true',
+                       help="Salva anche i frame grezzi (.npy memory-mapped) per export successivi senza re-render")
+    parser.add_argument('--progress', choices=PROGRESS_MODES,
+                       help="Avanzamento: barra, testo semplice, righe JSON per lo scheduler o nessuno (default: PROGRESS_MODE)")
+    parser.add_argument('--cv-backend', choices=CV_BACKENDS,
+                       help="Array delle fasi solo-cv2: NumPy o cv2.UMat (OpenCV T-API) (default: CV_BACKEND)")
+    parser.add_argument('--compare-presets', nargs='?', const='all', metavar='PRESET',
+                       help="Foglio di confronto dei preset di blending (tutti, o es. soft,dramatic): "
+                            "ogni frame è composto una volta e miscelato con ciascun preset")
+    parser.add_argument('--precision', choices=COMPOSITE_PRECISIONS,
+                       help="Composizione in float32 o a virgola fissa uint8/uint16 (default: COMPOSITE_PRECISION)")
+    parser.add_argument('--automation', metavar='JSON',
+                       help="Keyframe e curve per i parametri del config (default: AUTOMATION_FILE)")
+    parser.add_argument('--export-timeline', metavar='CSV',
+                       help="Scrive i parametri dinamici di ogni frame in un CSV (per grafici e tuning) ed esce")
+    args = parser.parse_args(argv)
+    
+    # 🎲 Seed: rende ripetibili lenti, inizio sfondo e selezione audio
+    seed = args.seed if args.seed is not None else int(np.random.randint(0, 2**31 - 1))
+    np.random.seed(seed)
+    print(f"🎲 Seed: {seed} (usa --seed {seed} per ri-renderizzare gli stessi frame)")
     
     # --- Carica configurazione dal file config ---
-    load_config_from_file()
+    settings = load_settings("config")
     
     # Applica le opzioni dalla linea di comando (override del config file)
     if args.test:
-        Config.TEST_MODE = True
-        Config.FPS = 1
-        Config.DURATION_SECONDS = 4
-        Config.TOTAL_FRAMES = Config.DURATION_SECONDS * Config.FPS
+        settings = settings.replace(TEST_MODE=True, FPS=1, DURATION_SECONDS=4)
     
     if args.preview:
-        Config.PREVIEW_MODE = True
+        settings = settings.replace(PREVIEW_MODE=True)
         print("🌊 Modalità LIVE PREVIEW attivata!")
     
+    if args.progress:
+        settings = settings.replace(PROGRESS_MODE=args.progress)
+    
+    if args.cv_backend:
+        settings = settings.replace(CV_BACKEND=args.cv_backend)
+    
+    if args.precision:
+        settings = settings.replace(COMPOSITE_PRECISION=args.precision)
+    if settings.COMPOSITE_PRECISION not in COMPOSITE_PRECISIONS:
+        raise ValueError(f"COMPOSITE_PRECISION sconosciuta: {settings.COMPOSITE_PRECISION} "
+                         f"(valide: {', '.join(COMPOSITE_PRECISIONS)})")
+    if settings.COMPOSITE_PRECISION == 'fixed':
+        print("🔢 Composizione a virgola fissa (uint8/uint16 e tabelle di blending)")
+    
+    # Backend dei kernel pronto nel thread principale (pool di Numba incluso)
+    prepare_kernel_backend(settings.KERNEL_BACKEND)
+    cv_backend_status = describe_cv_backend(settings.CV_BACKEND)
+    if cv_backend_status:
+        print(cv_backend_status)
+    
+    # --- Intervallo di frame richiesto (--frames / --still) ---
+    try:
+        if args.still is not None:
+            frame_start, frame_end = parse_frame_range(f"{args.still}:{args.still + 1}", settings.TOTAL_FRAMES)
+        elif args.frames:
+            frame_start, frame_end = parse_frame_range(args.frames, settings.TOTAL_FRAMES)
+        else:
+            frame_start, frame_end = 0, settings.TOTAL_FRAMES
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    partial_render = (frame_start, frame_end) != (0, settings.TOTAL_FRAMES)
+    png_output = args.still is not None or args.png
+    
     # --- Codici ANSI per colori e stili nel terminale ---
     C_CYAN = '\033[96m'
     C_GREEN = '\033[92m'
     C_YELLOW = '\033[93m'
     C_BLUE = '\033[94m'
-    C_MAGENTA = '\033[95m'
-    C_RED = '\033[91m'  # Aggiungo colore rosso
     C_BOLD = '\033[1m'
     C_END = '\033[0m'
     SPINNER_CHARS = ['🔮', '✨', '🌟', '💎']
@@ -2280,123 +2479,149 @@ def main():
     print_blending_options()
     
     # Assicurati che la cartella test esista se siamo in TEST_MODE
-    if Config.TEST_MODE:
+    if settings.TEST_MODE:
         test_dir = "output/test"
         if not os.path.exists(test_dir):
             os.makedirs(test_dir)
             print(f"📁 Creata cartella: {test_dir}")
 
     # 🎨 APPLICA PRESET BLENDING AUTOMATICO
-    apply_blending_preset(Config)
+    settings = apply_blending_preset(settings)
+
+    # 🗂️ Confronto dei preset: un foglio con il blending del config e ogni preset per frame
+    compare_presets = None
+    if args.compare_presets:
+        try:
+            compare_presets = parse_preset_names(args.compare_presets)
+        except ValueError as e:
+            print(f"❌ {e}")
+            raise SystemExit(1)
+        if not settings.ADVANCED_BLENDING:
+            print("ℹ️ I preset agiscono sul blending avanzato: ADVANCED_BLENDING attivato per il confronto")
+            settings = settings.replace(ADVANCED_BLENDING=True)
+        print(f"🗂️ Confronto preset: config ({settings.BLENDING_PRESET}) + {', '.join(compare_presets)}")
+
+    # 🎚️ Automazione: curve di tutti i frame valutate prima del render
+    try:
+        automation = load_automation(args.automation or settings.AUTOMATION_FILE, settings)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    automation_curves = automation.evaluate(settings.TOTAL_FRAMES)
+    if automation:
+        print(f"🎚️ Automazione da {automation.source}: {automation.describe()}")
+    
+    # 📈 Export della timeline dei parametri dinamici (senza render)
+    if args.export_timeline:
+        timeline = ParameterTimeline(settings, settings.TOTAL_FRAMES, automation_curves)
+        timeline.to_csv(args.export_timeline, fps=settings.FPS)
+        print(f"📈 Timeline di {len(timeline)} frame salvata in {args.export_timeline}")
+        return
 
     # NUOVO: Calcola dimensioni del video dalle dimensioni SVG + padding
-    svg_width, svg_height = get_svg_dimensions(Config.SVG_PATH)
+    svg_width, svg_height = get_svg_dimensions(settings.SVG_PATH)
 
     # 📱 FORMATO INSTAGRAM STORIES (9:16)
-    if Config.INSTAGRAM_STORIES_MODE:
-        if Config.TEST_MODE:
+    if settings.INSTAGRAM_STORIES_MODE:
+        if settings.TEST_MODE:
             # Versione ridotta per test: 540x960 (metà di 1080x1920)
-            Config.WIDTH = 540
-            Config.HEIGHT = 960
+            settings = settings.replace(WIDTH=540, HEIGHT=960)
         else:
             # Formato Instagram Stories standard: 1080x1920
-            Config.WIDTH = 1080
-            Config.HEIGHT = 1920
+            settings = settings.replace(WIDTH=1080, HEIGHT=1920)
         format_info = "Instagram Stories (9:16)"
     else:
         # Formato tradizionale basato su dimensioni SVG
-        Config.WIDTH = svg_width + (Config.SVG_PADDING * 2)
-        Config.HEIGHT = svg_height + (Config.SVG_PADDING * 2)
+        settings = settings.replace(WIDTH=svg_width + (settings.SVG_PADDING * 2),
+                                    HEIGHT=svg_height + (settings.SVG_PADDING * 2))
         format_info = "SVG-based"
     
     print(f"{C_BOLD}{C_CYAN}🌊 Avvio rendering Crystal Therapy - SVG CENTRATO...{C_END}")
     print(f"📐 Dimensioni SVG: {svg_width}x{svg_height}")
-    print(f"📐 Dimensioni video: {Config.WIDTH}x{Config.HEIGHT} (formato: {format_info})")
-    if Config.INSTAGRAM_STORIES_MODE and not Config.TEST_MODE:
+    print(f"📐 Dimensioni video: {settings.WIDTH}x{settings.HEIGHT} (formato: {format_info})")
+    if settings.INSTAGRAM_STORIES_MODE and not settings.TEST_MODE:
         print(f"📱 INSTAGRAM STORIES: Formato verticale ottimizzato per mobile")
-    if Config.SVG_PADDING and not Config.INSTAGRAM_STORIES_MODE:
-        print(f"🎨 Padding SVG: {Config.SVG_PADDING}px")
-    if Config.TEST_MODE:
-        print(f"🎬 TEST MODE: 10fps, {Config.DURATION_SECONDS}s, risoluzione ridotta per velocità")
+    if settings.SVG_PADDING and not settings.INSTAGRAM_STORIES_MODE:
+        print(f"🎨 Padding SVG: {settings.SVG_PADDING}px")
+    if settings.TEST_MODE:
+        print(f"🎬 TEST MODE: 10fps, {settings.DURATION_SECONDS}s, risoluzione ridotta per velocità")
     else:
-        print(f"🎬 PRODUZIONE: 30fps, {Config.DURATION_SECONDS}s, risoluzione completa")
-    source_type = "SVG vettoriale" if Config.USE_SVG_SOURCE else "PDF rasterizzato"
+        print(f"🎬 PRODUZIONE: 30fps, {settings.DURATION_SECONDS}s, risoluzione completa")
+    source_type = "SVG vettoriale" if settings.USE_SVG_SOURCE else "PDF rasterizzato"
     print(f"📄 Sorgente: {source_type} con smoothing ottimizzato")
-    print(f"🎥 Video sfondo: ORIGINALE senza crop, rallentato {Config.BG_SLOWDOWN_FACTOR}x")
+    print(f"🎥 Video sfondo: ORIGINALE senza crop, rallentato {settings.BG_SLOWDOWN_FACTOR}x")
     print(f"✨ Traccianti + Blending + Glow COMPATIBILE")
     print(f"� Variazione dinamica + codec video testati")
     print(f"💎 RENDERING MOVIMENTO GARANTITO per compatibilità VLC/QuickTime!")
     
     # Carica contorni da SVG o PDF
-    if Config.USE_SVG_SOURCE:
-        if Config.INSTAGRAM_STORIES_MODE:
+    if settings.USE_SVG_SOURCE:
+        if settings.INSTAGRAM_STORIES_MODE:
             # Per Instagram Stories, centra il logo nel formato verticale con spostamento a destra
-            horizontal_margin = (Config.WIDTH - svg_width) // 2
+            horizontal_margin = (settings.WIDTH - svg_width) // 2
             # Riduci un po' il margine sinistro per spostare il logo leggermente a destra
-            right_shift = 10 if Config.TEST_MODE else 20
-            effective_padding = max(Config.SVG_PADDING, horizontal_margin - right_shift)
-            contours, hierarchy = extract_contours_from_svg(Config.SVG_PATH, Config.WIDTH, Config.HEIGHT, effective_padding, Config.SVG_LEFT_PADDING, Config.LOGO_ZOOM_FACTOR)
+            right_shift = 10 if settings.TEST_MODE else 20
+            effective_padding = max(settings.SVG_PADDING, horizontal_margin - right_shift)
+            contours, hierarchy = extract_contours_from_svg(settings.SVG_PATH, settings.WIDTH, settings.HEIGHT, effective_padding, settings.SVG_LEFT_PADDING, settings.LOGO_ZOOM_FACTOR, settings.LOGO_RASTER_OVERSAMPLE)
         else:
-            contours, hierarchy = extract_contours_from_svg(Config.SVG_PATH, Config.WIDTH, Config.HEIGHT, Config.SVG_PADDING, Config.SVG_LEFT_PADDING, Config.LOGO_ZOOM_FACTOR)
+            contours, hierarchy = extract_contours_from_svg(settings.SVG_PATH, settings.WIDTH, settings.HEIGHT, settings.SVG_PADDING, settings.SVG_LEFT_PADDING, settings.LOGO_ZOOM_FACTOR, settings.LOGO_RASTER_OVERSAMPLE)
     else:
-        if Config.INSTAGRAM_STORIES_MODE:
+        if settings.INSTAGRAM_STORIES_MODE:
             # Per Instagram Stories, centra il logo nel formato verticale con spostamento a destra
-            horizontal_margin = (Config.WIDTH - svg_width) // 2
+            horizontal_margin = (settings.WIDTH - svg_width) // 2
             # Riduci un po' il margine sinistro per spostare il logo leggermente a destra
-            right_shift = 10 if Config.TEST_MODE else 20
-            effective_padding = max(Config.SVG_PADDING, horizontal_margin - right_shift)
-            contours, hierarchy = extract_contours_from_pdf(Config.PDF_PATH, Config.WIDTH, Config.HEIGHT, effective_padding, Config.LOGO_ZOOM_FACTOR)
+            right_shift = 10 if settings.TEST_MODE else 20
+            effective_padding = max(settings.SVG_PADDING, horizontal_margin - right_shift)
+            contours, hierarchy = extract_contours_from_pdf(settings.PDF_PATH, settings.WIDTH, settings.HEIGHT, effective_padding, settings.LOGO_ZOOM_FACTOR, settings.LOGO_RASTER_OVERSAMPLE)
         else:
-            contours, hierarchy = extract_contours_from_pdf(Config.PDF_PATH, Config.WIDTH, Config.HEIGHT, Config.SVG_PADDING, Config.LOGO_ZOOM_FACTOR)
+            contours, hierarchy = extract_contours_from_pdf(settings.PDF_PATH, settings.WIDTH, settings.HEIGHT, settings.SVG_PADDING, settings.LOGO_ZOOM_FACTOR, settings.LOGO_RASTER_OVERSAMPLE)
 
     if not contours:
-        source_name = "SVG" if Config.USE_SVG_SOURCE else "PDF"
+        source_name = "SVG" if settings.USE_SVG_SOURCE else "PDF"
         print(f"Errore critico: nessun contorno valido trovato nel {source_name}. Uscita.")
-        return
+        raise SystemExit(1)
 
     print("Estrazione contorni riuscita.")
 
     # --- MODALITÀ LIVE PREVIEW ---
-    if Config.PREVIEW_MODE:
+    if settings.PREVIEW_MODE:
         print("🌊 Avviando modalità Live Preview...")
         
         # Avvia la preview
-        result = run_preview_mode(
-            Config, render_frame, contours, hierarchy, Config.WIDTH, Config.HEIGHT,
+        result, settings = run_preview_mode(
+            settings, render_frame, contours, hierarchy, settings.WIDTH, settings.HEIGHT,
             get_background_frame, load_texture_wrapper, initialize_lenses, load_audio_wrapper
         )
         
         if result == 'RESTART_SCRIPT':
-            print("🔄 RESTART COMPLETO RICHIESTO - Rilanciando script...")
-            import sys
-            import os
-            # Rilancia lo script con gli stessi parametri
-            os.execv(sys.executable, [sys.executable] + sys.argv)
+            print("🔄 RESTART COMPLETO RICHIESTO - Ricarico config e logo nello stesso processo...")
+            # Niente os.execv: moduli, texture e cache restano caldi
+            return main(argv)
         elif result:
             print("🎬 Utente ha richiesto generazione video completo!")
             print("🚀 Passaggio a modalità produzione...")
             # Disabilita preview mode e continua con il rendering normale
-            Config.PREVIEW_MODE = False
+            settings = settings.replace(PREVIEW_MODE=False)
         else:
             print("👋 Uscita dalla Live Preview")
             return
 
     # --- Caricamento Texture (se abilitata) ---
     texture_image = None
-    if Config.TEXTURE_ENABLED:
+    if settings.TEXTURE_ENABLED:
         # Prima cerca la texture automaticamente
-        texture_path = find_texture_file()
+        texture_path = find_texture_file(settings)
         # Poi carica la texture trovata (o fallback se non trovata)
-        texture_image = load_texture(texture_path, Config.WIDTH, Config.HEIGHT)
+        texture_image = load_texture(texture_path, settings.WIDTH, settings.HEIGHT)
         if texture_image is not None:
             print("Texture infusa con l'essenza del Natisone - Creata dal team Alex Ortiga, TV Int, Iaia & Friend.")
     else:
         print("La texturizzazione del logo è disabilitata.")
 
     # --- Apertura Video di Sfondo ---
-    bg_video = cv2.VideoCapture(Config.BACKGROUND_VIDEO_PATH)
+    bg_video = cv2.VideoCapture(settings.BACKGROUND_VIDEO_PATH)
     if not bg_video.isOpened():
-        print(f"Errore: impossibile aprire il video di sfondo in {Config.BACKGROUND_VIDEO_PATH}")
+        print(f"Errore: impossibile aprire il video di sfondo in {settings.BACKGROUND_VIDEO_PATH}")
         # Crea uno sfondo nero di fallback
         bg_video = None
         bg_start_frame = 0
@@ -2408,9 +2633,9 @@ def main():
         
         # 🎲 RANDOM START: Calcola frame di inizio casuale (max 2/3 del video)
         bg_start_frame = 0
-        if Config.BG_RANDOM_START and bg_total_frames > Config.TOTAL_FRAMES:
+        if settings.BG_RANDOM_START and bg_total_frames > settings.TOTAL_FRAMES:
             # Calcola quanti frame servono considerando il rallentamento
-            frames_needed = int(Config.TOTAL_FRAMES / Config.BG_SLOWDOWN_FACTOR) + 1
+            frames_needed = int(settings.TOTAL_FRAMES / settings.BG_SLOWDOWN_FACTOR) + 1
             # Assicurati di avere abbastanza frame rimanenti per il rendering
             max_start_frame = max(0, int(bg_total_frames * 2/3) - frames_needed)
             if max_start_frame > 0:
@@ -2419,63 +2644,105 @@ def main():
                 end_time = start_time + (frames_needed / bg_fps)
                 print(f"🎬 Video sfondo: {bg_total_frames} frame @ {bg_fps}fps")
                 print(f"🎲 Inizio casuale da frame {bg_start_frame} ({start_time:.1f}s -> {end_time:.1f}s)")
-                print(f"📊 Frame necessari: {frames_needed} (con rallentamento {Config.BG_SLOWDOWN_FACTOR}x)")
+                print(f"📊 Frame necessari: {frames_needed} (con rallentamento {settings.BG_SLOWDOWN_FACTOR}x)")
             else:
                 print(f"🎬 Video sfondo: {bg_total_frames} frame @ {bg_fps}fps")
                 print(f"⚠️ Video troppo corto per random start")
         else:
             print(f"🎬 Video sfondo: {bg_total_frames} frame @ {bg_fps}fps")
-            if not Config.BG_RANDOM_START:
+            if not settings.BG_RANDOM_START:
                 print(f"🔄 Inizio dal primo frame (random start disabilitato)")
         
-        print(f"🐌 RALLENTAMENTO ATTIVATO: Video sfondo {Config.BG_SLOWDOWN_FACTOR}x più lento")
+        print(f"🐌 RALLENTAMENTO ATTIVATO: Video sfondo {settings.BG_SLOWDOWN_FACTOR}x più lento")
     
     # Setup video writer con codec ottimizzato per WhatsApp
-    if Config.WHATSAPP_COMPATIBLE:
+    if settings.WHATSAPP_COMPATIBLE:
         # H.264 è il migliore per WhatsApp
         fourcc = cv2.VideoWriter_fourcc(*'H264')  # Priorità H264 per WhatsApp
         print("🔄 Usando H.264 per compatibilità WhatsApp...")
     else:
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # Fallback generico
         
-    output_filename = get_timestamp_filename()
-    out = cv2.VideoWriter(output_filename, fourcc, Config.FPS, (Config.WIDTH, Config.HEIGHT))
+    output_filename = get_timestamp_filename(settings)
+    if args.still is not None:
+        output_filename = output_filename.replace('.mp4', f"_f{frame_start:04d}.mp4")
+    elif partial_render:
+        # Intervallo parziale: il nome riporta i frame renderizzati
+        output_filename = output_filename.replace('.mp4', f"_f{frame_start:04d}-{frame_end - 1:04d}.mp4")
+    if compare_presets:
+        output_filename = output_filename.replace('.mp4', "_presets.mp4")
     
-    if not out.isOpened():
-        print("TENTATIVO 1 FALLITO. Provo con mp4v...")
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(output_filename, fourcc, Config.FPS, (Config.WIDTH, Config.HEIGHT))
-        
-    if not out.isOpened():
-        print("TENTATIVO 2 FALLITO. Provo con XVID...")
-        fourcc = cv2.VideoWriter_fourcc(*'XVID')
-        out = cv2.VideoWriter(output_filename, fourcc, Config.FPS, (Config.WIDTH, Config.HEIGHT))
+    # Varianti (master, WhatsApp, anteprima) codificate insieme al video principale
+    try:
+        if args.outputs is not None:
+            output_profiles = parse_output_profiles(args.outputs)
+        else:
+            output_profiles = parse_output_profiles(settings.OUTPUT_PROFILES)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    
+    out = None
+    png_dir = None
+    if args.still is not None:
+        # Singolo fotogramma: un PNG accanto ai video
+        png_path = output_filename.replace('.mp4', '.png')
+        print(f"🖼️ Output PNG: {png_path}")
+    elif png_output:
+        # Fotogrammi singoli in PNG (niente encoder video)
+        png_dir = output_filename.replace('.mp4', '_frames')
+        os.makedirs(png_dir, exist_ok=True)
+        print(f"🖼️ Output PNG in: {png_dir}")
+    else:
+        out = cv2.VideoWriter(output_filename, fourcc, settings.FPS, (settings.WIDTH, settings.HEIGHT))
         
-    if not out.isOpened():
-        print("ERRORE CRITICO: Nessun codec video funziona!")
-        return
+        if not out.isOpened():
+            print("TENTATIVO 1 FALLITO. Provo con mp4v...")
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            out = cv2.VideoWriter(output_filename, fourcc, settings.FPS, (settings.WIDTH, settings.HEIGHT))
+            
+        if not out.isOpened():
+            print("TENTATIVO 2 FALLITO. Provo con XVID...")
+            fourcc = cv2.VideoWriter_fourcc(*'XVID')
+            out = cv2.VideoWriter(output_filename, fourcc, settings.FPS, (settings.WIDTH, settings.HEIGHT))
+            
+        if not out.isOpened():
+            print("ERRORE CRITICO: Nessun codec video funziona!")
+            raise SystemExit(1)
+    
+    # Con output PNG non ci sono video da declinare in varianti
+    variants = MultiEncoder(output_profiles if out is not None else [], output_filename,
+                            settings.WIDTH, settings.HEIGHT, settings.FPS, queue_size=settings.PIPELINE_QUEUE_SIZE)
+    
+    # --- Archivio dei frame grezzi: WhatsApp, GIF e altri mix audio senza re-render ---
+    frame_store = None
+    if args.frame_store or settings.FRAME_STORE_ENABLED:
+        store_path = output_filename.replace('.mp4', '_store')
+        frame_store = FrameStore.create(store_path, frame_end - frame_start, settings.WIDTH, settings.HEIGHT,
+                                        settings.FPS, frame_start)
+        print(f"🗃️ Archivio frame grezzi: {store_path} ({frame_store.size_bytes / 1024**3:.2f} GB su disco)")
     
     # --- Inizializzazione Effetti ---
-    tracer_history = deque(maxlen=Config.TRACER_TRAIL_LENGTH)
+    tracer_history = deque(maxlen=settings.TRACER_TRAIL_LENGTH)
     
     # --- NUOVO: Inizializzazione Traccianti Sfondo ---
-    bg_tracer_history = deque(maxlen=getattr(Config, 'BG_TRACER_TRAIL_LENGTH', 35))
+    bg_tracer_history = deque(maxlen=getattr(settings, 'BG_TRACER_TRAIL_LENGTH', 35))
 
     # --- Inizializzazione per Effetto Lenti (NUOVO) ---
     lenses = []
-    if Config.LENS_DEFORMATION_ENABLED:
-        lenses = initialize_lenses(Config)
+    if settings.LENS_DEFORMATION_ENABLED:
+        lenses = initialize_lenses(settings)
         print(f"🌊 Liberate {len(lenses)} creature liquide per Alex Ortiga... texturizzizando con TVInt")
 
     # --- NUOVO: Caricamento e Analisi Audio ---
     audio_data = None
-    if Config.AUDIO_ENABLED:
+    if settings.AUDIO_ENABLED:
         audio_data = load_audio_analysis(
-            Config.AUDIO_FILES, 
-            Config.DURATION_SECONDS, 
-            Config.FPS,
-            Config.AUDIO_RANDOM_SELECTION,
-            Config.AUDIO_RANDOM_START
+            settings.AUDIO_FILES, 
+            settings.DURATION_SECONDS, 
+            settings.FPS,
+            settings.AUDIO_RANDOM_SELECTION,
+            settings.AUDIO_RANDOM_START
         )
         if audio_data:
             print(f"🎵 Audio caricato: reattività lenti attivata con {len(lenses)} elementi sincronizzati")
@@ -2487,101 +2754,178 @@ def main():
     else:
         print("🔇 Audio disabilitato nella configurazione")
 
-    print(f"Rendering dell'animazione in corso... ({Config.TOTAL_FRAMES} frame da elaborare)")
-    start_time = time.time()
-    
-    try:
-        for i in range(Config.TOTAL_FRAMES):
-            # --- Gestione Frame di Sfondo con RALLENTAMENTO ---
-            if bg_video:
-                # NUOVO: Calcola il frame del video di sfondo rallentato con offset casuale
-                bg_frame_index = bg_start_frame + int(i / Config.BG_SLOWDOWN_FACTOR)
-                
-                # Controllo di sicurezza: assicurati che il frame sia valido
-                if bg_frame_index >= bg_total_frames:
-                    # Se superiamo la fine, torna al punto di partenza casuale
-                    bg_frame_index = bg_start_frame + (bg_frame_index - bg_start_frame) % (bg_total_frames - bg_start_frame)
-                
-                # Imposta la posizione nel video di sfondo
-                bg_video.set(cv2.CAP_PROP_POS_FRAMES, bg_frame_index)
-                ret, bg_frame = bg_video.read()
-                
-                # Doppio controllo di sicurezza
-                if not ret:
-                    print(f"⚠️ Errore lettura frame {bg_frame_index}, riavvolgendo...")
-                    bg_video.set(cv2.CAP_PROP_POS_FRAMES, bg_start_frame)
-                    ret, bg_frame = bg_video.read()
-                    if not ret:
-                        # Ultima risorsa: crea frame nero
-                        bg_frame = np.zeros((Config.HEIGHT, Config.WIDTH, 3), dtype=np.uint8)
-                # RIMOSSO: Non ridimensionare qui, lo fa process_background
-                # bg_frame = cv2.resize(bg_frame, (Config.WIDTH, Config.HEIGHT))
-            else:
-                # Crea uno sfondo nero se non c'è video
-                bg_frame = np.zeros((Config.HEIGHT, Config.WIDTH, 3), dtype=np.uint8)
+    # Ultimo frame di sfondo decodificato: con il rallentamento lo stesso frame serve più
+    # volte e i successivi si leggono in sequenza, senza seek (costoso) a ogni frame
+    bg_decode_state = {'index': None, 'frame': None}
 
-            frame_result = render_frame(contours, hierarchy, Config.WIDTH, Config.HEIGHT, i, Config.TOTAL_FRAMES, Config, bg_frame, texture_image, tracer_history, bg_tracer_history, lenses, audio_data)
-            
-            if len(frame_result) == 3:
-                frame, current_logo_edges, current_bg_edges = frame_result
-            else:
-                frame, current_logo_edges = frame_result
-                current_bg_edges = None
+    def read_background_frame(i):
+        """Frame di sfondo grezzo per il frame i del video (con rallentamento e random start)."""
+        # --- Gestione Frame di Sfondo con RALLENTAMENTO ---
+        if bg_video:
+            # NUOVO: Calcola il frame del video di sfondo rallentato con offset casuale
+            bg_frame_index = bg_start_frame + int(i / settings.BG_SLOWDOWN_FACTOR)
             
-            # Aggiorna la storia dei traccianti
-            if Config.TRACER_ENABLED:
-                tracer_history.append(current_logo_edges)
-            
-            # Aggiorna la storia dei traccianti dello sfondo
-            if hasattr(Config, 'BG_TRACER_ENABLED') and Config.BG_TRACER_ENABLED and current_bg_edges is not None:
-                bg_tracer_history.append(current_bg_edges)
-            
-            out.write(frame)
+            # Controllo di sicurezza: assicurati che il frame sia valido
+            if bg_frame_index >= bg_total_frames:
+                # Se superiamo la fine, torna al punto di partenza casuale
+                bg_frame_index = bg_start_frame + (bg_frame_index - bg_start_frame) % (bg_total_frames - bg_start_frame)
             
-            # --- Log di Avanzamento Magico (aggiornamento fluido) ---
-            elapsed = time.time() - start_time
-            fps = (i + 1) / elapsed if elapsed > 0 else 0
+            if bg_frame_index == bg_decode_state['index']:
+                return bg_decode_state['frame']
             
-            # Calcolo ETA con smoothing
-            remaining_frames = Config.TOTAL_FRAMES - (i + 1)
-            eta_seconds = remaining_frames / fps if fps > 0 else 0
-            eta_minutes, eta_sec = divmod(int(eta_seconds), 60)
-            eta_str = f"{eta_minutes:02d}:{eta_sec:02d}"
-
-            # Barra di avanzamento fluida con più dettagli
-            progress = (i + 1) / Config.TOTAL_FRAMES
-            bar_length = 30  # Barra più lunga per maggiore dettaglio
-            filled_length = int(bar_length * progress)
-            
-            # --- Barra colorata dinamica con gradiente ---
-            progress_color_map = [C_MAGENTA, C_BLUE, C_CYAN, C_GREEN, C_YELLOW, C_RED]
-            color_index = min(int(progress * len(progress_color_map)), len(progress_color_map) - 1)
-            bar_color = progress_color_map[color_index]
-            
-            # Barra con carattere di riempimento più preciso
-            partial_char = ['▏', '▎', '▍', '▌', '▋', '▊', '▉', '█']
-            partial_fill = (bar_length * progress) - filled_length
-            partial_index = int(partial_fill * len(partial_char))
-            partial_symbol = partial_char[min(partial_index, len(partial_char) - 1)] if partial_fill > 0 and filled_length < bar_length else ''
-            
-            bar = f"{bar_color}{'█' * filled_length}{partial_symbol}{C_END}{'░' * (bar_length - filled_length - (1 if partial_symbol else 0))}"
-            
-            # Spinner organico più fluido
-            spinner_organic = ['🌊', '🌀', '💫', '✨', '🔮', '💎', '⭐', '🌟']
-            spinner = spinner_organic[i % len(spinner_organic)]
+            # Imposta la posizione nel video di sfondo solo se non è il frame successivo
+            if bg_decode_state['index'] is None or bg_frame_index != bg_decode_state['index'] + 1:
+                bg_video.set(cv2.CAP_PROP_POS_FRAMES, bg_frame_index)
+            ret, bg_frame = bg_video.read()
             
-            # Frame rate color coding
-            fps_color = C_GREEN if fps >= 15 else C_YELLOW if fps >= 8 else C_RED
-
-            log_message = (
-                f"\r{spinner} {C_BOLD}{C_GREEN}Natisone Trip{C_END} "
-                f"{C_CYAN}[{bar}]{C_END} {C_BOLD}{progress:.1%}{C_END} "
-                f"│ {fps_color}⚡{fps:.1f}fps{C_END} "
-                f"│ {C_MAGENTA}⏱️{eta_str}{C_END} "
-                f"│ {C_YELLOW}🎬{i+1}/{Config.TOTAL_FRAMES}{C_END}"
-            )
-            print(log_message, end="", flush=True)  # flush=True per aggiornamento immediato
+            # Doppio controllo di sicurezza
+            if not ret:
+                print(f"⚠️ Errore lettura frame {bg_frame_index}, riavvolgendo...")
+                bg_video.set(cv2.CAP_PROP_POS_FRAMES, bg_start_frame)
+                ret, bg_frame = bg_video.read()
+                if not ret:
+                    # Ultima risorsa: crea frame nero
+                    bg_frame = np.zeros((settings.HEIGHT, settings.WIDTH, 3), dtype=np.uint8)
+                bg_decode_state['index'] = None
+            else:
+                bg_decode_state['index'] = bg_frame_index
+            bg_decode_state['frame'] = bg_frame
+            # RIMOSSO: Non ridimensionare qui, lo fa process_background
+            return bg_frame
         
+        # Crea uno sfondo nero se non c'è video
+        return np.zeros((settings.HEIGHT, settings.WIDTH, 3), dtype=np.uint8)
+
+    # Impostazioni di ogni frame (con l'automazione) e parametri dinamici di tutti i frame,
+    # calcolati una volta: la lettura per frame è O(1)
+    frame_settings = automated_frame_settings(settings, automation_curves, settings.TOTAL_FRAMES)
+    timeline = ParameterTimeline(settings, settings.TOTAL_FRAMES, automation_curves)
+
+    # --- Avanzamento rapido fino al primo frame richiesto ---
+    if frame_start > 0:
+        ff_start = time.time()
+        print(f"⏩ Avanzamento rapido dello stato fino al frame {frame_start}...")
+        fast_forward_to_frame(frame_start, contours, hierarchy, settings.WIDTH, settings.HEIGHT,
+                              settings.TOTAL_FRAMES, settings, read_background_frame,
+                              tracer_history, bg_tracer_history, lenses, audio_data,
+                              frame_settings=frame_settings, timeline=timeline)
+        print(f"⏩ Stato pronto in {time.time() - ff_start:.1f}s")
+
+    frames_to_render = frame_end - frame_start
+    print(f"Rendering dell'animazione in corso... ({frames_to_render} frame da elaborare, {frame_start}-{frame_end - 1})")
+    
+    # --- Pipeline a stadi: decodifica, sfondo, logo, composizione, codifica ---
+    # Ogni stadio gira in un thread con code limitate; gli stadi con stato tra frame
+    # (lenti nel logo, storia dei traccianti nella composizione) restano in ordine.
+    def decode_stage(i):
+        return {'index': i, 'bg_frame': read_background_frame(i)}
+
+    def background_stage(item):
+        item['background'] = process_background(item.pop('bg_frame'), frame_settings[item['index']])
+        return item
+
+    def logo_stage(item):
+        i = item['index']
+        config = frame_settings[i]
+        item['dynamic_params'] = timeline.params(i)
+        audio_factors = get_audio_reactive_factors(audio_data, i, config)
+        item['logo_mask'], item['logo_sdf'] = render_logo_shape(contours, hierarchy, settings.WIDTH, settings.HEIGHT,
+                                                                i, config, lenses, audio_data,
+                                                                item['dynamic_params'], audio_factors)
+        return item
+
+    # Composizione incrementale (opzionale), con verifica facoltativa contro quella completa
+    incremental = None
+    if args.incremental or args.verify_incremental or settings.INCREMENTAL_COMPOSITING:
+        if compare_presets:
+            print("ℹ️ Con --compare-presets la composizione incrementale è disattivata")
+        elif settings.LOGO_SDF_ENABLED:
+            print("ℹ️ Con LOGO_SDF_ENABLED la composizione incrementale non serve (rampe per pixel, niente sfocature da riusare)")
+        else:
+            incremental = IncrementalState(settings.INCREMENTAL_TILE_SIZE)
+    verify_report = {'frames': 0, 'mismatched': [], 'max_diff': 0}
+
+    def composite_stage(item):
+        background, logo_mask, dynamic_params = item.pop('background'), item.pop('logo_mask'), item.pop('dynamic_params')
+        logo_sdf = item.pop('logo_sdf')
+        config = frame_settings[item['index']]
+        if compare_presets:
+            # Composizione fino al blending una sola volta, poi un blending per preset
+            frames, current_logo_edges, current_bg_edges = composite_frame(
+                background, logo_mask, item['index'], config, texture_image, tracer_history, bg_tracer_history,
+                dynamic_params, logo_sdf=logo_sdf, blend_variants=preset_variants(config, compare_presets))
+            frame = contact_sheet(frames, [f"config ({config.BLENDING_PRESET})"] + compare_presets,
+                                  settings.WIDTH, settings.HEIGHT)
+        else:
+            frame, current_logo_edges, current_bg_edges = composite_frame(
+                background, logo_mask, item['index'], config, texture_image,
+                tracer_history, bg_tracer_history, dynamic_params, incremental=incremental, logo_sdf=logo_sdf)
+        
+        if args.verify_incremental and not compare_presets:
+            # Stessi ingressi (storie dei traccianti non ancora aggiornate), composizione completa
+            full_frame, full_edges, _ = composite_frame(
+                background, logo_mask, item['index'], config, texture_image,
+                tracer_history, bg_tracer_history, dynamic_params, logo_sdf=logo_sdf)
+            diff = max(int(cv2.absdiff(frame, full_frame).max()), int(cv2.absdiff(current_logo_edges, full_edges).max()))
+            verify_report['frames'] += 1
+            if diff > 0:
+                verify_report['mismatched'].append(item['index'])
+                verify_report['max_diff'] = max(verify_report['max_diff'], diff)
+        
+        # Aggiorna la storia dei traccianti
+        if settings.TRACER_ENABLED:
+            tracer_history.append(current_logo_edges)
+        
+        # Aggiorna la storia dei traccianti dello sfondo
+        if hasattr(settings, 'BG_TRACER_ENABLED') and settings.BG_TRACER_ENABLED and current_bg_edges is not None:
+            bg_tracer_history.append(current_bg_edges)
+        
+        item['frame'] = frame
+        return item
+
+    def encode_stage(item):
+        frame = item.pop('frame')
+        if frame_store is not None:
+            frame_store.write(item['index'], frame)
+        if out is not None:
+            out.write(frame)
+            variants.write(frame)
+        elif png_dir is not None:
+            cv2.imwrite(os.path.join(png_dir, f"frame_{item['index']:06d}.png"), frame)
+        else:
+            cv2.imwrite(png_path, frame)
+        return item['index']
+
+    lens_stats.reset()
+    pipeline = FramePipeline([
+        ('decode', decode_stage),
+        ('background', background_stage),
+        ('logo', logo_stage),
+        ('composite', composite_stage),
+        ('encode', encode_stage),
+    ], queue_size=settings.PIPELINE_QUEUE_SIZE)
+    
+    progress = ProgressReporter(frames_to_render, frame_start, mode=settings.PROGRESS_MODE,
+                                rate_hz=settings.PROGRESS_RATE_HZ, log_interval=settings.PROGRESS_LOG_INTERVAL,
+                                stages=pipeline.metrics)
+    
+    try:
+        for i in pipeline.run(range(frame_start, frame_end)):
+            # L'avanzamento scrive solo a frequenza fissa, non a ogni frame
+            progress.update(i, i - frame_start + 1)
+        
+        progress.finish()
+        print(pipeline.report())
+        if incremental is not None:
+            print(incremental.report())
+        if settings.LENS_DEFORMATION_ENABLED:
+            print(lens_stats.report())
+        if args.verify_incremental:
+            if verify_report['mismatched']:
+                print(f"❌ Composizione incrementale diversa da quella completa su {len(verify_report['mismatched'])}/"
+                      f"{verify_report['frames']} frame (es. {verify_report['mismatched'][:5]}, differenza max {verify_report['max_diff']})")
+            else:
+                print(f"✅ Composizione incrementale identica a quella completa su {verify_report['frames']} frame")
         print(f"\n{C_BOLD}{C_GREEN}🌿 Cristallizzazione ULTRA completata con effetti IPNOTICI!{C_END}")
         print(f"💥 Deformazioni organiche ESAGERATE ma ultra-fluide!")
         print(f"� Traccianti DOPPI (logo rosa + sfondo viola) dinamici!")
@@ -2590,49 +2934,73 @@ def main():
         
     finally:
         # Assicurati sempre di chiudere correttamente i file video
-        out.release()
+        if out is not None:
+            out.release()
+        variant_paths = variants.close()
         if bg_video: 
             bg_video.release()
+        if frame_store is not None:
+            if audio_data:
+                frame_store.set_audio(audio_data['selected_file'], audio_data['start_offset'] + frame_start / settings.FPS)
+            frame_store.close()
+            print(f"🗃️ {frame_store.meta['frames_written']} frame archiviati: python -m components.frame_store {frame_store.path} --whatsapp/--gif/--video")
         
         # --- AGGIUNTA AUDIO AL VIDEO ---
-        if audio_data:
+        if png_output:
+            # Sequenza PNG: niente audio da aggiungere
+            final_output_filename = png_dir if png_dir is not None else png_path
+        elif audio_data:
             print(f"\n{C_BOLD}{C_CYAN}🎵 Aggiungendo audio al video...{C_END}")
-            final_output_filename = add_audio_to_video(output_filename, audio_data, Config.DURATION_SECONDS)
+            # Per un intervallo parziale l'audio parte dal primo frame renderizzato
+            clip_audio = dict(audio_data, start_offset=audio_data['start_offset'] + frame_start / settings.FPS)
+            final_output_filename = add_audio_to_video(output_filename, clip_audio, frames_to_render / settings.FPS)
+            for name, path in variant_paths.items():
+                variant_paths[name] = add_audio_to_video(path, clip_audio, frames_to_render / settings.FPS)
         else:
             final_output_filename = output_filename
-            
-        if Config.TEST_MODE:
+        
+        for name, path in variant_paths.items():
+            print(f"🎞️ Variante {name}: {C_BOLD}{path}{C_END}")
+        
+        if partial_render:
+            print(f"🔎 PARZIALE (frame {frame_start}-{frame_end - 1}) - Salvato in: {C_BOLD}{final_output_filename}{C_END}")
+        elif settings.TEST_MODE:
             print(f"🧪 TEST - Animazione salvata in: {C_BOLD}{final_output_filename}{C_END}")
         else:
             print(f"🎬 PRODUZIONE - Animazione salvata in: {C_BOLD}{final_output_filename}{C_END}")
 
         # --- GESTIONE VERSIONAMENTO ---
-        try:
-            print(f"\n{C_BLUE}🚀 Avvio gestore di versioni...{C_END}")
-            source_script_path = os.path.abspath(__file__)
-            # Assicurati che il percorso di version_manager.py sia corretto
-            version_manager_path = os.path.join(os.path.dirname(source_script_path), 'version_manager.py')
+        if partial_render:
+            print("ℹ️ Render parziale: versionamento saltato")
+        elif compare_presets:
+            print("ℹ️ Confronto preset: versionamento saltato")
+        else:
+            try:
+                print(f"\n{C_BLUE}🚀 Avvio gestore di versioni...{C_END}")
+                source_script_path = os.path.abspath(__file__)
+                # Assicurati che il percorso di version_manager.py sia corretto
+                version_manager_path = os.path.join(os.path.dirname(source_script_path), 'version_manager.py')
             
-            if os.path.exists(version_manager_path):
-                result = subprocess.run(
-                    [sys.executable, version_manager_path, final_output_filename, source_script_path],
-                    capture_output=True,
-                    text=True,
-                    check=False # Mettiamo a False per gestire l'errore manualmente
-                )
-                # Stampa sempre stdout e stderr per il debug
-                print(result.stdout)
-                if result.stderr:
-                    # Gestisce il caso "nothing to commit" come un'informazione, non un errore
-                    if "nothing to commit" in result.stderr.lower():
-                         print(f"{C_GREEN}ℹ️ Nessuna nuova modifica da salvare nel versionamento.{C_END}")
-                    else:
-                        print(f"{C_YELLOW}Output di errore dal gestore versioni:{C_END}\n{result.stderr}")
-            else:
-                print(f"{C_YELLOW}ATTENZIONE: version_manager.py non trovato. Saltando il versionamento.{C_END}")
+                if os.path.exists(version_manager_path):
+                    result = subprocess.run(
+                        [sys.executable, version_manager_path, final_output_filename, source_script_path],
+                        capture_output=True,
+                        text=True,
+                        check=False # Mettiamo a False per gestire l'errore manualmente
+                    )
+                    # Stampa sempre stdout e stderr per il debug
+                    print(result.stdout)
+                    if result.stderr:
+                        # Gestisce il caso "nothing to commit" come un'informazione, non un errore
+                        if "nothing to commit" in result.stderr.lower():
+                             print(f"{C_GREEN}ℹ️ Nessuna nuova modifica da salvare nel versionamento.{C_END}")
+                        else:
+                            print(f"{C_YELLOW}Output di errore dal gestore versioni:{C_END}\n{result.stderr}")
+                else:
+                    print(f"{C_YELLOW}ATTENZIONE: version_manager.py non trovato. Saltando il versionamento.{C_END}")
 
-        except Exception as e:
-            print(f"{C_YELLOW}Errore inatteso durante il versionamento: {e}{C_END}")
+            except Exception as e:
+                print(f"{C_YELLOW}Errore inatteso durante il versionamento: {e}{C_END}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,10 +1,16 @@
 import cv2
 import numpy as np
-import fitz  # PyMuPDF
 import sys
+import os
+import argparse
+import shutil
+import subprocess
+import time
 from datetime import datetime
 import random
 
+from components.logo import pdf_logo_contours
+
 # --- CONFIGURAZIONE MINIMALE ---
 
 class Config:
@@ -15,56 +21,34 @@ class Config:
     PDF_PATH = 'input/logo.pdf'
     LOGO_COLOR = (255, 255, 255)
     MAGIC_SYMBOLS = ['🔮', '✨', '🌟', '🌿', '🌊']
+    OUTPUT_DIR = 'output'
+    PADDING_FRACTION = 0.2       # Frazione del frame lasciata libera attorno al logo
+    LOGO_RASTER_OVERSAMPLE = 4.0 # Pixel del raster per pixel del logo nel video
+    # Codifica del video statico: 'auto' (ffmpeg se installato, altrimenti opencv), 'ffmpeg', 'opencv',
+    # 'single' (un solo frame che dura tutto il video: pochi ms, ma il file ha frame rate 1/durata)
+    STATIC_ENCODER = 'auto'
 
 # --- FUNZIONI ESSENZIALI ---
 
-def rasterize_pdf_to_image(pdf_path, scale=2):
-    """Rasterizza la prima pagina di un PDF in un'immagine."""
-    print(f"Rasterizzazione PDF: {pdf_path}")
+def load_logo_contours(pdf_path, width, height):
+    """
+    Contorni e gerarchia del logo di un PDF centrati nel frame width x height (components/logo.py).
+
+    Il raster segue le dimensioni del video ed è in cache per file e scala: lo stesso PDF
+    non viene riletto finché non cambia.
+
+    Returns:
+        tuple: (contorni, gerarchia), oppure None se il PDF non si legge
+    """
+    if not os.path.isfile(pdf_path):
+        print(f"Errore: PDF non trovato: {pdf_path}")
+        return None
     try:
-        doc = fitz.open(pdf_path)
-        page = doc[0]
-        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale))
-        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
-        return img
+        return pdf_logo_contours(pdf_path, width, height, Config.PADDING_FRACTION,
+                                 oversample=Config.LOGO_RASTER_OVERSAMPLE)
     except Exception as e:
         print(f"Errore durante la lettura del PDF: {e}")
-        sys.exit(1)
-
-def extract_contours_from_image(img):
-    """Estrae i contorni (con gerarchia per i buchi) da un'immagine."""
-    gray_img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    _, binary_img = cv2.threshold(gray_img, 50, 255, cv2.THRESH_BINARY_INV)
-    contours, hierarchy = cv2.findContours(binary_img, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE)
-    print(f"Estratti {len(contours)} contorni.")
-    return contours, hierarchy
-
-def center_and_scale_contours(contours, target_width, target_height, padding_fraction=0.2):
-    """Centra e ridimensiona i contorni per adattarli al canvas."""
-    if not contours:
-        return []
-    all_points = np.vstack([c for c in contours])
-    x, y, w, h = cv2.boundingRect(all_points)
-    
-    contour_center_x = x + w / 2
-    contour_center_y = y + h / 2
-    canvas_center_x = target_width / 2
-    canvas_center_y = target_height / 2
-    
-    canvas_drawable_width = target_width * (1 - padding_fraction)
-    canvas_drawable_height = target_height * (1 - padding_fraction)
-    
-    scale = min(canvas_drawable_width / w if w > 0 else 1, canvas_drawable_height / h if h > 0 else 1)
-
-    transformed_contours = []
-    for contour in contours:
-        c_float = contour.astype(np.float32)
-        c_float[:, :, 0] = (c_float[:, :, 0] - contour_center_x) * scale + canvas_center_x
-        c_float[:, :, 1] = (c_float[:, :, 1] - contour_center_y) * scale + canvas_center_y
-        transformed_contours.append(c_float.astype(np.int32))
-        
-    print(f"Logo centrato e ridimensionato.")
-    return transformed_contours
+        return None
 
 def render_contours_on_canvas(contours, hierarchy, width, height, color):
     """Disegna i contorni su un canvas, gestendo i buchi."""
@@ -81,46 +65,166 @@ def render_contours_on_canvas(contours, hierarchy, width, height, color):
             cv2.drawContours(canvas, [contour], -1, (0, 0, 0), thickness=cv2.FILLED)
     return canvas
 
-def save_static_video(frame, duration_seconds, fps, width, height):
-    """Salva un video statico ripetendo lo stesso frame."""
+def static_output_filename(output_dir, name=None):
+    """Nome del video statico: static_logo[_<nome>]_<timestamp>_<simbolo>.mp4."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     magic_symbol = random.choice(Config.MAGIC_SYMBOLS)
-    output_filename = f"output/static_logo_{timestamp}_{magic_symbol}.mp4"
-    
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')
-    out = cv2.VideoWriter(output_filename, fourcc, fps, (width, height))
-
+    prefix = f"static_logo_{name}" if name else "static_logo"
+    return os.path.join(output_dir, f"{prefix}_{timestamp}_{magic_symbol}.mp4")
+
+def encode_still_ffmpeg(frame, num_frames, fps, output_filename):
+    """
+    Codifica un'immagine ferma con ffmpeg: un solo frame raw sul pipe, ripetuto dal filtro
+    loop dentro ffmpeg (x264 con tune stillimage codifica le ripetizioni quasi a costo zero).
+
+    Returns:
+        bool: True se ffmpeg ha scritto il video
+    """
+    height, width = frame.shape[:2]
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}", '-r', str(fps), '-i', 'pipe:0',
+        '-vf', f"loop=loop={num_frames - 1}:size=1:start=0",
+        '-frames:v', str(num_frames),
+        '-c:v', 'libx264', '-preset', 'veryfast', '-tune', 'stillimage', '-pix_fmt', 'yuv420p',
+        '-movflags', '+faststart', output_filename,
+    ]
+    result = subprocess.run(cmd, input=np.ascontiguousarray(frame).tobytes(), stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        print(f"Errore ffmpeg: {result.stderr.decode(errors='replace').strip()}")
+        return False
+    return True
+
+def encode_still_opencv(frame, num_frames, fps, output_filename):
+    """
+    Codifica un'immagine ferma con cv2.VideoWriter, scrivendo lo stesso frame num_frames volte.
+    Con num_frames=1 e fps=1/durata la durata sta tutta nel contenitore (encoder 'single').
+    """
+    height, width = frame.shape[:2]
+    out = None
+    for codec in ('avc1', 'mp4v'):
+        out = cv2.VideoWriter(output_filename, cv2.VideoWriter_fourcc(*codec), fps, (width, height))
+        if out.isOpened():
+            break
     if not out.isOpened():
-        print("Errore: Impossibile creare il file video.")
-        return
-
-    print(f"\nSalvataggio video: {output_filename}")
-    num_frames = duration_seconds * fps
-    for i in range(num_frames):
+        return False
+    for _ in range(num_frames):
         out.write(frame)
-        progress = (i + 1) / num_frames
-        bar = '█' * int(progress * 20) + '-' * (20 - int(progress * 20))
-        sys.stdout.write(f'\rSalvataggio: [{bar}] {progress:.0%}')
-        sys.stdout.flush()
-
     out.release()
-    print(f"\nVideo salvato con successo!")
+    return True
 
-# --- ESECUZIONE PRINCIPALE ---
+def save_static_video(frame, duration_seconds, fps, width, height, output_filename=None, encoder=None):
+    """
+    Salva un video statico dello stesso frame, senza output per frame.
 
-def main():
-    print("Avvio script per video statico del logo...")
+    Args:
+        output_filename: Percorso del video (default: static_logo_<timestamp>_<simbolo>.mp4 in output/)
+        encoder: 'auto' (ffmpeg se installato), 'ffmpeg', 'opencv' o 'single' (default: Config.STATIC_ENCODER)
+
+    Returns:
+        str: Percorso del video salvato, oppure None
+    """
+    if output_filename is None:
+        output_filename = static_output_filename(Config.OUTPUT_DIR)
+    encoder = encoder or Config.STATIC_ENCODER
+    if encoder == 'auto':
+        encoder = 'ffmpeg' if shutil.which('ffmpeg') else 'opencv'
+    num_frames = max(1, int(round(duration_seconds * fps)))
+
+    if frame.shape[:2] != (height, width):
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+    print(f"\nSalvataggio video: {output_filename}")
+    if encoder == 'ffmpeg':
+        saved = encode_still_ffmpeg(frame, num_frames, fps, output_filename)
+    elif encoder == 'single':
+        saved = encode_still_opencv(frame, 1, 1.0 / duration_seconds, output_filename)
+    else:
+        saved = encode_still_opencv(frame, num_frames, fps, output_filename)
+    if not saved:
+        print("Errore: Impossibile creare il file video.")
+        return None
 
-    # 1. Carica e processa il logo
-    img = rasterize_pdf_to_image(Config.PDF_PATH)
-    contours, hierarchy = extract_contours_from_image(img)
-    centered_contours = center_and_scale_contours(contours, Config.WIDTH, Config.HEIGHT)
+    print(f"Video salvato con successo! ({1 if encoder == 'single' else num_frames} frame, {encoder})")
+    return output_filename
 
-    # 2. Disegna il logo su un frame
-    logo_frame = render_contours_on_canvas(centered_contours, hierarchy, Config.WIDTH, Config.HEIGHT, Config.LOGO_COLOR)
+# --- ESECUZIONE PRINCIPALE ---
+
+def collect_pdfs(paths):
+    """PDF da elaborare: i file indicati e i .pdf (in ordine alfabetico) delle cartelle indicate."""
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdfs.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                        if name.lower().endswith('.pdf'))
+        else:
+            pdfs.append(path)
+    return pdfs
+
+def parse_sizes(spec):
+    """Dimensioni LARGHEZZAxALTEZZA separate da virgola (es. 1920x1080,1080x1920)."""
+    sizes = []
+    for item in spec.split(','):
+        width, height = (int(value) for value in item.lower().strip().split('x'))
+        sizes.append((width, height))
+    return sizes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Video statico del logo da uno o più PDF")
+    parser.add_argument('pdfs', nargs='*', default=[Config.PDF_PATH],
+                        help=f"PDF o cartelle di PDF (default: {Config.PDF_PATH})")
+    parser.add_argument('--size', default=f"{Config.WIDTH}x{Config.HEIGHT}",
+                        help="Dimensioni LARGHEZZAxALTEZZA, anche più di una separate da virgola")
+    parser.add_argument('--duration', type=float, default=Config.VIDEO_DURATION_SECONDS, help="Durata in secondi")
+    parser.add_argument('--fps', type=int, default=Config.FPS, help="Frame rate")
+    parser.add_argument('--output-dir', default=Config.OUTPUT_DIR, help="Cartella dei video")
+    parser.add_argument('--encoder', choices=['auto', 'ffmpeg', 'opencv', 'single'], default=Config.STATIC_ENCODER,
+                        help="ffmpeg (un frame ripetuto dentro ffmpeg), cv2.VideoWriter, o un solo frame lungo tutto il video")
+    args = parser.parse_args(argv)
 
-    # 3. Salva il video
-    save_static_video(logo_frame, Config.VIDEO_DURATION_SECONDS, Config.FPS, Config.WIDTH, Config.HEIGHT)
+    print("Avvio script per video statico del logo...")
+    pdfs = collect_pdfs(args.pdfs)
+    sizes = parse_sizes(args.size)
+    if not pdfs:
+        print("Nessun PDF da elaborare.")
+        sys.exit(1)
+    if args.duration <= 0 or args.fps <= 0:
+        print("Errore: durata e frame rate devono essere positivi.")
+        sys.exit(1)
+    if args.encoder == 'ffmpeg' and not shutil.which('ffmpeg'):
+        print("Errore: ffmpeg non trovato.")
+        sys.exit(1)
+    os.makedirs(args.output_dir, exist_ok=True)
+    # Con più PDF o più dimensioni il nome del video riporta PDF e dimensioni
+    batch = len(pdfs) > 1 or len(sizes) > 1
+
+    failed = 0
+    for pdf_path in pdfs:
+        for width, height in sizes:
+            start = time.perf_counter()
+            # 1. Carica il logo centrato (raster alla risoluzione del video, in cache)
+            loaded = load_logo_contours(pdf_path, width, height)
+            if loaded is None:
+                failed += 1
+                continue
+            centered_contours, hierarchy = loaded
+
+            # 2. Disegna il logo su un frame
+            logo_frame = render_contours_on_canvas(centered_contours, hierarchy, width, height, Config.LOGO_COLOR)
+
+            # 3. Salva il video
+            name = f"{os.path.splitext(os.path.basename(pdf_path))[0]}_{width}x{height}" if batch else None
+            output_filename = static_output_filename(args.output_dir, name)
+            if save_static_video(logo_frame, args.duration, args.fps, width, height, output_filename,
+                                 args.encoder) is None:
+                failed += 1
+            else:
+                print(f"⏱️ {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    if failed:
+        print(f"⚠️ {failed} video non creati")
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()